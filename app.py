@@ -1,24 +1,51 @@
-import io
+import json
+import os
+import time
+import uuid
+from dataclasses import replace
+from datetime import timedelta
 import streamlit as st
 import pandas as pd
 import pulp
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from kgj.diagnostics import Phases
+from kgj.engine import prepare_data, sized_params, solve_dispatch
+from kgj.inputs import (FORMATS, fwd_year_averages, fwd_years, input_report, input_warnings, merged_inputs,
+                        shifted_fwd, time_step)
+from kgj.jobs import job_queue
+from kgj.montecarlo import monte_carlo
+from kgj.params import SolveSettings, Tech
+from kgj.plotting import MAX_POINTS, downsample, line, stacked, use_webgl
+from kgj.ledger import hourly_ledger
+from kgj.report import EXPORTS, build_results, key_metrics, monthly_summary, profit_breakdown
+from kgj.solver import available_backends
+from kgj.store import ResultStore, result_key
+from kgj.sweep import price_grid, price_sweep
+from kgj.years import run_years
+
 st.set_page_config(page_title="KGJ Strategy Expert PRO", layout="wide")
 
 # ────────────────────────────────────────────────
 # Session state
 # ────────────────────────────────────────────────
 for key, default in [
-    ('fwd_data', None), ('avg_ee_raw', 100.0), ('avg_gas_raw', 50.0),
-    ('ee_new', 100.0), ('gas_new', 50.0),
+    ('fwd_data', None), ('fwd_key', None), ('result_key', None), ('avg_ee_raw', 100.0), ('avg_gas_raw', 50.0),
+    ('ee_new', 100.0), ('gas_new', 50.0), ('sweep', None), ('mc', None), ('years', None),
+    ('job_owner', None), ('follow_job', None),
 ]:
     if key not in st.session_state:
         st.session_state[key] = default
+if st.session_state.job_owner is None:   # identita sezení ve frontě výpočtů
+    st.session_state.job_owner = uuid.uuid4().hex
 
 st.title("🚀 KGJ Strategy & Dispatch Optimizer PRO")
 
+store   = ResultStore()
+run_key = None
+timing  = Phases()   # časy fází tohoto běhu skriptu (panel Diagnostika)
+
 # ────────────────────────────────────────────────
 # SIDEBAR
 # ────────────────────────────────────────────────
@@ -34,21 +61,16 @@ with st.sidebar:
 
     st.divider()
     st.header("📈 Tržní ceny (FWD)")
-    fwd_file = st.file_uploader("Nahraj FWD křivku (Excel)", type=["xlsx"])
+    fwd_file = st.file_uploader("Nahraj FWD křivku (Excel / CSV / Parquet)", type=list(FORMATS))
 
     if fwd_file is not None:
         try:
-            df_raw = pd.read_excel(fwd_file)
-            df_raw.columns = [str(c).strip() for c in df_raw.columns]
-            date_col = df_raw.columns[0]
-            df_raw[date_col] = pd.to_datetime(df_raw[date_col], dayfirst=True)
-
-            years    = sorted(df_raw[date_col].dt.year.unique())
-            sel_year = st.selectbox("Rok pro analýzu", years)
-            df_year  = df_raw[df_raw[date_col].dt.year == sel_year].copy()
+            # Parsování je v cache podle obsahu souboru – rerun po změně widgetu Excel nečte znovu
+            fwd_bytes = fwd_file.getvalue()
+            years     = fwd_years(fwd_bytes)
+            sel_year  = st.selectbox("Rok pro analýzu", years)
 
-            avg_ee  = float(df_year.iloc[:, 1].mean())
-            avg_gas = float(df_year.iloc[:, 2].mean())
+            avg_ee, avg_gas = fwd_year_averages(fwd_bytes, sel_year)
             st.session_state.avg_ee_raw  = avg_ee
             st.session_state.avg_gas_raw = avg_gas
 
@@ -57,12 +79,10 @@ with st.sidebar:
             ee_new  = st.number_input("Cílová base cena EE [€/MWh]",   value=round(avg_ee,  1), step=1.0)
             gas_new = st.number_input("Cílová base cena Plyn [€/MWh]", value=round(avg_gas, 1), step=1.0)
 
-            df_fwd = df_year.copy()
-            df_fwd.columns = ['datetime', 'ee_original', 'gas_original']
-            df_fwd['ee_price']  = df_fwd['ee_original']  + (ee_new  - avg_ee)
-            df_fwd['gas_price'] = df_fwd['gas_original'] + (gas_new - avg_gas)
+            df_fwd = shifted_fwd(fwd_bytes, sel_year, ee_new, gas_new)
 
             st.session_state.fwd_data = df_fwd
+            st.session_state.fwd_key  = (fwd_bytes, sel_year, ee_new, gas_new)
             st.session_state.ee_new   = ee_new
             st.session_state.gas_new  = gas_new
             st.success("FWD načteno ✔")
@@ -107,7 +127,7 @@ if st.session_state.fwd_data is not None:
             # Křivky trvání cen EE a plynu
             ee_sorted  = df_fwd['ee_price'].sort_values(ascending=False).values
             gas_sorted = df_fwd['gas_price'].sort_values(ascending=False).values
-            hours      = list(range(1, len(ee_sorted) + 1))
+            hours      = [i * time_step(df_fwd['datetime']) for i in range(1, len(ee_sorted) + 1)]
             fig = make_subplots(rows=1, cols=2,
                 subplot_titles=("Křivka trvání – EE", "Křivka trvání – Plyn"))
             fig.add_trace(go.Scatter(x=hours, y=ee_sorted, name='EE',
@@ -121,6 +141,8 @@ if st.session_state.fwd_data is not None:
             fig.update_layout(height=350, showlegend=False)
             st.plotly_chart(fig, use_container_width=True)
 
+timing.lap('Vstupy: FWD')
+
 # ────────────────────────────────────────────────
 # PARAMETRY
 # ────────────────────────────────────────────────
@@ -163,6 +185,11 @@ with t_tech:
         with c2:
             p['k_start_cost']  = st.number_input("Náklady na start [€/start]",    value=1200.0)
             p['k_min_runtime'] = st.number_input("Min. doba běhu [hod]",          value=4, min_value=1)
+            p['k_min_downtime'] = st.number_input("Min. doba odstávky [hod]",     value=1, min_value=1)
+            p['k_ramp_up']     = st.number_input("Max. nárůst výkonu [MW/h]",     value=0.0, min_value=0.0,
+                help="Rampa tepelného výkonu mezi hodinami; 0 = bez omezení. Start smí skočit na min. zatížení.")
+            p['k_ramp_down']   = st.number_input("Max. pokles výkonu [MW/h]",     value=0.0, min_value=0.0,
+                help="0 = bez omezení. Odstavení smí klesnout z min. zatížení na nulu.")
         k_el_derived = p['k_th'] * (p['k_eff_el'] / p['k_eff_th'])
         p['k_el']    = k_el_derived
         st.caption(f"ℹ️ Odvozený el. výkon KGJ: **{k_el_derived:.3f} MW** | "
@@ -233,581 +260,788 @@ with t_tech:
 st.divider()
 st.markdown(
     "**Formát lokálních dat:** 1. sloupec = datetime | `Poptávka po teple (MW)` "
-    "| `FVE (MW)` jako capacity factor **0–1** (pokud FVE zapnuta)."
+    "| `FVE (MW)` jako capacity factor **0–1** (pokud FVE zapnuta). Excel, CSV (`;` = desetinná čárka) "
+    "nebo Parquet."
 )
-loc_file = st.file_uploader("📂 Lokální data (poptávka tepla, FVE profil, ...)", type=["xlsx"])
+loc_file = st.file_uploader("📂 Lokální data (poptávka tepla, FVE profil, ...)", type=list(FORMATS))
 
 if st.session_state.fwd_data is not None and loc_file is not None:
-    df_loc = pd.read_excel(loc_file)
-    df_loc.columns = [str(c).strip() for c in df_loc.columns]
-    df_loc.rename(columns={df_loc.columns[0]: 'datetime'}, inplace=True)
-    df_loc['datetime'] = pd.to_datetime(df_loc['datetime'], dayfirst=True)
-
-    df = pd.merge(st.session_state.fwd_data, df_loc, on='datetime', how='inner').fillna(0)
+    timing.lap('Parametry (UI)')
+    df = merged_inputs(*st.session_state.fwd_key, loc_file.getvalue())
     T  = len(df)
-
-    if use_fve and 'fve_installed_p' in p and 'FVE (MW)' in df.columns:
-        df['FVE (MW)'] = df['FVE (MW)'].clip(0, 1) * p['fve_installed_p']
-
-    st.info(f"Načteno **{T}** hodin ({df['datetime'].min().date()} → {df['datetime'].max().date()})")
-
+    input_warns = input_warnings(input_report(*st.session_state.fwd_key, loc_file.getvalue()))
+
+    df = prepare_data(df, p, {'fve': use_fve})
+    timing.lap('Vstupy: lokální data a sloučení')
+
+    step = time_step(df['datetime'])
+    st.info(f"Načteno **{T}** kroků po **{step * 60:g} min** ({T * step:,.0f} h, "
+            f"{df['datetime'].min().date()} → {df['datetime'].max().date()})")
+    if input_warns:
+        with st.expander(f"⚠️ Kontrola vstupů ({len(input_warns)})"):
+            for w in input_warns:
+                st.warning(w)
+
+    with st.expander("🧩 Režim řešení"):
+        solve_modes = {"Celý horizont (jedna MIP)":              'full',
+                       "Po oknech – postupně (rolling horizon)":  'rolling',
+                       "Po oknech – paralelně (nezávislá okna)":  'parallel',
+                       "Screening – rychlý odhad (heuristika + LP mez)": 'screening',
+                       "Reprezentativní dny – rychlý roční odhad": 'representative',
+                       "Dimenzování TES / BESS (kapacity jako proměnné)": 'sizing'}
+        # Podhodinová data: výchozí postupná okna (celoroční MIP má čtyřnásobek kroků)
+        solve_mode = solve_modes[st.radio("Režim", list(solve_modes), index=1 if step < 1 else 0,
+            help="Postupně: konec okna (SOC, stav KGJ) je počátkem dalšího. "
+                 "Paralelně: okna začínají i končí na výchozím SOC a řeší se souběžně. "
+                 "Screening: dispečink podle merit orderu bez MIP a horní mez zisku z LP relaxace "
+                 "(po oknech) – optimum leží mezi nimi. "
+                 "Reprezentativní dny: model jen pro typické dny (k-medoidy) vážené počtem dní, "
+                 "akumulace propojená přes celý rok.")]
+        rep_days = 12
+        if solve_mode == 'representative':
+            rep_days = int(st.number_input("Počet reprezentativních dní", value=12, min_value=1, max_value=366,
+                help="Více dní = přesnější odhad, delší výpočet."))
+        sizing = None
+        if solve_mode == 'sizing':
+            st.caption("Kapacity akumulace jsou proměnné jedné MIP – výsledkem jsou optimální velikosti "
+                       "i dispečink. Investice se započte poměrně k délce horizontu.")
+            sizing = {}
+            for key, label, unit, on, cost in [('tes_cap',  "TES kapacita",  "MWh", use_tes,  300.0),
+                                               ('bess_cap', "BESS kapacita", "MWh", use_bess, 15000.0),
+                                               ('bess_p',   "BESS výkon",    "MW",  use_bess, 5000.0)]:
+                if not on:
+                    continue
+                c1, c2, c3 = st.columns(3)
+                lo = c1.number_input(f"{label} min [{unit}]", value=0.0, min_value=0.0, key=f'size_min_{key}')
+                hi = c2.number_input(f"{label} max [{unit}]", value=max(3 * p[key], 1.0), min_value=0.0,
+                                     key=f'size_max_{key}')
+                sizing[key] = [lo, max(hi, lo), c3.number_input(
+                    f"{label} – investice [€/{unit} a rok]", value=cost, min_value=0.0, key=f'size_cost_{key}',
+                    help="Anualizovaná investice (splátka + fixní O&M) na jednotku kapacity.")]
+        c1, c2, c3 = st.columns(3)
+        win_period  = {"Měsíc": 'M', "Týden": 'W'}[c1.selectbox("Délka okna", ["Měsíc", "Týden"])]
+        win_overlap = c2.number_input("Přesah okna [hod]", value=24, min_value=0,
+            help="Jen pro postupný režim – hodiny za koncem okna, které se řeší, ale nepoužijí.")
+        win_ref     = c3.checkbox("Porovnat s celoročním řešením", value=False,
+            help="Navíc spočte jednu celoroční MIP a ukáže odchylku sešitého výsledku.")
+        if use_kgj and step < 1:
+            commit_steps = {"Celé hodiny": 1.0, f"Každý krok ({step * 60:g} min)": None}
+            commit = commit_steps[st.selectbox("Start / odstavení KGJ", list(commit_steps),
+                help="Po hodinách: výkon se řídí v každém kroku, o chodu KGJ se rozhoduje po celých "
+                     "hodinách – model má stejně binárních proměnných jako hodinový a řeší se výrazně "
+                     "rychleji.")]
+            if commit is not None:
+                p['k_commit_step'] = commit
+        warm_modes = {"Heuristika (merit order)": 'heuristic',
+                      "Nejpodobnější uložený výpočet": 'previous',
+                      "Bez počátečního řešení": 'none'}
+        warm_start = warm_modes[st.selectbox("Počáteční řešení (warm start)", list(warm_modes),
+            help="CBC začne s přípustným řešením – rychleji najde dobré řešení. Uložený výpočet se "
+                 "použije, jen pokud má stejné technologie a horizont; jinak heuristika.")]
+
+    with st.expander("⚙️ Solver"):
+        c1, c2, c3, c4, c5 = st.columns(5)
+        backend    = c1.selectbox("Backend", available_backends(), format_func=str.upper,
+            help="CBC je přibalený k PuLP; HiGHS vyžaduje balíček highspy.")
+        threads    = int(c2.number_input("Vlákna", value=os.cpu_count() or 1, min_value=1,
+            help="Paralelní branch-and-bound. V paralelním režimu oken běží každé okno ve vlastním procesu."))
+        gap_rel    = c3.number_input("Rel. mezera MIP [%]", value=0.1, min_value=0.0, step=0.1,
+            help="Solver skončí, jakmile je řešení v této vzdálenosti od nejlepší meze.")
+        gap_abs    = c4.number_input("Abs. mezera MIP [€]", value=0.0, min_value=0.0, step=100.0,
+            help="0 = výchozí hodnota solveru.")
+        time_limit = c5.number_input("Časový limit [s]", value=300, min_value=1, step=30)
+        c1, c2 = st.columns(2)
+        presolve   = c1.checkbox("Presolve", value=True)
+        shadow     = c2.checkbox("Mezní ceny tepla a EE", value=True,
+            disabled=solve_mode in ('screening', 'representative'),
+            help="Po řešení zafixuje chod KGJ a vyřeší jedno LP – duály bilancí dají mezní cenu "
+                 "tepla a elektřiny v každé hodině. Ve screeningu a u reprezentativních dní se nepočítají.")
+
+    tech = Tech(use_kgj, use_boil, use_ek, use_tes, use_bess, use_fve, use_ext_heat).to_dict()
+    settings = SolveSettings(mode=solve_mode, period=win_period, overlap=int(win_overlap), reference=win_ref,
+                             warm_start=warm_start, time_limit=float(time_limit), backend=backend,
+                             threads=threads, gap_rel=gap_rel / 100, gap_abs=gap_abs or None, presolve=presolve,
+                             rep_days=rep_days, shadow_prices=shadow, sizing=sizing)
+    run_key  = result_key(p, tech, df, settings.to_dict())
+
+    timing.lap('Nastavení řešení (UI)')
     if st.button("🏁 Spustit optimalizaci", type="primary"):
-        with st.spinner("Probíhá optimalizace (CBC solver) …"):
-
-            model = pulp.LpProblem("KGJ_Dispatch", pulp.LpMaximize)
-
-            # ── Proměnné ─────────────────────────────────────
-            if use_kgj:
-                q_kgj = pulp.LpVariable.dicts("q_KGJ",  range(T), 0, p['k_th'])
-                on    = pulp.LpVariable.dicts("on",      range(T), 0, 1, "Binary")
-                start = pulp.LpVariable.dicts("start",   range(T), 0, 1, "Binary")
-            else:
-                q_kgj = on = start = {t: 0 for t in range(T)}
-
-            q_boil = pulp.LpVariable.dicts("q_Boil", range(T), 0, p['b_max']) \
-                     if use_boil else {t: 0 for t in range(T)}
-            q_ek   = pulp.LpVariable.dicts("q_EK",   range(T), 0, p['ek_max']) \
-                     if use_ek   else {t: 0 for t in range(T)}
-            q_imp  = pulp.LpVariable.dicts("q_Imp",  range(T), 0, p['imp_max']) \
-                     if use_ext_heat else {t: 0 for t in range(T)}
-
-            if use_tes:
-                tes_soc = pulp.LpVariable.dicts("TES_SOC", range(T + 1), 0, p['tes_cap'])
-                tes_in  = pulp.LpVariable.dicts("TES_In",  range(T), 0)
-                tes_out = pulp.LpVariable.dicts("TES_Out", range(T), 0)
-                model  += tes_soc[0] == p['tes_cap'] * 0.5
-            else:
-                tes_soc = {t: 0 for t in range(T + 1)}
-                tes_in = tes_out = {t: 0 for t in range(T)}
-
-            if use_bess:
-                bess_soc = pulp.LpVariable.dicts("BESS_SOC", range(T + 1), 0, p['bess_cap'])
-                bess_cha = pulp.LpVariable.dicts("BESS_Cha", range(T), 0, p['bess_p'])
-                bess_dis = pulp.LpVariable.dicts("BESS_Dis", range(T), 0, p['bess_p'])
-                model   += bess_soc[0] == p['bess_cap'] * 0.2
-            else:
-                bess_soc = {t: 0 for t in range(T + 1)}
-                bess_cha = bess_dis = {t: 0 for t in range(T)}
-
-            ee_export      = pulp.LpVariable.dicts("ee_export",  range(T), 0)
-            ee_import      = pulp.LpVariable.dicts("ee_import",  range(T), 0)
-            heat_shortfall = pulp.LpVariable.dicts("shortfall",  range(T), 0)
-
-            # ── KGJ omezení ───────────────────────────────────
-            if use_kgj:
-                for t in range(T):
-                    model += q_kgj[t] <= p['k_th'] * on[t]
-                    model += q_kgj[t] >= p['k_min'] * p['k_th'] * on[t]
-                model += start[0] == on[0]
-                for t in range(1, T):
-                    model += start[t] >= on[t] - on[t - 1]
-                    model += start[t] <= on[t]
-                    model += start[t] <= 1 - on[t - 1]
-                min_rt = int(p['k_min_runtime'])
-                for t in range(T):
-                    for dt in range(1, min_rt):
-                        if t + dt < T:
-                            model += on[t + dt] >= start[t]
-
-            # ── Hlavní smyčka ─────────────────────────────────
-            obj      = []
-            boil_eff = p.get('boil_eff', 0.95)
-            ek_eff   = p.get('ek_eff',   0.98)
-
-            for t in range(T):
-                p_ee_m  = df['ee_price'].iloc[t]
-                p_gas_m = df['gas_price'].iloc[t]
-
-                p_gas_kgj  = p.get('kgj_gas_fix_price',  p_gas_m) if (use_kgj  and p.get('kgj_gas_fix'))  else p_gas_m
-                p_gas_boil = p.get('boil_gas_fix_price', p_gas_m) if (use_boil and p.get('boil_gas_fix')) else p_gas_m
-                p_ee_ek    = p.get('ek_ee_fix_price',    p_ee_m)  if (use_ek   and p.get('ek_ee_fix'))   else p_ee_m
-
-                h_dem = df['Poptávka po teple (MW)'].iloc[t]
-                fve_p = float(df['FVE (MW)'].iloc[t]) if (use_fve and 'FVE (MW)' in df.columns) else 0.0
-
-                if use_tes:
-                    model += tes_soc[t + 1] == tes_soc[t] * (1 - p['tes_loss']) + tes_in[t] - tes_out[t]
-                if use_bess:
-                    model += bess_soc[t + 1] == (
-                        bess_soc[t] + bess_cha[t] * p['bess_eff'] - bess_dis[t] / p['bess_eff']
-                    )
-
-                heat_delivered = q_kgj[t] + q_boil[t] + q_ek[t] + q_imp[t] + tes_out[t] - tes_in[t]
-                model += heat_delivered + heat_shortfall[t] >= h_dem * p['h_cover']
-                model += heat_delivered <= h_dem + 1e-3
-
-                ee_kgj_out = q_kgj[t] * (p['k_eff_el'] / p['k_eff_th']) if use_kgj else 0
-                ee_ek_in   = q_ek[t] / ek_eff                            if use_ek  else 0
-                model += ee_kgj_out + fve_p + ee_import[t] + bess_dis[t] == ee_ek_in + bess_cha[t] + ee_export[t]
-
-                # Omezení: export EE nesmí překročit lokální výrobu (zabraňuje arbitráži import→export)
-                model += ee_export[t] <= ee_kgj_out + fve_p + bess_dis[t]
-
-                dist_sell_net = p['dist_ee_sell'] if not p['internal_ee_use'] else 0.0
-                dist_buy_net  = p['dist_ee_buy']  if not p['internal_ee_use'] else 0.0
-
-                bess_dist_buy_cost  = p['dist_ee_buy']  * bess_cha[t] if (use_bess and p.get('bess_dist_buy'))  else 0
-                bess_dist_sell_cost = p['dist_ee_sell'] * bess_dis[t] if (use_bess and p.get('bess_dist_sell')) else 0
-
-                if p.get('ee_sell_fix'):
-                    fix_ratio = p.get('ee_sell_fix_ratio', 0.0)
-                    fix_price = p.get('ee_sell_fix_price', p_ee_m)
-                    p_ee_sell = fix_ratio * fix_price + (1 - fix_ratio) * p_ee_m
-                else:
-                    p_ee_sell = p_ee_m
-
-                revenue = (
-                    p['h_price'] * heat_delivered
-                    + (p_ee_sell - dist_sell_net) * ee_export[t]
-                )
-                costs = (
-                    ((p_gas_kgj  + p['gas_dist']) * (q_kgj[t]  / p['k_eff_th']) if use_kgj      else 0) +
-                    ((p_gas_boil + p['gas_dist']) * (q_boil[t] / boil_eff)       if use_boil     else 0) +
-                    (p_ee_m + dist_buy_net)  * ee_import[t] +
-                    ((p_ee_ek + dist_buy_net) * ee_ek_in                          if use_ek       else 0) +
-                    (p['imp_price'] * q_imp[t]                                    if use_ext_heat else 0) +
-                    (p['k_start_cost'] * start[t]                                 if use_kgj      else 0) +
-                    (p['bess_cycle_cost'] * (bess_cha[t] + bess_dis[t])           if use_bess     else 0) +
-                    bess_dist_buy_cost + bess_dist_sell_cost +
-                    p['shortfall_penalty'] * heat_shortfall[t]
-                )
-                obj.append(revenue - costs)
-
-            model += pulp.lpSum(obj)
-            status = model.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=300))
-
-        status_str = pulp.LpStatus[status]
-        obj_val    = pulp.value(model.objective)
-        st.subheader("📋 Výsledky optimalizace")
-        st.write(f"**Solver status:** {status_str} (kód {status}) | **Účelová funkce:** {obj_val:,.0f} €")
-
-        if status not in (1, 2):
-            st.error(f"Optimalizace nenašla přijatelné řešení (status: {status_str}, kód: {status}). "
-                     f"Zkontroluj parametry – zejména pokrytí poptávky, kapacity zdrojů a cenové vstupy.")
-            st.stop()
-
-        # ── Extrakce výsledků ─────────────────────────────
-        def val(v, t):
-            x = v[t]
-            return float(x) if isinstance(x, (int, float)) else float(pulp.value(x) or 0)
-
-        boil_eff = p.get('boil_eff', 0.95)
-        ek_eff   = p.get('ek_eff',   0.98)
-
-        res = pd.DataFrame({
-            'Čas':                    df['datetime'],
-            'Poptávka tepla [MW]':    df['Poptávka po teple (MW)'],
-            'KGJ [MW_th]':            [val(q_kgj,  t) for t in range(T)],
-            'Kotel [MW_th]':          [val(q_boil, t) for t in range(T)],
-            'Elektrokotel [MW_th]':   [val(q_ek,   t) for t in range(T)],
-            'Import tepla [MW_th]':   [val(q_imp,  t) for t in range(T)],
-            'TES příjem [MW_th]':     [val(tes_in,  t) for t in range(T)],
-            'TES výdej [MW_th]':      [val(tes_out, t) for t in range(T)],
-            'TES SOC [MWh]':          [val(tes_soc, t + 1) for t in range(T)],
-            'BESS nabíjení [MW]':     [val(bess_cha, t) for t in range(T)],
-            'BESS vybíjení [MW]':     [val(bess_dis, t) for t in range(T)],
-            'BESS SOC [MWh]':         [val(bess_soc, t + 1) for t in range(T)],
-            'Shortfall [MW]':         [val(heat_shortfall, t) for t in range(T)],
-            'EE export [MW]':         [val(ee_export, t) for t in range(T)],
-            'EE import [MW]':         [val(ee_import, t) for t in range(T)],
-            'EE z KGJ [MW]':          [val(q_kgj, t) * (p['k_eff_el'] / p['k_eff_th']) if use_kgj else 0.0 for t in range(T)],
-            'EE z FVE [MW]':          [float(df['FVE (MW)'].iloc[t]) if (use_fve and 'FVE (MW)' in df.columns) else 0.0 for t in range(T)],
-            'EE do EK [MW]':          [val(q_ek, t) / ek_eff if use_ek else 0.0 for t in range(T)],
-            'Cena EE [€/MWh]':       df['ee_price'].values,
-            'Cena plyn [€/MWh]':     df['gas_price'].values,
-        })
-        res['TES netto [MW_th]'] = res['TES výdej [MW_th]'] - res['TES příjem [MW_th]']
-        res['Dodáno tepla [MW]'] = (
-            res['KGJ [MW_th]'] + res['Kotel [MW_th]'] + res['Elektrokotel [MW_th]']
-            + res['Import tepla [MW_th]'] + res['TES netto [MW_th]']
-        )
-        res['Měsíc'] = pd.to_datetime(res['Čas']).dt.month
-        res['Hodina dne'] = pd.to_datetime(res['Čas']).dt.hour
-
-        # ── Hodinový zisk ─────────────────────────────────
-        hourly_profit = []
-        for t in range(T):
-            p_ee_m   = df['ee_price'].iloc[t]
-            p_gas_m  = df['gas_price'].iloc[t]
-            p_gas_kj = p.get('kgj_gas_fix_price',  p_gas_m) if (use_kgj  and p.get('kgj_gas_fix'))  else p_gas_m
-            p_gas_bh = p.get('boil_gas_fix_price', p_gas_m) if (use_boil and p.get('boil_gas_fix')) else p_gas_m
-            p_ee_ekh = p.get('ek_ee_fix_price',    p_ee_m)  if (use_ek   and p.get('ek_ee_fix'))   else p_ee_m
-
-            if p.get('ee_sell_fix'):
-                fix_ratio = p.get('ee_sell_fix_ratio', 0.0)
-                fix_price = p.get('ee_sell_fix_price', p_ee_m)
-                p_ee_sell = fix_ratio * fix_price + (1 - fix_ratio) * p_ee_m
-            else:
-                p_ee_sell = p_ee_m
-
-            rev  = (p['h_price'] * res['Dodáno tepla [MW]'].iloc[t]
-                    + (p_ee_sell - p['dist_ee_sell']) * res['EE export [MW]'].iloc[t])
-            c_gas  = ((p_gas_kj + p['gas_dist']) * (res['KGJ [MW_th]'].iloc[t]  / p['k_eff_th']) if use_kgj  else 0)
-            c_gas += ((p_gas_bh + p['gas_dist']) * (res['Kotel [MW_th]'].iloc[t] / boil_eff)      if use_boil else 0)
-            c_ee   = (p_ee_m  + p['dist_ee_buy'])  * res['EE import [MW]'].iloc[t]
-            c_ek   = (p_ee_ekh + p['dist_ee_buy']) * res['EE do EK [MW]'].iloc[t] if use_ek else 0
-            c_imp  = p['imp_price'] * res['Import tepla [MW_th]'].iloc[t]           if use_ext_heat else 0
-            c_st   = p['k_start_cost'] * val(start, t)                              if use_kgj  else 0
-            c_bw   = p['bess_cycle_cost'] * (res['BESS nabíjení [MW]'].iloc[t] + res['BESS vybíjení [MW]'].iloc[t]) if use_bess else 0
-            c_bd   = (p['dist_ee_buy']  * res['BESS nabíjení [MW]'].iloc[t] if (use_bess and p.get('bess_dist_buy'))  else 0) \
-                   + (p['dist_ee_sell'] * res['BESS vybíjení [MW]'].iloc[t] if (use_bess and p.get('bess_dist_sell')) else 0)
-            pen    = p['shortfall_penalty'] * res['Shortfall [MW]'].iloc[t]
-
-            hourly_profit.append(rev - c_gas - c_ee - c_ek - c_imp - c_st - c_bw - c_bd - pen)
-
-        res['Hodinový zisk [€]']    = hourly_profit
-        res['Kumulativní zisk [€]'] = res['Hodinový zisk [€]'].cumsum()
-
-        # ── Metriky ───────────────────────────────────────
-        total_profit    = res['Hodinový zisk [€]'].sum()
-        total_shortfall = res['Shortfall [MW]'].sum()
-        target_heat     = (res['Poptávka tepla [MW]'] * p['h_cover']).sum()
-        coverage        = 100 * (1 - total_shortfall / target_heat) if target_heat > 0 else 100.0
-        total_ee_gen    = res['EE z KGJ [MW]'].sum() + res['EE z FVE [MW]'].sum()
-        kgj_hours       = sum(1 for t in range(T) if val(on, t) > 0.5) if use_kgj else 0
-
-        st.subheader("📊 Klíčové metriky")
-        m1, m2, m3, m4, m5, m6 = st.columns(6)
-        m1.metric("Celkový zisk",         f"{total_profit:,.0f} €")
-        m2.metric("Shortfall celkem",     f"{total_shortfall:,.1f} MWh")
-        m3.metric("Pokrytí poptávky",     f"{coverage:.1f} %")
-        m4.metric("Export EE",            f"{res['EE export [MW]'].sum():,.1f} MWh")
-        m5.metric("Výroba EE (KGJ+FVE)", f"{total_ee_gen:,.1f} MWh")
-        m6.metric("Provozní hodiny KGJ",  f"{kgj_hours:,} h")
-
-        if total_shortfall > 0.5:
-            st.warning(f"⚠️ Celkový shortfall {total_shortfall:.1f} MWh – zvyš penalizaci nebo kapacity zdrojů.")
-
-        # ════════════════════════════════════════════════
-        # GRAFY
-        # ════════════════════════════════════════════════
-
-        # ── Graf 1 – Pokrytí tepla ────────────────────────
-        st.subheader("🔥 Pokrytí tepelné poptávky")
-        fig = go.Figure()
-        for col, name, color in [
-            ('KGJ [MW_th]',          'KGJ',          '#27ae60'),
-            ('Kotel [MW_th]',        'Kotel',         '#3498db'),
-            ('Elektrokotel [MW_th]', 'Elektrokotel',  '#9b59b6'),
-            ('Import tepla [MW_th]', 'Import tepla',  '#e74c3c'),
-            ('TES netto [MW_th]',    'TES netto',     '#f39c12'),
-        ]:
-            fig.add_trace(go.Scatter(x=res['Čas'], y=res[col].clip(lower=0),
-                name=name, stackgroup='teplo', fillcolor=color, line_width=0))
-        fig.add_trace(go.Scatter(x=res['Čas'], y=res['Shortfall [MW]'],
-            name='Nedodáno ⚠️', stackgroup='teplo', fillcolor='rgba(200,0,0,0.45)', line_width=0))
-        fig.add_trace(go.Scatter(x=res['Čas'], y=res['Poptávka tepla [MW]'] * p['h_cover'],
-            name='Cílová poptávka', mode='lines', line=dict(color='black', width=2, dash='dot')))
-        fig.update_layout(height=480, hovermode='x unified', title="Složení tepelné dodávky v čase")
-        st.plotly_chart(fig, use_container_width=True)
+        # Stejné zadání už bylo spočteno → výsledek se jen načte z úložiště
+        if run_key in store:
+            st.session_state.result_key = run_key
+        else:
+            # Řešení běží ve frontě mimo běh skriptu – kliknutí ani další sezení ho nepřeruší
+            def solve_and_save(df, p, tech, settings, key):
+                result = solve_dispatch(df, p, tech, settings, store)
+                store.save(key, p, tech, df, result.values, result.status, result.objective, result.extra)
+                return result
+
+            label = (f"{time.strftime('%H:%M:%S')} | {solve_mode} | {T} kroků | "
+                     f"{', '.join(k for k, v in tech.items() if v)}")
+            job_queue().submit(st.session_state.job_owner, label, solve_and_save,
+                               df.copy(), p, tech, settings, run_key, key=run_key)
+            st.session_state.follow_job = run_key
+        timing.lap('Zadání výpočtu')
+
+    # ── Fronta výpočtů ────────────────────────────────
+    queue   = job_queue()
+    my_jobs = queue.jobs(st.session_state.job_owner)
+    if my_jobs:
+        job_status = {'queued': "⏳ čeká", 'running': "⚙️ běží", 'done': "✅ hotovo",
+                      'failed': "❌ chyba", 'cancelled': "⛔ zrušeno"}
+
+        # Panel se sám obnovuje každou sekundu, dokud některá úloha sezení čeká nebo běží
+        @st.fragment(run_every=1.0 if any(j.active for j in my_jobs) else None)
+        def job_panel():
+            jobs = queue.jobs(st.session_state.job_owner)
+            st.caption(f"Souběžně běží nejvýš {queue.workers} výpočtů pro všechny uživatele serveru; "
+                       "další čekají ve frontě. Stránku lze mezitím libovolně používat.")
+            for job in reversed(jobs):
+                # Průběh běžícího řešení z logu CBC, u hotové úlohy výsledek
+                done = job.status == 'done' and job.result is not None
+                obj  = job.result.objective if done else job.progress.get('objective')
+                gap  = job.result.extra.get('gap') if done else job.progress.get('gap')
+                pos  = queue.position(job)
+                c1, c2, c3, c4, c5 = st.columns([4, 2, 2, 2, 1])
+                c1.markdown(f"**{job.label}**  \n{job_status[job.status]}"
+                            + (f" ({pos}. ve frontě)" if pos else "")
+                            + (f" – {job.error}" if job.error else ""))
+                c2.metric("Čas", f"{job.elapsed:,.0f} s")
+                c3.metric("Nejlepší řešení", f"{obj:,.0f} €" if obj is not None else "–")
+                c4.metric("Mezera", f"{gap * 100:.2f} %" if gap is not None else "–")
+                if job.active:
+                    if c5.button("Zrušit", key=f"job_cancel_{job.id}"):
+                        queue.cancel(job.id)
+                elif job.status == 'done' and job.key in store:
+                    if c5.button("Zobrazit", key=f"job_show_{job.id}"):
+                        st.session_state.result_key = job.key
+                        st.rerun()
+                elif c5.button("Odebrat", key=f"job_forget_{job.id}"):
+                    queue.forget(job.id)
+                    st.rerun(scope='fragment')
+            # Sledovaný výpočet (poslední spuštěný z tohoto sezení) se po dokončení rovnou zobrazí
+            follow = next((j for j in jobs if j.key == st.session_state.follow_job), None)
+            if follow is not None and not follow.active:
+                st.session_state.follow_job = None
+                if follow.status == 'done':
+                    st.session_state.result_key = follow.key
+                st.rerun()
+
+        with st.expander(f"📋 Fronta výpočtů (aktivní: {sum(j.active for j in my_jobs)})", expanded=True):
+            job_panel()
+
+    # ── Cenové scénáře ────────────────────────────────
+    with st.expander("📊 Cenové scénáře (sweep EE × plyn)"):
+        def price_list(text):
+            return [float(x) for x in text.replace(';', ',').split(',') if x.strip()]
+
+        ee0, gas0 = st.session_state.ee_new, st.session_state.gas_new
+        c1, c2 = st.columns(2)
+        sweep_ee  = c1.text_input("Base ceny EE [€/MWh]",
+                                  value=", ".join(f"{ee0 + d:g}" for d in (-20, -10, 0, 10, 20)))
+        sweep_gas = c2.text_input("Base ceny plynu [€/MWh]",
+                                  value=", ".join(f"{gas0 + d:g}" for d in (-10, 0, 10)))
+        c1, c2 = st.columns(2)
+        sweep_workers = c1.number_input("Paralelních procesů", value=4, min_value=1)
+        sweep_limit   = c2.number_input("Časový limit scénáře [s]", value=300, min_value=10)
+        try:
+            scenarios = price_grid(price_list(sweep_ee), price_list(sweep_gas))
+        except ValueError:
+            scenarios = []
+            st.error("Ceny zadejte jako čísla oddělená čárkou.")
+        st.caption(f"{len(scenarios)} scénářů; model se sestaví jednou, scénáře mění jen ceny.")
+
+        if scenarios and st.button("▶️ Spustit scénáře"):
+            with st.spinner(f"Řeším {len(scenarios)} scénářů …"):
+                st.session_state.sweep = price_sweep(df, p, tech, scenarios, ee0, gas0,
+                                                     workers=int(sweep_workers), time_limit=sweep_limit,
+                                                     options={**settings.solver_options(), 'threads': 1})
+
+        sweep = st.session_state.sweep
+        if sweep is not None:
+            sweep_view = sweep.assign(status=sweep['status'].map(pulp.LpStatus)).rename(columns={
+                'ee_price': 'Base EE [€/MWh]', 'gas_price': 'Base plyn [€/MWh]', 'status': 'Stav',
+                'profit': 'Zisk [€]', 'kgj_hours': 'Hodiny KGJ', 'kgj_heat': 'Teplo KGJ [MWh]',
+                'ee_export': 'Export EE [MWh]', 'ee_import': 'Import EE [MWh]',
+                'shortfall': 'Nedodávka [MWh]', 'seconds': 'Čas [s]'})
+            for tab, (col, scale) in zip(st.tabs(["Zisk", "Hodiny KGJ", "Export EE"]),
+                                         [('Zisk [€]', 'RdYlGn'), ('Hodiny KGJ', 'Oranges'),
+                                          ('Export EE [MWh]', 'Blues')]):
+                grid = sweep_view.pivot_table(index='Base plyn [€/MWh]', columns='Base EE [€/MWh]', values=col)
+                fig  = go.Heatmap(z=grid.to_numpy(), x=grid.columns, y=grid.index, colorscale=scale,
+                                  texttemplate="%{z:,.0f}", colorbar=dict(title=col))
+                fig  = go.Figure(fig).update_layout(height=400, xaxis_title='Base EE [€/MWh]',
+                                                    yaxis_title='Base plyn [€/MWh]')
+                tab.plotly_chart(fig, use_container_width=True)
+            st.dataframe(sweep_view.round(2), use_container_width=True, hide_index=True)
+    timing.lap('Cenové scénáře')
+
+    # ── Monte Carlo cenové trajektorie ───────────────
+    with st.expander("🎲 Monte Carlo – tvar cenové křivky"):
+        st.caption("Trajektorie mají stejnou base cenu jako zadaná křivka, liší se hodinovým tvarem. "
+                   "Bootstrap převzorkuje celé dny v rámci měsíce (EE i plyn ze stejného dne), "
+                   "škálování násobí denní odchylky od profilu náhodným faktorem.")
+        c1, c2, c3 = st.columns(3)
+        mc_n       = int(c1.number_input("Počet trajektorií", value=100, min_value=2, step=10))
+        mc_methods = {"Bootstrap dnů": 'bootstrap', "Škálovaná volatilita": 'scaled'}
+        mc_method  = mc_methods[c2.selectbox("Metoda", list(mc_methods))]
+        mc_vol     = c3.number_input("Volatilita denního faktoru", value=0.3, min_value=0.0, step=0.05,
+                                     disabled=mc_method != 'scaled')
+        c1, c2, c3 = st.columns(3)
+        mc_workers = int(c1.number_input("Paralelních procesů", value=os.cpu_count() or 1, min_value=1,
+                                         key='mc_workers'))
+        mc_limit   = c2.number_input("Časový limit trajektorie [s]", value=120, min_value=10)
+        mc_seed    = int(c3.number_input("Semínko", value=0, min_value=0))
+
+        if st.button("▶️ Spustit Monte Carlo"):
+            bar = st.progress(0.0, text="Trajektorie …")
+            st.session_state.mc = monte_carlo(
+                df, p, tech, n_paths=mc_n, method=mc_method, vol=mc_vol, seed=mc_seed, workers=mc_workers,
+                time_limit=mc_limit, options={**settings.solver_options(), 'threads': 1},
+                progress=lambda done, total: bar.progress(done / total, text=f"Trajektorie {done}/{total}"))
+            bar.empty()
+
+        mc = st.session_state.mc
+        if mc is not None and len(mc.run_share) == T:
+            pct = mc.percentiles()
+            solved = int((mc.paths['status'] == 1).sum())
+            m1, m2, m3, m4 = st.columns(4)
+            for col, (k, v) in zip((m1, m2, m3), pct.items()):
+                col.metric(f"Zisk {k}", f"{v:,.0f} €" if v is not None else "–")
+            m4.metric("Vyřešeno", f"{solved} / {len(mc.paths)}")
+
+            c1, c2 = st.columns(2)
+            fig = go.Figure(go.Histogram(x=mc.paths.loc[mc.paths['status'] == 1, 'profit'],
+                                         marker_color='#27ae60', nbinsx=30))
+            for k, v in pct.items():
+                if v is not None:
+                    fig.add_vline(x=v, line_dash='dot', annotation_text=k)
+            fig.update_layout(height=350, title="Rozdělení zisku", xaxis_title="Zisk [€]",
+                              yaxis_title="Trajektorií", margin=dict(t=40))
+            c1.plotly_chart(fig, use_container_width=True)
+
+            share   = pd.DataFrame({'Čas': df['datetime'].to_numpy(), 'Podíl': mc.run_share})
+            by_hour = share.groupby(share['Čas'].dt.hour)['Podíl'].mean()
+            fig = go.Figure(go.Bar(x=by_hour.index, y=by_hour.to_numpy() * 100, marker_color='#e67e22'))
+            fig.update_layout(height=350, title="Četnost chodu KGJ podle hodiny dne",
+                              xaxis_title="Hodina dne", yaxis_title="% trajektorií", margin=dict(t=40))
+            c2.plotly_chart(fig, use_container_width=True)
+
+            plot = downsample(share, ['Podíl'])
+            fig  = go.Figure(line(plot, 'Čas', 'Podíl', use_webgl(plot), line_color='#e67e22',
+                                  name='Podíl trajektorií'))
+            fig.update_layout(height=300, title="Četnost chodu KGJ v čase (podíl trajektorií)",
+                              yaxis_tickformat='.0%', margin=dict(t=40))
+            st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Monte Carlo')
+
+    # ── Všechny roky FWD křivky ──────────────────────
+    fwd_bytes, sel_year = st.session_state.fwd_key[:2]
+    all_years = fwd_years(fwd_bytes)
+    with st.expander(f"📅 Všechny roky FWD křivky ({len(all_years)})"):
+        st.caption("Každý rok FWD křivky se optimalizuje proti stejnému lokálnímu profilu (přenesenému do "
+                   "daného roku) se stávajícími parametry a nastavením řešení; roky běží souběžně "
+                   "a každý se uloží jako samostatný výpočet.")
+        c1, c2, c3 = st.columns(3)
+        yr_pick    = c1.multiselect("Roky", all_years, default=all_years)
+        yr_workers = int(c2.number_input("Paralelních procesů", value=min(len(all_years), os.cpu_count() or 1),
+                                         min_value=1, key='yr_workers'))
+        yr_shift   = c3.checkbox("Posunout ceny všech roků", value=False,
+            help=f"Base ceny každého roku = jeho průměr + stejný posun jako u roku {sel_year} "
+                 f"(EE {st.session_state.ee_new - st.session_state.avg_ee_raw:+.1f}, "
+                 f"plyn {st.session_state.gas_new - st.session_state.avg_gas_raw:+.1f} €/MWh). "
+                 "Bez posunu platí průměry jednotlivých roků.")
+
+        if yr_pick and st.button("▶️ Spustit všechny roky"):
+            shift = ((st.session_state.ee_new - st.session_state.avg_ee_raw,
+                      st.session_state.gas_new - st.session_state.avg_gas_raw) if yr_shift else (0.0, 0.0))
+            bar = st.progress(0.0, text="Roky …")
+            st.session_state.years = run_years(
+                fwd_bytes, loc_file.getvalue(), p, tech, replace(settings, threads=1), years=yr_pick,
+                shift=shift, workers=yr_workers, store=store,
+                progress=lambda done, total: bar.progress(done / total, text=f"Roky {done}/{total}"))
+            bar.empty()
+
+        yrs = st.session_state.years
+        if yrs is not None and not yrs.table.empty:
+            tbl = yrs.table
+            st.caption(f"Počet roků: {len(tbl)} | celkem {yrs.seconds:.1f} s")
+            c1, c2 = st.columns(2)
+            fig = go.Figure(go.Bar(x=tbl['year'].astype(str), y=tbl['profit'], marker_color='#27ae60',
+                                   text=tbl['profit'].map('{:,.0f} €'.format)))
+            fig.update_layout(height=350, title="Zisk podle roku", yaxis_title="€", margin=dict(t=40))
+            c1.plotly_chart(fig, use_container_width=True)
+            fig = go.Figure(go.Bar(x=tbl['year'].astype(str), y=tbl['kgj_hours'], marker_color='#e67e22',
+                                   text=tbl['kgj_hours']))
+            fig.update_layout(height=350, title="Provozní hodiny KGJ", yaxis_title="h", margin=dict(t=40))
+            c2.plotly_chart(fig, use_container_width=True)
+
+            c1, c2 = st.columns(2)
+            fig = go.Figure([go.Bar(x=tbl['year'].astype(str), y=tbl[col], name=name, marker_color=color)
+                             for col, name, color in [('heat_kgj', 'KGJ', '#27ae60'),
+                                                      ('heat_boiler', 'Kotel', '#3498db'),
+                                                      ('heat_ek', 'Elektrokotel', '#9b59b6'),
+                                                      ('heat_import', 'Import tepla', '#e74c3c'),
+                                                      ('heat_shortfall', 'Nedodáno', 'rgba(200,0,0,0.45)')]])
+            fig.update_layout(barmode='stack', height=350, title="Skladba tepla [MWh]", margin=dict(t=40))
+            c1.plotly_chart(fig, use_container_width=True)
+            fig = go.Figure([go.Scatter(x=g['Měsíc_str'], y=g['zisk'], name=str(y), mode='lines+markers')
+                             for y, g in yrs.monthly.groupby('Rok')])
+            fig.update_layout(height=350, title="Měsíční zisk podle roku", yaxis_title="€", margin=dict(t=40))
+            c2.plotly_chart(fig, use_container_width=True)
+
+            st.dataframe(tbl.rename(columns={
+                'year': 'Rok', 'hours': 'Hodin', 'status': 'Stav', 'ee_price': 'Base EE [€/MWh]',
+                'gas_price': 'Base plyn [€/MWh]', 'profit': 'Zisk [€]', 'kgj_hours': 'Hodiny KGJ',
+                'kgj_starts': 'Starty KGJ', 'heat_kgj': 'Teplo KGJ [MWh]', 'heat_boiler': 'Teplo kotel [MWh]',
+                'heat_ek': 'Teplo EK [MWh]', 'heat_import': 'Import tepla [MWh]',
+                'heat_shortfall': 'Nedodávka [MWh]', 'kgj_share': 'Podíl KGJ', 'ee_export': 'Export EE [MWh]',
+                'coverage': 'Pokrytí [%]', 'seconds': 'Čas [s]'}).round(2),
+                use_container_width=True, hide_index=True)
+            if yrs.keys:
+                c1, c2 = st.columns([1, 3])
+                show_year = c1.selectbox("Detail roku", list(yrs.keys), label_visibility='collapsed')
+                if c2.button("Zobrazit detail roku"):
+                    st.session_state.result_key = yrs.keys[show_year]
+    timing.lap('Všechny roky')
 
-        # ── Graf 2 – EE bilance ───────────────────────────
-        st.subheader("⚡ Bilance elektřiny")
-        fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
-            vertical_spacing=0.08, row_heights=[0.5, 0.5],
-            subplot_titles=("Zdroje EE [MW]", "Spotřeba / export EE [MW]"))
-        for col, name, color in [
-            ('EE z KGJ [MW]',      'KGJ',         '#2ecc71'),
-            ('EE z FVE [MW]',      'FVE',          '#f1c40f'),
-            ('EE import [MW]',     'Import EE',    '#2980b9'),
-            ('BESS vybíjení [MW]', 'BESS výdej',   '#8e44ad'),
-        ]:
-            fig.add_trace(go.Scatter(x=res['Čas'], y=res[col], name=name,
-                stackgroup='vyroba', fillcolor=color), row=1, col=1)
-        for col, name, color in [
-            ('EE do EK [MW]',       'EK',             '#e74c3c'),
-            ('BESS nabíjení [MW]',  'BESS nabíjení',  '#34495e'),
-            ('EE export [MW]',      'Export EE',      '#16a085'),
-        ]:
-            fig.add_trace(go.Scatter(x=res['Čas'], y=-res[col], name=name,
-                stackgroup='spotreba', fillcolor=color), row=2, col=1)
-        fig.update_layout(height=650, hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
+# ────────────────────────────────────────────────
+# ULOŽENÉ VÝPOČTY
+# ────────────────────────────────────────────────
+past_runs = store.list()
+if past_runs:
+    with st.expander(f"🗂️ Uložené výpočty ({len(past_runs)})"):
+        def run_label(r):
+            techs = ", ".join(k for k, v in r['tech'].items() if v)
+            return (f"{time.strftime('%d.%m.%Y %H:%M', time.localtime(r['created']))} | "
+                    f"{r['start'][:10]} → {r['end'][:10]} | {r['objective']:,.0f} € | {techs}")
+        picked = st.selectbox("Výpočet", past_runs, format_func=run_label)
+        if st.button("Zobrazit vybraný výpočet"):
+            st.session_state.result_key = picked['key']
 
-        # ── Graf 3 – Stavy akumulace ─────────────────────
-        st.subheader("🔋 Stavy akumulátorů")
-        fig = make_subplots(rows=1, cols=2, subplot_titles=("TES SOC [MWh]", "BESS SOC [MWh]"))
-        fig.add_trace(go.Scatter(x=res['Čas'], y=res['TES SOC [MWh]'],
-            name='TES', line_color='#e67e22'), row=1, col=1)
-        if use_tes:
-            fig.add_hline(y=p['tes_cap'], line_dash="dot", line_color='#e67e22',
-                annotation_text="Max", row=1, col=1)
-        fig.add_trace(go.Scatter(x=res['Čas'], y=res['BESS SOC [MWh]'],
-            name='BESS', line_color='#3498db'), row=1, col=2)
-        if use_bess:
-            fig.add_hline(y=p['bess_cap'], line_dash="dot", line_color='#3498db',
-                annotation_text="Max", row=1, col=2)
-        fig.update_layout(height=380)
+# ────────────────────────────────────────────────
+# VÝSLEDKY
+# ────────────────────────────────────────────────
+timing.lap('Uložené výpočty')
+run = store.load(st.session_state.result_key) if st.session_state.result_key else None
+timing.lap('Načtení výsledku z úložiště')
+if run is not None:
+    # Výsledky se zobrazují s parametry a daty uloženého běhu
+    p, tech, df = run.params, run.tech, run.data
+    sized = run.meta.get('sizing') or {}
+    p = sized_params(p, run.meta)   # grafy s optimálními kapacitami
+    use_kgj, use_boil, use_ek, use_tes, use_bess, use_fve, use_ext_heat = (
+        tech[k] for k in ('kgj', 'boil', 'ek', 'tes', 'bess', 'fve', 'ext_heat'))
+    T = len(df)
+    if run_key is not None and run.key != run_key:
+        st.caption("ℹ️ Zobrazený výpočet neodpovídá aktuálnímu zadání – pro nové parametry spusť optimalizaci.")
+
+    on, start = run.var('on', T), run.var('start', T)
+    status    = run.status
+
+    status_str = pulp.LpStatus[status]
+    obj_val    = run.objective
+    st.subheader("📋 Výsledky optimalizace")
+    scr = run.meta.get('screening')
+    if scr:
+        bound = f"{scr['bound']:,.0f} €" if scr['bound'] is not None else "nedořešena"
+        gap   = f" | **Mezera:** {scr['gap']:.1%}" if scr['gap'] is not None else ""
+        st.write(f"**Screening – heuristika:** {scr['heuristic']:,.0f} € | **LP horní mez:** {bound}{gap}")
+        st.caption(f"Heuristika {scr['seconds']:.2f} s, LP mez {scr['bound_seconds']:.1f} s. "
+                   "Výsledky níže jsou heuristický dispečink, ne optimum.")
+        if not scr['feasible']:
+            st.warning("Heuristický dispečink porušuje některá omezení modelu (rampy KGJ) – jen orientačně.")
+    elif run.meta.get('representative'):
+        rep = run.meta['representative']
+        err = (f" | **Odchylka od celé MIP:** {rep['error']:+.2%} (uložená MIP {rep['reference']:,.0f} €)"
+               if rep['error'] is not None else "")
+        st.write(f"**Reprezentativní dny – odhad:** {obj_val:,.0f} € ({status_str}){err}")
+        st.caption(f"{rep['days']} dní, vysvětlený rozptyl denních profilů {rep['explained']:.0%}. "
+                   "Výsledky níže jsou dispečink reprezentativních dní přenesený na celý rok – jen "
+                   "orientačně; zisk z nich se od odhadu liší.")
+    else:
+        st.write(f"**Solver status:** {status_str} (kód {status}) | **Účelová funkce:** {obj_val:,.0f} €")
+        if run.meta.get('bound') is not None:
+            st.caption(f"Nejlepší mez: {run.meta['bound']:,.0f} € | mezera {run.meta['gap'] or 0:.2%}")
+    warm = run.meta.get('warm_start')
+    if warm:
+        source = {'heuristic': "heuristika merit orderu",
+                  'model':     "řešení předchozího běhu (model se jen přenastavil na nové ceny)",
+                  'model_rhs': "řešení předchozího běhu (přípustné i po změně poptávky / FVE)"}
+        st.caption("Počáteční řešení: " + source.get(warm, f"uložený výpočet {warm[:8]}…"))
+    if sized:
+        st.write("**Optimální kapacity akumulace**")
+        labels = {'tes_cap': "TES kapacita [MWh]", 'bess_cap': "BESS kapacita [MWh]", 'bess_p': "BESS výkon [MW]"}
+        st.dataframe(pd.DataFrame([{
+            'Kapacita':          labels[k],
+            'Optimum':           round(v['value'], 3),
+            'Min':               v['min'],
+            'Max':               v['max'],
+            'Investice za rok':  v['cost'],
+            'Investice za horizont [€]': round(v['investment']),
+        } for k, v in sized.items()]), hide_index=True)
+        st.caption("Účelová funkce = provozní zisk − investice za horizont; metriky a grafy níže jsou provoz "
+                   "s optimálními kapacitami. Optimum na horní mezi = rozšiř mez.")
+    if run.meta.get('windows'):
+        st.dataframe(pd.DataFrame([{
+            'Od':            df['datetime'].iloc[w['start']],
+            'Do':            df['datetime'].iloc[w['end'] - 1],
+            'Status':        pulp.LpStatus[w['status']],
+            'Účelová f. [€]': round(w['objective']),
+            'Čas [s]':       round(w['seconds'], 1),
+        } for w in run.meta['windows']]), hide_index=True)
+        ref_obj = run.meta.get('reference_objective')
+        if ref_obj:
+            st.info(f"Celoroční řešení: **{ref_obj:,.0f} €** | sešité po oknech: **{obj_val:,.0f} €** | "
+                    f"odchylka **{100 * (ref_obj - obj_val) / abs(ref_obj):.2f} %**")
+        if run.meta.get('feasible') is False:
+            st.warning(f"Sešité řešení porušuje omezení celoročního modelu (největší porušení "
+                       f"{run.meta['violation']:.3g}) – min. doba běhu / odstávka nebo rampy KGJ na hranicích "
+                       "nezávislých oken. Výsledky níže jsou jen orientační; přípustné řešení dá postupný "
+                       "režim nebo celá MIP.")
+
+    # Screening (odhad bez optimalizace) a nepřípustné sešité řešení se zobrazí s varováním výše
+    if status not in (1, 2) and not scr and run.meta.get('feasible') is not False:
+        st.error(f"Optimalizace nenašla přijatelné řešení (status: {status_str}, kód: {status}). "
+                 f"Zkontroluj parametry – zejména pokrytí poptávky, kapacity zdrojů a cenové vstupy.")
+        st.stop()
+
+    # ── Výsledky a metriky ────────────────────────────
+    ledger   = hourly_ledger(df, p, tech, run.var)
+    res      = build_results(df, p, tech, run.var, ledger)
+    metrics  = key_metrics(res, p, tech, run.var)
+    timing.lap('Ledger, výsledky a metriky')
+    total_profit, total_shortfall, coverage, total_ee_gen, kgj_hours = (
+        metrics[k] for k in ('total_profit', 'total_shortfall', 'coverage', 'total_ee_gen', 'kgj_hours'))
+
+    st.subheader("📊 Klíčové metriky")
+    m1, m2, m3, m4, m5, m6 = st.columns(6)
+    m1.metric("Celkový zisk",         f"{total_profit:,.0f} €")
+    m2.metric("Shortfall celkem",     f"{total_shortfall:,.1f} MWh")
+    m3.metric("Pokrytí poptávky",     f"{coverage:.1f} %")
+    m4.metric("Export EE",            f"{metrics['ee_export']:,.1f} MWh")
+    m5.metric("Výroba EE (KGJ+FVE)", f"{total_ee_gen:,.1f} MWh")
+    m6.metric("Provozní hodiny KGJ",  f"{kgj_hours:,} h")
+
+    if total_shortfall > 0.5:
+        st.warning(f"⚠️ Celkový shortfall {total_shortfall:.1f} MWh – zvyš penalizaci nebo kapacity zdrojů.")
+
+    # ════════════════════════════════════════════════
+    # GRAFY
+    # ════════════════════════════════════════════════
+
+    # ── Zobrazené období časových grafů ──────────────
+    # Grafy nesou omezený počet bodů (minima a maxima zachována); užší období = vyšší rozlišení
+    t_from, t_to = res['Čas'].iloc[0].to_pydatetime(), res['Čas'].iloc[-1].to_pydatetime()
+    if t_to > t_from:
+        t_from, t_to = st.slider(
+            "🔎 Zobrazené období časových grafů", min_value=t_from, max_value=t_to, value=(t_from, t_to),
+            step=timedelta(hours=time_step(res['Čas'])), format="DD.MM.YYYY HH:mm",
+            help=f"Delší období se prořeže na nejvýš {MAX_POINTS:,} bodů na graf se zachováním špiček; "
+                 f"při zúžení se zobrazí plné rozlišení.")
+    view = res[res['Čas'].between(t_from, t_to)]
+
+    # ── Graf 1 – Pokrytí tepla ────────────────────────
+    st.subheader("🔥 Pokrytí tepelné poptávky")
+    heat_specs = [
+        ('KGJ [MW_th]',          'KGJ',          '#27ae60'),
+        ('Kotel [MW_th]',        'Kotel',         '#3498db'),
+        ('Elektrokotel [MW_th]', 'Elektrokotel',  '#9b59b6'),
+        ('Import tepla [MW_th]', 'Import tepla',  '#e74c3c'),
+        ('TES netto [MW_th]',    'TES netto',     '#f39c12'),
+        ('Shortfall [MW]',       'Nedodáno ⚠️',   'rgba(200,0,0,0.45)'),
+    ]
+    heat_cols = [c for c, _, _ in heat_specs]
+    plot = view[['Čas'] + heat_cols].copy()
+    plot[heat_cols[:-1]] = plot[heat_cols[:-1]].clip(lower=0)
+    plot['Cílová poptávka'] = view['Poptávka tepla [MW]'] * p['h_cover']
+    plot = downsample(plot, heat_cols + ['Cílová poptávka'])
+    gl   = use_webgl(plot)
+    fig  = go.Figure()
+    fig.add_traces(stacked(plot, 'Čas', heat_specs, 'teplo', gl, line_width=0))
+    fig.add_trace(line(plot, 'Čas', 'Cílová poptávka', gl,
+        name='Cílová poptávka', mode='lines', line=dict(color='black', width=2, dash='dot')))
+    fig.update_layout(height=480, hovermode='x unified', title="Složení tepelné dodávky v čase")
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 1 – Pokrytí tepla')
+
+    # ── Graf 2 – EE bilance ───────────────────────────
+    st.subheader("⚡ Bilance elektřiny")
+    src_specs = [
+        ('EE z KGJ [MW]',      'KGJ',         '#2ecc71'),
+        ('EE z FVE [MW]',      'FVE',          '#f1c40f'),
+        ('EE import [MW]',     'Import EE',    '#2980b9'),
+        ('BESS vybíjení [MW]', 'BESS výdej',   '#8e44ad'),
+    ]
+    use_specs = [
+        ('EE do EK [MW]',       'EK',             '#e74c3c'),
+        ('BESS nabíjení [MW]',  'BESS nabíjení',  '#34495e'),
+        ('EE export [MW]',      'Export EE',      '#16a085'),
+    ]
+    use_cols = [c for c, _, _ in use_specs]
+    plot = view[['Čas'] + [c for c, _, _ in src_specs] + use_cols].copy()
+    plot[use_cols] = -plot[use_cols]
+    plot = downsample(plot, [c for c, _, _ in src_specs] + use_cols)
+    gl   = use_webgl(plot)
+    fig  = make_subplots(rows=2, cols=1, shared_xaxes=True,
+        vertical_spacing=0.08, row_heights=[0.5, 0.5],
+        subplot_titles=("Zdroje EE [MW]", "Spotřeba / export EE [MW]"))
+    fig.add_traces(stacked(plot, 'Čas', src_specs, 'vyroba', gl), rows=1, cols=1)
+    fig.add_traces(stacked(plot, 'Čas', use_specs, 'spotreba', gl), rows=2, cols=1)
+    fig.update_layout(height=650, hovermode='x unified')
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 2 – EE bilance')
+
+    # ── Graf 3 – Stavy akumulace ─────────────────────
+    st.subheader("🔋 Stavy akumulátorů")
+    plot = downsample(view, ['TES SOC [MWh]', 'BESS SOC [MWh]'])
+    gl   = use_webgl(plot)
+    fig  = make_subplots(rows=1, cols=2, subplot_titles=("TES SOC [MWh]", "BESS SOC [MWh]"))
+    fig.add_trace(line(plot, 'Čas', 'TES SOC [MWh]', gl,
+        name='TES', line_color='#e67e22'), row=1, col=1)
+    if use_tes:
+        fig.add_hline(y=p['tes_cap'], line_dash="dot", line_color='#e67e22',
+            annotation_text="Max", row=1, col=1)
+    fig.add_trace(line(plot, 'Čas', 'BESS SOC [MWh]', gl,
+        name='BESS', line_color='#3498db'), row=1, col=2)
+    if use_bess:
+        fig.add_hline(y=p['bess_cap'], line_dash="dot", line_color='#3498db',
+            annotation_text="Max", row=1, col=2)
+    fig.update_layout(height=380)
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 3 – Stavy akumulace')
+
+    # ── Mezní ceny tepla a EE ─────────────────────────
+    mc_cols = [c for c in ('Mezní cena tepla [€/MWh]', 'Mezní cena EE [€/MWh]') if c in res.columns]
+    if mc_cols:
+        st.subheader("💲 Mezní ceny tepla a elektřiny")
+        plot = downsample(view, mc_cols + ['Cena EE [€/MWh]'])
+        gl   = use_webgl(plot)
+        fig  = go.Figure()
+        for col, name, color in [('Mezní cena tepla [€/MWh]', 'Mezní cena tepla', '#c0392b'),
+                                 ('Mezní cena EE [€/MWh]',    'Mezní cena EE',    '#2980b9')]:
+            if col in mc_cols:
+                fig.add_trace(line(plot, 'Čas', col, gl, name=name, line_color=color))
+        fig.add_trace(line(plot, 'Čas', 'Cena EE [€/MWh]', gl, name='Tržní cena EE',
+            line=dict(color='grey', width=1, dash='dot')))
+        fig.add_hline(y=p['h_price'], line_dash="dot", line_color='#c0392b', annotation_text="Cena tepla")
+        fig.update_layout(height=420, hovermode='x unified', yaxis_title="€/MWh",
+            title="Náklad další MWh tepla / elektřiny v lokalitě (LP s pevným chodem KGJ)")
         st.plotly_chart(fig, use_container_width=True)
-
-        # ── Graf 4 – Kumulativní zisk ─────────────────────
-        st.subheader("💰 Kumulativní zisk")
+        sp = run.meta.get('shadow_prices') or {}
+        if 'Mezní cena tepla [€/MWh]' in mc_cols and res['Poptávka tepla [MW]'].sum() > 0:
+            weights = res['Poptávka tepla [MW]']
+            st.caption(f"Průměrná mezní cena tepla (vážená poptávkou): "
+                       f"{(res['Mezní cena tepla [€/MWh]'] * weights).sum() / weights.sum():,.1f} €/MWh"
+                       + (f" | LP {sp['seconds']:.1f} s" if sp.get('seconds') is not None else ""))
+        timing.lap('Graf – Mezní ceny')
+
+    # ── Graf 4 – Kumulativní zisk ─────────────────────
+    st.subheader("💰 Kumulativní zisk")
+    plot = downsample(view, ['Kumulativní zisk [€]'])
+    fig  = go.Figure()
+    fig.add_trace(line(plot, 'Čas', 'Kumulativní zisk [€]', use_webgl(plot),
+        fill='tozeroy', fillcolor='rgba(39,174,96,0.2)',
+        line_color='#27ae60', name='Kum. zisk'))
+    fig.update_layout(height=380, title="Průběh kumulativního zisku v čase")
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 4 – Kumulativní zisk')
+
+    # ── Graf 5 – Měsíční analýza ──────────────────────
+    st.subheader("📅 Měsíční analýza")
+    monthly = monthly_summary(res)
+
+    fig = make_subplots(rows=1, cols=2,
+        subplot_titles=("Měsíční zisk [€]", "Měsíční mix tepelných zdrojů [MWh]"))
+    bar_colors = ['#e74c3c' if z < 0 else '#27ae60' for z in monthly['zisk']]
+    fig.add_trace(go.Bar(x=monthly['Měsíc_str'], y=monthly['zisk'],
+        marker_color=bar_colors, name='Zisk'), row=1, col=1)
+    for col, name, color in [
+        ('teplo_kgj',   'KGJ',         '#27ae60'),
+        ('teplo_kotel', 'Kotel',        '#3498db'),
+        ('teplo_ek',    'Elektrokotel', '#9b59b6'),
+    ]:
+        fig.add_trace(go.Bar(x=monthly['Měsíc_str'], y=monthly[col],
+            name=name, marker_color=color), row=1, col=2)
+    fig.update_layout(height=400, barmode='stack', hovermode='x unified')
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 5 – Měsíční analýza')
+
+    # ── Graf 6 – Průměrný denní profil ───────────────
+    st.subheader("🕐 Průměrný denní profil (všechny dny)")
+    hourly_avg = res.groupby('Hodina dne').agg(
+        teplo_popt=('Poptávka tepla [MW]', 'mean'),
+        teplo_kgj=('KGJ [MW_th]', 'mean'),
+        teplo_kotel=('Kotel [MW_th]', 'mean'),
+        teplo_ek=('Elektrokotel [MW_th]', 'mean'),
+        ee_kgj=('EE z KGJ [MW]', 'mean'),
+        ee_fve=('EE z FVE [MW]', 'mean'),
+        ee_export=('EE export [MW]', 'mean'),
+        ee_import=('EE import [MW]', 'mean'),
+        cena_ee=('Cena EE [€/MWh]', 'mean'),
+    ).reset_index()
+    hours_x = hourly_avg['Hodina dne']
+
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
+        row_heights=[0.5, 0.5], vertical_spacing=0.08,
+        subplot_titles=("Průměrná tepelná produkce [MW]", "Průměrná EE bilance [MW]"))
+
+    for col, name, color in [
+        ('teplo_kgj',   'KGJ',         '#27ae60'),
+        ('teplo_kotel', 'Kotel',        '#3498db'),
+        ('teplo_ek',    'Elektrokotel', '#9b59b6'),
+    ]:
+        fig.add_trace(go.Bar(x=hours_x, y=hourly_avg[col], name=name, marker_color=color), row=1, col=1)
+    fig.add_trace(go.Scatter(x=hours_x, y=hourly_avg['teplo_popt'],
+        name='Poptávka', mode='lines', line=dict(color='black', width=2, dash='dot')), row=1, col=1)
+
+    for col, name, color in [
+        ('ee_kgj',   'KGJ',    '#2ecc71'),
+        ('ee_fve',   'FVE',    '#f1c40f'),
+        ('ee_import','Import', '#2980b9'),
+    ]:
+        fig.add_trace(go.Bar(x=hours_x, y=hourly_avg[col], name=name, marker_color=color), row=2, col=1)
+    fig.add_trace(go.Scatter(x=hours_x, y=hourly_avg['cena_ee'],
+        name='Cena EE', mode='lines', line=dict(color='orange', width=2, dash='dot'),
+        yaxis='y4'), row=2, col=1)
+
+    fig.update_layout(height=600, barmode='stack', hovermode='x unified',
+        xaxis2=dict(title='Hodina dne'))
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 6 – Průměrný denní profil')
+
+    # ── Graf 7 – Heatmapa zisku ───────────────────────
+    st.subheader("🗓️ Heatmapa hodinového zisku")
+    res_hm = res.copy()
+    res_hm['Den']       = pd.to_datetime(res_hm['Čas']).dt.dayofyear
+    res_hm['Hodina']    = pd.to_datetime(res_hm['Čas']).dt.hour
+    pivot_profit = res_hm.pivot_table(index='Hodina', columns='Den',
+        values='Hodinový zisk [€]', aggfunc='sum')
+    fig = go.Figure(go.Heatmap(
+        z=pivot_profit.values,
+        x=pivot_profit.columns,
+        y=pivot_profit.index,
+        colorscale='RdYlGn',
+        colorbar=dict(title='€/hod'),
+        zmid=0,
+    ))
+    fig.update_layout(
+        height=420,
+        title="Hodinový zisk – den vs. hodina (zelená = zisk, červená = ztráta)",
+        xaxis_title="Den v roce",
+        yaxis_title="Hodina dne",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 7 – Heatmapa zisku')
+
+    # ── Graf 8 – Scatter EE cena vs. provoz KGJ ──────
+    if use_kgj:
+        st.subheader("🔍 Citlivost KGJ na cenu EE a plynu")
+        res['KGJ_on'] = on
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=res['Čas'], y=res['Kumulativní zisk [€]'],
-            fill='tozeroy', fillcolor='rgba(39,174,96,0.2)',
-            line_color='#27ae60', name='Kum. zisk'))
-        fig.update_layout(height=380, title="Průběh kumulativního zisku v čase")
-        st.plotly_chart(fig, use_container_width=True)
-
-        # ── Graf 5 – Měsíční analýza ──────────────────────
-        st.subheader("📅 Měsíční analýza")
-        month_names = {1:'Led',2:'Úno',3:'Bře',4:'Dub',5:'Kvě',6:'Čvn',
-                       7:'Čvc',8:'Srp',9:'Zář',10:'Říj',11:'Lis',12:'Pro'}
-
-        monthly = res.groupby('Měsíc').agg(
-            zisk=('Hodinový zisk [€]', 'sum'),
-            teplo_kgj=('KGJ [MW_th]', 'sum'),
-            teplo_kotel=('Kotel [MW_th]', 'sum'),
-            teplo_ek=('Elektrokotel [MW_th]', 'sum'),
-            ee_export=('EE export [MW]', 'sum'),
-            ee_import=('EE import [MW]', 'sum'),
-            shortfall=('Shortfall [MW]', 'sum'),
-        ).reset_index()
-        monthly['Měsíc_str'] = monthly['Měsíc'].map(month_names)
-
-        fig = make_subplots(rows=1, cols=2,
-            subplot_titles=("Měsíční zisk [€]", "Měsíční mix tepelných zdrojů [MWh]"))
-        bar_colors = ['#e74c3c' if z < 0 else '#27ae60' for z in monthly['zisk']]
-        fig.add_trace(go.Bar(x=monthly['Měsíc_str'], y=monthly['zisk'],
-            marker_color=bar_colors, name='Zisk'), row=1, col=1)
-        for col, name, color in [
-            ('teplo_kgj',   'KGJ',         '#27ae60'),
-            ('teplo_kotel', 'Kotel',        '#3498db'),
-            ('teplo_ek',    'Elektrokotel', '#9b59b6'),
-        ]:
-            fig.add_trace(go.Bar(x=monthly['Měsíc_str'], y=monthly[col],
-                name=name, marker_color=color), row=1, col=2)
-        fig.update_layout(height=400, barmode='stack', hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
-
-        # ── Graf 6 – Průměrný denní profil ───────────────
-        st.subheader("🕐 Průměrný denní profil (všechny dny)")
-        hourly_avg = res.groupby('Hodina dne').agg(
-            teplo_popt=('Poptávka tepla [MW]', 'mean'),
-            teplo_kgj=('KGJ [MW_th]', 'mean'),
-            teplo_kotel=('Kotel [MW_th]', 'mean'),
-            teplo_ek=('Elektrokotel [MW_th]', 'mean'),
-            ee_kgj=('EE z KGJ [MW]', 'mean'),
-            ee_fve=('EE z FVE [MW]', 'mean'),
-            ee_export=('EE export [MW]', 'mean'),
-            ee_import=('EE import [MW]', 'mean'),
-            cena_ee=('Cena EE [€/MWh]', 'mean'),
-        ).reset_index()
-        hours_x = hourly_avg['Hodina dne']
-
-        fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
-            row_heights=[0.5, 0.5], vertical_spacing=0.08,
-            subplot_titles=("Průměrná tepelná produkce [MW]", "Průměrná EE bilance [MW]"))
-
-        for col, name, color in [
-            ('teplo_kgj',   'KGJ',         '#27ae60'),
-            ('teplo_kotel', 'Kotel',        '#3498db'),
-            ('teplo_ek',    'Elektrokotel', '#9b59b6'),
-        ]:
-            fig.add_trace(go.Bar(x=hours_x, y=hourly_avg[col], name=name, marker_color=color), row=1, col=1)
-        fig.add_trace(go.Scatter(x=hours_x, y=hourly_avg['teplo_popt'],
-            name='Poptávka', mode='lines', line=dict(color='black', width=2, dash='dot')), row=1, col=1)
-
-        for col, name, color in [
-            ('ee_kgj',   'KGJ',    '#2ecc71'),
-            ('ee_fve',   'FVE',    '#f1c40f'),
-            ('ee_import','Import', '#2980b9'),
-        ]:
-            fig.add_trace(go.Bar(x=hours_x, y=hourly_avg[col], name=name, marker_color=color), row=2, col=1)
-        fig.add_trace(go.Scatter(x=hours_x, y=hourly_avg['cena_ee'],
-            name='Cena EE', mode='lines', line=dict(color='orange', width=2, dash='dot'),
-            yaxis='y4'), row=2, col=1)
-
-        fig.update_layout(height=600, barmode='stack', hovermode='x unified',
-            xaxis2=dict(title='Hodina dne'))
-        st.plotly_chart(fig, use_container_width=True)
-
-        # ── Graf 7 – Heatmapa zisku ───────────────────────
-        st.subheader("🗓️ Heatmapa hodinového zisku")
-        res_hm = res.copy()
-        res_hm['Den']       = pd.to_datetime(res_hm['Čas']).dt.dayofyear
-        res_hm['Hodina']    = pd.to_datetime(res_hm['Čas']).dt.hour
-        pivot_profit = res_hm.pivot_table(index='Hodina', columns='Den',
-            values='Hodinový zisk [€]', aggfunc='sum')
-        fig = go.Figure(go.Heatmap(
-            z=pivot_profit.values,
-            x=pivot_profit.columns,
-            y=pivot_profit.index,
-            colorscale='RdYlGn',
-            colorbar=dict(title='€/hod'),
-            zmid=0,
+        fig.add_trace(go.Scatter(
+            x=res['Cena EE [€/MWh]'],
+            y=res['Cena plyn [€/MWh]'],
+            mode='markers',
+            marker=dict(
+                color=res['KGJ_on'],
+                colorscale=[[0, '#e74c3c'], [1, '#27ae60']],
+                size=4, opacity=0.6,
+                colorbar=dict(title='KGJ on/off', tickvals=[0, 1], ticktext=['Off', 'On']),
+            ),
+            text=[f"EE: {e:.1f} | Plyn: {g:.1f} | {'ON' if o > 0.5 else 'OFF'}"
+                  for e, g, o in zip(res['Cena EE [€/MWh]'], res['Cena plyn [€/MWh]'], res['KGJ_on'])],
+            hovertemplate='%{text}<extra></extra>',
+            name='Hodiny',
         ))
         fig.update_layout(
-            height=420,
-            title="Hodinový zisk – den vs. hodina (zelená = zisk, červená = ztráta)",
-            xaxis_title="Den v roce",
-            yaxis_title="Hodina dne",
+            height=450,
+            xaxis_title='Cena EE [€/MWh]',
+            yaxis_title='Cena plynu [€/MWh]',
+            title='Provoz KGJ v závislosti na cenách EE a plynu (zelená = KGJ běží)',
         )
         st.plotly_chart(fig, use_container_width=True)
+        timing.lap('Graf 8 – Scatter EE cena vs. provoz KGJ')
+
+    # ── Graf 9 – Složení příjmů a nákladů (waterfall) ─
+    st.subheader("💵 Rozpad zisku – příjmy a náklady")
+    # Stejné složky jako účelová funkce a hodinový zisk → součet sedí na „Celkový zisk“
+    breakdown  = profit_breakdown(ledger)
+    wf_labels  = list(breakdown.index) + ['Celkový zisk']
+    wf_values  = list(breakdown.to_numpy()) + [total_profit]
+    wf_measure = ['relative'] * (len(wf_values) - 1) + ['total']
+    wf_colors  = ['#27ae60' if v >= 0 else '#e74c3c' for v in wf_values[:-1]] + ['#2980b9']
+
+    fig = go.Figure(go.Waterfall(
+        orientation='v',
+        measure=wf_measure,
+        x=wf_labels,
+        y=wf_values,
+        connector=dict(line=dict(color='#bdc3c7', width=1)),
+        decreasing=dict(marker_color='#e74c3c'),
+        increasing=dict(marker_color='#27ae60'),
+        totals=dict(marker_color='#2980b9'),
+        text=[f"{v:,.0f} €" for v in wf_values],
+        textposition='outside',
+    ))
+    fig.update_layout(height=480, title="Waterfall – rozpad příjmů a nákladů za celé období")
+    st.plotly_chart(fig, use_container_width=True)
+    timing.lap('Graf 9 – Složení příjmů a nákladů (waterfall)')
+
+    # ════════════════════════════════════════════════
+    # EXPORT
+    # ════════════════════════════════════════════════
+    st.subheader("⬇️ Export výsledků")
+    # Soubory se generují až po kliknutí (mimo běh skriptu), ne při každém překreslení
+    export_labels = {'xlsx':    "📥 Excel (.xlsx)",
+                     'csv':     "📥 CSV (zip, list = soubor)",
+                     'parquet': "📥 Parquet (zip, list = soubor)"}
+    for col, (fmt, label) in zip(st.columns(len(export_labels)), export_labels.items()):
+        ext, mime, export = EXPORTS[fmt]
+        col.download_button(
+            label=label,
+            data=lambda export=export: export(res, monthly, p, tech),
+            file_name=f"kgj_optimalizace{ext}",
+            mime=mime,
+        )
 
-        # ── Graf 8 – Scatter EE cena vs. provoz KGJ ──────
-        if use_kgj:
-            st.subheader("🔍 Citlivost KGJ na cenu EE a plynu")
-            res['KGJ_on'] = [val(on, t) for t in range(T)]
+    # ════════════════════════════════════════════════
+    # DIAGNOSTIKA
+    # ════════════════════════════════════════════════
+    timing.lap('Export (tlačítka)')
+    diag = {'phases': timing.to_dict(), 'solve': run.meta.get('diagnostics', {})}
+    with st.expander("🩺 Diagnostika běhu"):
+        c1, c2 = st.columns(2)
+        c1.markdown("**Fáze tohoto překreslení [s]**")
+        c1.dataframe(pd.Series(diag['phases'], name='s').rename_axis('Fáze'), use_container_width=True)
+        if diag['solve'].get('phases'):
+            c2.markdown("**Fáze výpočtu (uložený běh) [s]**")
+            c2.dataframe(pd.Series(diag['solve']['phases'], name='s').rename_axis('Fáze'),
+                         use_container_width=True)
+
+        stats = diag['solve'].get('model')
+        if stats:
+            st.markdown("**Velikost modelu**")
+            for col, (k, label) in zip(st.columns(5), [('rows', 'Řádky'), ('cols', 'Sloupce'),
+                                                      ('integers', 'Celočíselné'), ('binaries', 'Binární'),
+                                                      ('nonzeros', 'Nenulové prvky')]):
+                col.metric(label, f"{stats[k]:,}")
+
+        solver_diag = diag['solve'].get('solver', {})
+        progress    = pd.DataFrame(solver_diag.get('progress') or [])
+        if not progress.empty:
+            st.markdown(f"**Průběh řešení ({solver_diag['backend'].upper()})** – "
+                        f"zápis MPS {solver_diag.get('write_mps', 0):.2f} s, solver {solver_diag.get('solver', 0):.2f} s")
             fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=res['Cena EE [€/MWh]'],
-                y=res['Cena plyn [€/MWh]'],
-                mode='markers',
-                marker=dict(
-                    color=res['KGJ_on'],
-                    colorscale=[[0, '#e74c3c'], [1, '#27ae60']],
-                    size=4, opacity=0.6,
-                    colorbar=dict(title='KGJ on/off', tickvals=[0, 1], ticktext=['Off', 'On']),
-                ),
-                text=[f"EE: {e:.1f} | Plyn: {g:.1f} | {'ON' if o > 0.5 else 'OFF'}"
-                      for e, g, o in zip(res['Cena EE [€/MWh]'], res['Cena plyn [€/MWh]'], res['KGJ_on'])],
-                hovertemplate='%{text}<extra></extra>',
-                name='Hodiny',
-            ))
-            fig.update_layout(
-                height=450,
-                xaxis_title='Cena EE [€/MWh]',
-                yaxis_title='Cena plynu [€/MWh]',
-                title='Provoz KGJ v závislosti na cenách EE a plynu (zelená = KGJ běží)',
-            )
+            fig.add_trace(go.Scatter(x=progress['seconds'], y=progress['objective'], name='Nejlepší řešení',
+                mode='lines+markers', line_shape='hv', line_color='#27ae60',
+                customdata=progress[['nodes']], hovertemplate='%{y:,.0f} € (uzlů: %{customdata[0]})'))
+            fig.add_trace(go.Scatter(x=progress['seconds'], y=progress['bound'], name='Mez',
+                mode='lines+markers', line_shape='hv', line=dict(color='#2980b9', dash='dot')))
+            fig.update_layout(height=320, hovermode='x unified', xaxis_title='Čas solveru [s]',
+                              yaxis_title='Účelová funkce [€]', margin=dict(t=30))
             st.plotly_chart(fig, use_container_width=True)
-
-        # ── Graf 9 – Složení příjmů a nákladů (waterfall) ─
-        st.subheader("💵 Rozpad zisku – příjmy a náklady")
-        rev_teplo = p['h_price'] * res['Dodáno tepla [MW]'].sum()
-        if p.get('ee_sell_fix'):
-            fix_ratio = p.get('ee_sell_fix_ratio', 0.0)
-            fix_price = p.get('ee_sell_fix_price', 0.0)
-            blended_ee_price = fix_ratio * fix_price + (1 - fix_ratio) * res['Cena EE [€/MWh]']
-            rev_ee = (blended_ee_price * res['EE export [MW]']).sum()
-        else:
-            rev_ee    = (res['Cena EE [€/MWh]'] * res['EE export [MW]']).sum()
-        c_gas_kgj = sum(
-            (p.get('kgj_gas_fix_price', df['gas_price'].iloc[t]) + p['gas_dist'])
-            * res['KGJ [MW_th]'].iloc[t] / p['k_eff_th']
-            for t in range(T)
-        ) if use_kgj else 0
-        c_gas_boil = sum(
-            (p.get('boil_gas_fix_price', df['gas_price'].iloc[t]) + p['gas_dist'])
-            * res['Kotel [MW_th]'].iloc[t] / boil_eff
-            for t in range(T)
-        ) if use_boil else 0
-        c_ee_imp   = ((res['Cena EE [€/MWh]'] + p['dist_ee_buy']) * res['EE import [MW]']).sum()
-        c_imp_heat = p['imp_price'] * res['Import tepla [MW_th]'].sum() if use_ext_heat else 0
-        c_starts   = p['k_start_cost'] * sum(val(start, t) for t in range(T)) if use_kgj else 0
-        c_penalty  = p['shortfall_penalty'] * res['Shortfall [MW]'].sum()
-
-        wf_labels  = ['Příjmy: teplo', 'Příjmy: EE export',
-                      'Náklady: plyn KGJ', 'Náklady: plyn kotel', 'Náklady: import EE',
-                      'Náklady: import tepla', 'Náklady: starty KGJ', 'Penalizace shortfall',
-                      'Celkový zisk']
-        wf_values  = [rev_teplo, rev_ee,
-                      -c_gas_kgj, -c_gas_boil, -c_ee_imp,
-                      -c_imp_heat, -c_starts, -c_penalty,
-                      total_profit]
-        wf_measure = ['relative'] * (len(wf_values) - 1) + ['total']
-        wf_colors  = ['#27ae60' if v >= 0 else '#e74c3c' for v in wf_values[:-1]] + ['#2980b9']
-
-        fig = go.Figure(go.Waterfall(
-            orientation='v',
-            measure=wf_measure,
-            x=wf_labels,
-            y=wf_values,
-            connector=dict(line=dict(color='#bdc3c7', width=1)),
-            decreasing=dict(marker_color='#e74c3c'),
-            increasing=dict(marker_color='#27ae60'),
-            totals=dict(marker_color='#2980b9'),
-            text=[f"{v:,.0f} €" for v in wf_values],
-            textposition='outside',
-        ))
-        fig.update_layout(height=480, title="Waterfall – rozpad příjmů a nákladů za celé období")
-        st.plotly_chart(fig, use_container_width=True)
-
-        # ════════════════════════════════════════════════
-        # EXCEL EXPORT
-        # ════════════════════════════════════════════════
-        st.subheader("⬇️ Export výsledků")
-
-        def to_excel(df_out: pd.DataFrame) -> bytes:
-            buf = io.BytesIO()
-            export_cols = [c for c in df_out.columns if c not in ('Měsíc', 'Hodina dne', 'KGJ_on')]
-            df_exp = df_out[export_cols].copy()
-
-            with pd.ExcelWriter(buf, engine='xlsxwriter') as writer:
-                # List 1 – hodinová data
-                df_exp.to_excel(writer, index=False, sheet_name='Hodinová data')
-                wb = writer.book
-                ws = writer.sheets['Hodinová data']
-
-                fmt_hdr  = wb.add_format({'bold': True, 'bg_color': '#2c3e50', 'font_color': 'white',
-                                           'border': 1, 'align': 'center', 'text_wrap': True})
-                fmt_num2 = wb.add_format({'num_format': '#,##0.00', 'border': 1})
-                fmt_num0 = wb.add_format({'num_format': '#,##0',    'border': 1})
-                fmt_date = wb.add_format({'num_format': 'dd.mm.yyyy hh:mm', 'border': 1})
-                money_c  = {'Hodinový zisk [€]', 'Kumulativní zisk [€]'}
-
-                for ci, cn in enumerate(df_exp.columns):
-                    ws.set_column(ci, ci, 20)
-                    ws.write(0, ci, cn, fmt_hdr)
-                for ri in range(len(df_exp)):
-                    for ci, cn in enumerate(df_exp.columns):
-                        cv = df_exp.iloc[ri, ci]
-                        if cn == 'Čas':
-                            ws.write_datetime(ri + 1, ci, pd.Timestamp(cv).to_pydatetime(), fmt_date)
-                        elif cn in money_c:
-                            ws.write_number(ri + 1, ci, float(cv), fmt_num0)
-                        else:
-                            ws.write_number(ri + 1, ci, float(cv), fmt_num2)
-                ws.autofilter(0, 0, len(df_exp), len(df_exp.columns) - 1)
-                ws.freeze_panes(1, 1)
-                ws.set_row(0, 36)
-
-                # List 2 – měsíční souhrn
-                monthly_exp = monthly.copy()
-                monthly_exp['Měsíc_str'] = monthly_exp['Měsíc'].map(month_names)
-                monthly_exp = monthly_exp[['Měsíc_str', 'zisk', 'teplo_kgj',
-                                           'teplo_kotel', 'teplo_ek', 'ee_export',
-                                           'ee_import', 'shortfall']]
-                monthly_exp.columns = ['Měsíc', 'Zisk [€]', 'KGJ teplo [MWh]',
-                                       'Kotel teplo [MWh]', 'EK teplo [MWh]',
-                                       'EE export [MWh]', 'EE import [MWh]', 'Shortfall [MWh]']
-                monthly_exp.to_excel(writer, index=False, sheet_name='Měsíční souhrn')
-                ws2 = writer.sheets['Měsíční souhrn']
-                for ci, cn in enumerate(monthly_exp.columns):
-                    ws2.set_column(ci, ci, 18)
-                    ws2.write(0, ci, cn, fmt_hdr)
-                ws2.set_row(0, 30)
-
-                # List 3 – parametry (pro reprodukovatelnost)
-                params_data = [
-                    ('Penalizace shortfall [€/MWh]', p['shortfall_penalty']),
-                    ('Cena tepla [€/MWh]',           p['h_price']),
-                    ('Min. pokrytí [-]',              p['h_cover']),
-                    ('Distribuce nákup EE [€/MWh]',  p['dist_ee_buy']),
-                    ('Distribuce prodej EE [€/MWh]',  p['dist_ee_sell']),
-                    ('Distribuce plyn [€/MWh]',       p['gas_dist']),
-                ]
-                if use_kgj:
-                    params_data += [
-                        ('KGJ k_th [MW]',     p['k_th']),
-                        ('KGJ η_th [-]',      p['k_eff_th']),
-                        ('KGJ η_el [-]',      p['k_eff_el']),
-                        ('KGJ min zatížení',  p['k_min']),
-                        ('KGJ start cost [€]',p['k_start_cost']),
-                    ]
-                pd.DataFrame(params_data, columns=['Parametr', 'Hodnota']).to_excel(
-                    writer, index=False, sheet_name='Parametry')
-                ws3 = writer.sheets['Parametry']
-                ws3.set_column(0, 0, 30)
-                ws3.set_column(1, 1, 15)
-
-            return buf.getvalue()
-
-        xlsx_bytes = to_excel(res.round(4))
-        st.download_button(
-            label="📥 Stáhnout výsledky (Excel .xlsx)",
-            data=xlsx_bytes,
-            file_name="kgj_optimalizace.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
\ No newline at end of file
+        if solver_diag.get('log'):
+            st.code(solver_diag['log'], language=None)
+        st.download_button("📥 Diagnostika (JSON)", json.dumps(diag, ensure_ascii=False, indent=2),
+                           file_name="kgj_diagnostika.json", mime="application/json")
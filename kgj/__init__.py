@@ -0,0 +1,12 @@
+"""Výpočetní jádro KGJ Strategy & Dispatch Optimizer (bez závislosti na Streamlitu)."""
+from .model import LinearModel, build_dispatch_model, dispatch_objective
+from .solver import Solution, solve
+from .decompose import DecompositionResult, solve_decomposed, split_windows
+from .sweep import price_grid, price_sweep
+from .montecarlo import MonteCarloResult, monte_carlo
+
+__all__ = [
+    'LinearModel', 'build_dispatch_model', 'dispatch_objective', 'Solution', 'solve',
+    'DecompositionResult', 'solve_decomposed', 'split_windows',
+    'price_grid', 'price_sweep', 'MonteCarloResult', 'monte_carlo',
+]
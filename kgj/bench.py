@@ -0,0 +1,260 @@
+"""Benchmark: syntetické lokality a měření fází výpočtu napříč kombinacemi technologií.
+
+Generátor (`synthetic_site`) vyrobí FWD křivku a lokální profil tepla / FVE
+libovolné délky (týden až několik let) s hodinovým nebo čtvrthodinovým krokem;
+výsledek je pro stejný `seed` vždy stejný. Každý případ (délka × krok ×
+technologie) projde stejnou cestou jako běh z app.py / CLI: zápis vstupů do
+souboru, `engine.run_site` a export. Běží v samostatném procesu, takže špička
+paměti procesu i studené cache patří jen jemu. Jako v app.py se řeší první rok
+FWD křivky – víceleté délky zatíží hlavně načítání a sloučení vstupů.
+
+Výsledek je JSON lines: první řádek `{'kind': 'meta', …}` (verze, revize git,
+stroj), pak `{'kind': 'case', …}` na případ s časy fází a pamětí. Dva soubory
+z různých revizí porovná `compare`.
+"""
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from .inputs import FVE_COL, HEAT_COL, steps
+from .params import TECH_KEYS, Params, SolveSettings, Tech
+
+try:
+    import resource   # jen Unix; jinde se paměť nezaznamená
+except ImportError:
+    resource = None
+
+# Souhrnné fáze: (fáze `run_site`, fáze `solve_dispatch`), časy se sčítají
+STAGES = {
+    'parse':   (('read_files', 'inputs'), ()),
+    'build':   ((), ('model', 'warm_start', 'clustering')),
+    'solve':   ((), ('solve',)),
+    'extract': ((), ('extract', 'shadow_prices')),
+    'post':    (('results', 'monthly', 'metrics'), ()),
+    'export':  (('export',), ()),
+}
+
+
+def synthetic_site(hours: float, step: float = 1.0, start: str = '2025-01-01',
+                   seed: int = 0) -> tuple:
+    """Syntetická FWD křivka a lokální data na `hours` hodin s krokem `step` [h].
+
+    Ceny EE mají denní a týdenní tvar, sezónu a polední propad FVE, plyn sezónu
+    a náhodnou procházku; poptávka po teple sleduje sezónu a denní průběh, FVE
+    je capacity factor 0–1 s délkou dne podle ročního období a oblačností po
+    dnech. Vrací (fwd, loc) ve sloupcích, jaké čte `inputs` (FWD: datetime,
+    cena EE, cena plynu; lokální: datetime, `HEAT_COL`, `FVE_COL`).
+    """
+    rng  = np.random.default_rng(seed)
+    t    = pd.date_range(start, periods=steps(hours, step), freq=pd.Timedelta(hours=step))
+    n    = len(t)
+    hour = np.asarray(t.hour + t.minute / 60, dtype=float)
+    day  = np.asarray((t - t[0]).days)
+    winter = np.cos(2 * np.pi * (np.asarray(t.dayofyear) - 15) / 365.25)   # 1 v zimě, −1 v létě
+
+    rise, dusk = 7.0 + 1.5 * winter, 17.0 - 2.0 * winter
+    sun    = np.clip(np.sin(np.pi * (hour - rise) / (dusk - rise)), 0, None) * ((hour > rise) & (hour < dusk))
+    clouds = rng.uniform(0.25, 1.0, day.max() + 1)[day]
+    fve    = sun * clouds * (0.75 - 0.2 * winter)
+
+    weekend = np.asarray(t.dayofweek >= 5)
+    shape   = 18 * np.sin(np.pi * (hour - 6) / 12) * ((hour > 6) & (hour < 22)) - 25 * fve
+    ee      = 85 + 15 * winter + shape - 12 * weekend + rng.normal(0, 10, n)
+    gas     = 40 + 6 * winter + np.cumsum(rng.normal(0, 0.05 * np.sqrt(step), n))
+    heat    = np.clip(1.6 + 1.1 * winter + 0.35 * np.cos(2 * np.pi * (hour - 7) / 24) + rng.normal(0, 0.15, n),
+                      0.05, None)
+
+    fwd = pd.DataFrame({'datetime': t, 'Cena EE [€/MWh]': ee, 'Cena plynu [€/MWh]': gas})
+    loc = pd.DataFrame({'datetime': t, HEAT_COL: heat, FVE_COL: fve})
+    return fwd, loc
+
+
+def write_inputs(fwd: pd.DataFrame, loc: pd.DataFrame, directory: str, fmt: str = 'xlsx') -> tuple:
+    """Zapíše vstupy jako `fmt` ('xlsx', 'csv' – český tvar se `;` a desetinnou čárkou, 'parquet');
+    vrací cesty (fwd, loc)."""
+    paths = []
+    for name, df in (('fwd', fwd), ('local', loc)):
+        path = os.path.join(directory, f"{name}.{fmt}")
+        if fmt == 'xlsx':
+            df.to_excel(path, index=False)
+        elif fmt == 'csv':
+            df.to_csv(path, index=False, sep=';', decimal=',', date_format='%d.%m.%Y %H:%M')
+        elif fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            raise ValueError(f"Neznámý formát vstupů: {fmt!r}")
+        paths.append(path)
+    return tuple(paths)
+
+
+def tech_combos(spec: str) -> list:
+    """Kombinace technologií: 'all' (vše zapnuté), 'each' (vše a pak vždy jedna vypnutá),
+    'full' (všech 2^7 kombinací) nebo seznam kombinací oddělený `;` ('kgj+tes;kgj+boil+bess')."""
+    if spec == 'all':
+        return [list(TECH_KEYS)]
+    if spec == 'each':
+        return [list(TECH_KEYS)] + [[k for k in TECH_KEYS if k != off] for off in TECH_KEYS]
+    if spec == 'full':
+        return [[k for k, on in zip(TECH_KEYS, mask) if on]
+                for mask in itertools.product((True, False), repeat=len(TECH_KEYS))]
+    combos = [[k for k in item.split('+') if k] for item in spec.split(';') if item]
+    unknown = {k for c in combos for k in c} - set(TECH_KEYS)
+    if unknown:
+        raise ValueError(f"Neznámé technologie: {', '.join(sorted(unknown))} (povolené: {', '.join(TECH_KEYS)})")
+    return combos
+
+
+def bench_cases(hours=(168, 720), step=(1.0,), tech: str = 'each', repeat: int = 1, fmt: str = 'xlsx',
+                export: str = 'xlsx', seed: int = 0, settings: dict | None = None) -> list:
+    """Seznam případů (délka × krok × technologie × opakování) pro `run_bench`."""
+    cases = []
+    for h, s, combo, r in itertools.product(hours, step, tech_combos(tech), range(repeat)):
+        on = '+'.join(combo) or 'none'
+        cases.append({
+            'id':       f"{h:g}h-{s * 60:g}min-{fmt}-{on}",
+            'hours':    float(h), 'step': float(s), 'tech': combo, 'repeat': r,
+            'format':   fmt, 'export': export, 'seed': seed,
+            'settings': dict(settings or {}),
+        })
+    return cases
+
+
+def _peak_mb() -> float | None:
+    """Špička RSS tohoto procesu [MB]. Podprocesy (CBC) nejsou zahrnuty – jejich `ru_maxrss`
+    na Linuxu obsahuje i paměť rodiče v okamžiku spuštění, takže by nic neříkala."""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)   # Linux: kB
+
+
+def run_case(case: dict) -> dict:
+    """Jeden případ v aktuálním procesu (`run_bench` ho pouští v čerstvém procesu)."""
+    from .engine import run_site
+    from .report import EXPORTS
+
+    base = _peak_mb()
+    tech = Tech(**{k: k in case['tech'] for k in TECH_KEYS})
+    try:
+        with tempfile.TemporaryDirectory(prefix='kgj_bench_') as tmp:
+            t0 = time.perf_counter()
+            fwd, loc = synthetic_site(case['hours'], case['step'], seed=case['seed'])
+            fwd_path, loc_path = write_inputs(fwd, loc, tmp, case['format'])
+            generate = time.perf_counter() - t0
+
+            t0  = time.perf_counter()
+            run = run_site(fwd_path, loc_path, params=Params(), tech=tech,
+                           settings=SolveSettings(**case['settings']), name=case['id'])
+            with run.phases('export'):
+                size = len(EXPORTS[case['export']][2](run.res, run.monthly, run.p, run.tech))
+            total = time.perf_counter() - t0
+    except Exception as e:   # případ se zaznamená s chybou, benchmark pokračuje
+        return {'kind': 'case', **case, 'error': f"{type(e).__name__}: {e}"}
+
+    outer  = run.phases.to_dict()
+    inner  = run.result.extra.get('diagnostics', {}).get('phases', {})
+    stages = {name: round(sum(outer.get(k, 0.0) for k in a) + sum(inner.get(k, 0.0) for k in b), 4)
+              for name, (a, b) in STAGES.items()}
+    return {
+        'kind':         'case',
+        **case,
+        'rows':         len(run.df),
+        'status':       pulp.LpStatus[run.result.status],
+        'objective':    run.result.objective,
+        'total':        round(total, 4),
+        'generate':     round(generate, 4),
+        'stages':       stages,
+        'phases':       outer,
+        'solve_phases': inner,
+        'model':        run.result.extra.get('diagnostics', {}).get('model', {}),
+        'export_bytes': size,
+        'baseline_rss_mb': base,   # po importech, před případem
+        'peak_rss_mb':     _peak_mb(),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def bench_meta() -> dict:
+    """Prostředí běhu – revize, verze knihoven a stroj (pro porovnání souborů)."""
+    return {
+        'kind':     'meta',
+        'revision': _git_revision(),
+        'started':  pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python':   platform.python_version(),
+        'numpy':    np.__version__,
+        'pandas':   pd.__version__,
+        'pulp':     pulp.__version__,
+        'machine':  platform.platform(),
+        'cpus':     os.cpu_count(),
+    }
+
+
+def run_bench(cases: list, out: str | None = None, progress=print) -> list:
+    """Spustí případy postupně, každý v novém procesu (spawn: bez sdílených cache a s vlastní
+    špičkou paměti). Záznamy zapisuje průběžně do `out` (JSON lines) a předává `progress`."""
+    records = [bench_meta()]
+    log     = open(out, 'w', encoding='utf-8') if out else None
+    try:
+        if log:
+            log.write(json.dumps(records[0], ensure_ascii=False) + '\n')
+        for case in cases:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                record = pool.submit(run_case, case).result()
+            records.append(record)
+            if log:
+                log.write(json.dumps(record, ensure_ascii=False) + '\n')
+                log.flush()
+            if progress:
+                progress(_summary(record))
+    finally:
+        if log:
+            log.close()
+    return records
+
+
+def _summary(record: dict) -> str:
+    if 'error' in record:
+        return f"{record['id']}: {record['error']}"
+    st = ' '.join(f"{k}={v:.2f}" for k, v in record['stages'].items())
+    return (f"{record['id']}: {record['status']} {record['total']:.2f} s ({st}) "
+            f"peak {record['peak_rss_mb']} MB")
+
+
+def load_bench(path: str) -> list:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(base: list, new: list) -> pd.DataFrame:
+    """Porovnání dvou výsledků (`load_bench`) po případech: časy fází a špička paměti
+    v `base` a `new` a jejich poměr (new / base; < 1 = zrychlení). Opakování se průměrují."""
+    def frame(records):
+        rows = [{'id': r['id'], 'total': r['total'], **r['stages'], 'peak_rss_mb': r['peak_rss_mb'],
+                 'objective': r['objective']}
+                for r in records if r.get('kind') == 'case' and 'error' not in r]
+        return pd.DataFrame(rows).groupby('id', sort=False).mean() if rows else pd.DataFrame()
+
+    a, b = frame(base), frame(new)
+    ids  = [i for i in b.index if i in a.index]
+    cols = ['total', *STAGES, 'peak_rss_mb']
+    out  = pd.concat({'base': a.loc[ids, cols], 'new': b.loc[ids, cols],
+                      'ratio': (b.loc[ids, cols] / a.loc[ids, cols].replace(0, np.nan)).round(3)}, axis=1)
+    out[('objective', 'diff')] = b.loc[ids, 'objective'] - a.loc[ids, 'objective']
+    return out
@@ -0,0 +1,207 @@
+"""Příkazová řádka: `python -m kgj run …` pro jednu lokalitu, `python -m kgj batch …` pro více,
+`python -m kgj bench …` pro benchmark na syntetických datech (viz `bench`).
+
+Záměrně neimportuje Streamlit ani Plotly – start je rychlý a běhy lze pouštět
+paralelně (cron, worker nody).
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .params import TECH_KEYS, Params, SolveSettings, Tech
+
+
+def _load_json(path: str | None) -> dict:
+    if not path:
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _format_of(path: str | None) -> str | None:
+    """Formát exportu podle přípony souboru (.xlsx, .csv.zip, .parquet.zip)."""
+    for fmt, suffix in (('csv', '.csv.zip'), ('parquet', '.parquet.zip'), ('xlsx', '.xlsx')):
+        if path and path.endswith(suffix):
+            return fmt
+    return None
+
+
+def _site_job(site: dict, out_dir: str | None, store_dir: str | None) -> dict:
+    """Jedna lokalita dávky; vrací souhrnný záznam (chyba se vrací jako záznam, ne výjimka)."""
+    from .engine import run_site
+    from .report import EXPORTS
+    from .store import ResultStore
+
+    name = site.get('name') or os.path.splitext(os.path.basename(site['local']))[0]
+    fmt  = site.get('format') or _format_of(site.get('out')) or 'xlsx'
+    try:
+        tech = Tech.from_dict({**Tech().to_dict(), **site.get('tech', {})})
+        run  = run_site(site['fwd'], site['local'], params=Params.from_dict(site.get('params', {})),
+                        tech=tech, settings=SolveSettings(**site.get('settings', {})),
+                        year=site.get('year'), ee_price=site.get('ee_price'), gas_price=site.get('gas_price'),
+                        store=ResultStore(store_dir) if store_dir else None, name=name)
+        ext, _, export = EXPORTS[fmt]
+        out = site.get('out') or (os.path.join(out_dir, f"{name}{ext}") if out_dir else None)
+        if out:
+            with run.phases('export'), open(out, 'wb') as f:
+                f.write(export(run.res, run.monthly, run.p, run.tech))
+        return run.record(diagnostics=bool(site.get('diagnostics')))
+    except Exception as e:   # dávka pokračuje dalšími lokalitami
+        return {'name': name, 'error': f"{type(e).__name__}: {e}"}
+
+
+def _sizing(specs: list | None) -> dict | None:
+    """`--size tes_cap=0:50:300` → {'tes_cap': [0.0, 50.0, 300.0]} (min, max, investice za rok)."""
+    if not specs:
+        return None
+    out = {}
+    for spec in specs:
+        key, _, bounds = spec.partition('=')
+        lo, hi, cost = (float(v) for v in bounds.split(':'))
+        out[key] = [lo, hi, cost]
+    return out
+
+
+def _cmd_run(args) -> int:
+    cfg  = _load_json(args.params)
+    tech = Tech.from_dict({**Tech().to_dict(), **cfg.pop('tech', {}),
+                           **{k: False for k in (args.disable or '').split(',') if k}})
+    site = {
+        'name': args.name, 'fwd': args.fwd, 'local': args.local, 'year': args.year,
+        'ee_price': args.ee_price, 'gas_price': args.gas_price, 'out': args.out, 'format': args.format,
+        'diagnostics': args.diagnostics,
+        'params': cfg, 'tech': tech.to_dict(),
+        'settings': {'mode': args.mode, 'period': args.period, 'overlap': args.overlap,
+                     'reference': args.reference, 'time_limit': args.time_limit, 'warm_start': args.warm_start,
+                     'backend': args.backend, 'threads': args.threads, 'gap_rel': args.gap_rel,
+                     'gap_abs': args.gap_abs, 'presolve': not args.no_presolve, 'rep_days': args.rep_days,
+                     'shadow_prices': not args.no_shadow_prices, 'sizing': _sizing(args.size)},
+    }
+    record = _site_job(site, None, args.store)
+    line   = json.dumps(record, ensure_ascii=False)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(line + '\n')
+    print(line)
+    return 1 if 'error' in record else 0
+
+
+def _cmd_batch(args) -> int:
+    """Manifest je JSON seznam lokalit: {name, fwd, local, year, ee_price, gas_price, params, tech, settings,
+    out, format, diagnostics}; `--format` je výchozí formát pro lokality bez `out` / `format`,
+    `--diagnostics` přidá diagnostiku do záznamu každé lokality."""
+    sites = _load_json(args.manifest)
+    if args.format:
+        sites = [{'format': args.format, **s} for s in sites]
+    if args.diagnostics:
+        sites = [{**s, 'diagnostics': True} for s in sites]
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    failed = 0
+    log    = open(args.json, 'w', encoding='utf-8') if args.json else None
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for record in pool.map(_site_job, sites, [args.out_dir] * len(sites), [args.store] * len(sites)):
+                line = json.dumps(record, ensure_ascii=False)
+                print(line, flush=True)
+                if log:
+                    log.write(line + '\n')
+                failed += 'error' in record
+    finally:
+        if log:
+            log.close()
+    return 1 if failed else 0
+
+
+def _cmd_bench(args) -> int:
+    """Případy délka × krok × technologie, záznamy do `--out`; s `--compare` porovnání se starším souborem."""
+    from .bench import bench_cases, compare, load_bench, run_bench
+
+    settings = {'mode': args.mode, 'time_limit': args.time_limit, 'gap_rel': args.gap_rel,
+                'shadow_prices': not args.no_shadow_prices}
+    cases    = bench_cases(hours=[float(h) for h in args.hours.split(',')],
+                           step=[float(s) for s in args.step.split(',')], tech=args.tech,
+                           repeat=args.repeat, fmt=args.format, export=args.export, seed=args.seed,
+                           settings=settings)
+    records  = run_bench(cases, out=args.out, progress=lambda line: print(line, flush=True))
+    if args.compare:
+        print(compare(load_bench(args.compare), records).to_string())
+    return 1 if any('error' in r for r in records) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m kgj', description="KGJ Strategy & Dispatch Optimizer – dávkový režim")
+    sub    = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="výpočet jedné lokality")
+    run.add_argument('--fwd',   required=True, help="FWD křivka (xlsx, csv, parquet): datetime, cena EE, cena plynu")
+    run.add_argument('--local', required=True, help="lokální data (xlsx, csv, parquet): datetime, Poptávka po teple (MW), FVE (MW)")
+    run.add_argument('--name')
+    run.add_argument('--year', type=int, help="rok z FWD křivky (výchozí první)")
+    run.add_argument('--ee-price',  type=float, help="cílová base cena EE [€/MWh]")
+    run.add_argument('--gas-price', type=float, help="cílová base cena plynu [€/MWh]")
+    run.add_argument('--params', help="JSON s parametry (klíče jako Params, volitelně 'tech')")
+    run.add_argument('--disable', help=f"vypnuté technologie, čárkou: {','.join(TECH_KEYS)}")
+    run.add_argument('--mode', choices=['full', 'rolling', 'parallel', 'screening', 'representative', 'sizing'],
+                     default='full')
+    run.add_argument('--rep-days', type=int, default=12, help="počet reprezentativních dní (režim representative)")
+    run.add_argument('--size', action='append', metavar='KLÍČ=MIN:MAX:CENA',
+                     help="dimenzovaná kapacita pro režim sizing (tes_cap, bess_cap, bess_p), "
+                          "cena = anualizovaná investice €/MWh nebo €/MW a rok; lze opakovat")
+    run.add_argument('--period', choices=['M', 'W'], default='M')
+    run.add_argument('--overlap', type=int, default=24)
+    run.add_argument('--reference', action='store_true', help="porovnat okna s celoroční MIP")
+    run.add_argument('--time-limit', type=float, default=300)
+    run.add_argument('--warm-start', choices=['none', 'heuristic', 'previous'], default='heuristic',
+                     help="počáteční řešení CBC: heuristika merit orderu / nejpodobnější uložený běh")
+    run.add_argument('--backend', choices=['cbc', 'highs'], default='cbc', help="solver (highs vyžaduje highspy)")
+    run.add_argument('--threads', type=int, default=1, help="vlákna branch-and-bound")
+    run.add_argument('--gap-rel', type=float, help="přípustná relativní mezera MIP (např. 0.001)")
+    run.add_argument('--gap-abs', type=float, help="přípustná absolutní mezera MIP [€]")
+    run.add_argument('--no-presolve', action='store_true')
+    run.add_argument('--no-shadow-prices', action='store_true',
+                     help="nepočítat mezní ceny tepla a EE (LP s pevným chodem KGJ)")
+    run.add_argument('--out', help="výstupní soubor (.xlsx, .csv.zip, .parquet.zip)")
+    run.add_argument('--format', choices=['xlsx', 'csv', 'parquet'], help="formát výstupu (výchozí podle přípony)")
+    run.add_argument('--json', help="souhrn jako JSON řádek do souboru")
+    run.add_argument('--diagnostics', action='store_true',
+                     help="do souhrnu přidat časy fází, velikost modelu a průběh solveru")
+    run.add_argument('--store', help="adresář úložiště výsledků (stejné zadání se nepočítá znovu)")
+    run.set_defaults(func=_cmd_run)
+
+    batch = sub.add_parser('batch', help="více lokalit podle manifestu, paralelně")
+    batch.add_argument('manifest', help="JSON seznam lokalit")
+    batch.add_argument('--workers', type=int, default=None)
+    batch.add_argument('--out-dir', help="adresář pro výstupy (<name>.xlsx / .csv.zip / .parquet.zip)")
+    batch.add_argument('--format', choices=['xlsx', 'csv', 'parquet'], help="formát výstupů")
+    batch.add_argument('--json', help="souhrny jako JSON lines")
+    batch.add_argument('--diagnostics', action='store_true', help="diagnostika v každém záznamu")
+    batch.add_argument('--store', help="adresář úložiště výsledků")
+    batch.set_defaults(func=_cmd_batch)
+
+    bench = sub.add_parser('bench', help="benchmark na syntetických lokalitách (časy fází, paměť)")
+    bench.add_argument('--hours', default='168,720', help="délky horizontu [h], čárkou (např. 168,720,8760)")
+    bench.add_argument('--step', default='1', help="kroky dat [h], čárkou (1 = hodinová, 0.25 = čtvrthodinová)")
+    bench.add_argument('--tech', default='each',
+                       help="kombinace technologií: all | each | full | seznam 'kgj+tes;kgj+boil+bess'")
+    bench.add_argument('--repeat', type=int, default=1, help="opakování každého případu")
+    bench.add_argument('--format', choices=['xlsx', 'csv', 'parquet'], default='xlsx', help="formát vstupních souborů")
+    bench.add_argument('--export', choices=['xlsx', 'csv', 'parquet'], default='xlsx', help="formát exportu")
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--mode', choices=['full', 'rolling', 'parallel', 'screening', 'representative'],
+                       default='full')
+    bench.add_argument('--time-limit', type=float, default=300)
+    bench.add_argument('--gap-rel', type=float, help="přípustná relativní mezera MIP")
+    bench.add_argument('--no-shadow-prices', action='store_true')
+    bench.add_argument('--out', default='bench.jsonl', help="výsledky jako JSON lines")
+    bench.add_argument('--compare', help="starší výsledky (JSON lines) k porovnání")
+    bench.set_defaults(func=_cmd_bench)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
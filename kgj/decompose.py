@@ -0,0 +1,180 @@
+"""Řešení po oknech (měsíce / týdny) místo jedné celoroční MIP.
+
+Dva režimy:
+  * postupný (rolling horizon) – okna se řeší za sebou, konec okna (SOC TES/BESS,
+    stav KGJ a zbývající min. doba běhu) je počáteční podmínkou dalšího; okno se
+    řeší s přesahem `overlap` hodin, ze kterého se výsledek nepoužije,
+  * paralelní – okna jsou nezávislá: začínají i končí na výchozím SOC, KGJ před
+    oknem neběží; řeší se souběžně v `ProcessPoolExecutor`. Min. doba běhu,
+    min. odstávka a rampy KGJ se přes hranice oken v tomto režimu nehlídají.
+
+Sešité řešení se vyhodnotí v celoročním modelu, takže účelová funkce je přímo
+srovnatelná s celoročním řešením. Porušuje-li sešité řešení omezení celoročního
+modelu (typicky na hranicích paralelních oken), není přípustné
+(`DecompositionResult.feasible`) a stav řešení je `LpStatusUndefined`.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from .heuristic import merit_order_dispatch
+from .inputs import steps, time_step
+from .model import build_dispatch_model
+from .solver import Solution, solve
+
+FEAS_TOL = 1e-5   # tolerance porušení řádku sešitého řešení (zaokrouhlení solveru v oknech)
+
+
+@dataclass
+class WindowResult:
+    start: int
+    end: int
+    status: int
+    objective: float
+    seconds: float
+
+
+@dataclass
+class DecompositionResult:
+    solution: Solution
+    windows: list = field(default_factory=list)
+    reference_objective: float | None = None
+    violation: float = 0.0   # největší porušení řádku celoročního modelu sešitým řešením
+
+    @property
+    def feasible(self) -> bool:
+        return self.violation <= FEAS_TOL
+
+    @property
+    def gap(self) -> float | None:
+        """Relativní ztráta sešitého řešení proti celoročnímu (kladná = horší)."""
+        if self.reference_objective is None or self.reference_objective == 0:
+            return None
+        return (self.reference_objective - self.solution.objective) / abs(self.reference_objective)
+
+
+def split_windows(datetimes: pd.Series, period: str = 'M') -> list:
+    """Rozdělí horizont na souvislé úseky podle kalendáře (`'M'` měsíce, `'W'` týdny).
+
+    Vrací seznam dvojic (začátek, konec) jako indexy řádků, konec exkluzivní.
+    """
+    codes = pd.to_datetime(datetimes).dt.to_period(period).to_numpy()
+    cuts  = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    edges = [0, *cuts.tolist(), len(codes)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _solve_window(df_w: pd.DataFrame, p: dict, tech: dict, boundary: dict, time_limit: float,
+                  warm_start: bool = False, options: dict | None = None):
+    t0  = time.perf_counter()
+    m   = build_dispatch_model(df_w, p, tech, boundary)
+    sol = solve(m, time_limit=time_limit, options=options,
+                start=m.pack(merit_order_dispatch(df_w, p, tech)) if warm_start else None)
+    values = sol.values()
+    return sol.status, sol.objective, values, time.perf_counter() - t0
+
+
+def _solve_full(df: pd.DataFrame, p: dict, tech: dict, time_limit: float, warm_start: bool = False,
+                options: dict | None = None) -> float:
+    m = build_dispatch_model(df, p, tech)
+    return solve(m, time_limit=time_limit, options=options,
+                 start=m.pack(merit_order_dispatch(df, p, tech)) if warm_start else None).objective
+
+
+def _trailing_run(on: np.ndarray, state: int) -> int:
+    """Počet posledních kroků `on`, po které je KGJ nepřetržitě ve stavu `state` (1 běží, 0 stojí)."""
+    other = np.flatnonzero(np.round(on) != state)
+    return len(on) - (other[-1] + 1 if len(other) else 0)
+
+
+def solve_decomposed(df: pd.DataFrame, p: dict, tech: dict, period: str = 'M', overlap: int = 24,
+                     parallel: bool = False, workers: int | None = None, time_limit: float = 300,
+                     reference: bool = False, warm_start: bool = False,
+                     options: dict | None = None) -> DecompositionResult:
+    """Vyřeší dispečink po oknech a sešije výsledek do řešení celoročního modelu.
+
+    `reference=True` navíc spočte celoroční MIP (v paralelním režimu souběžně
+    s okny) a `DecompositionResult.gap` pak udává odchylku sešitého řešení.
+    `warm_start=True` dá každému oknu počáteční řešení z heuristiky merit orderu,
+    `options` je nastavení solveru (viz `solver.solve`).
+    """
+    T       = len(df)
+    windows = split_windows(df['datetime'], period)
+    full    = build_dispatch_model(df, p, tech)
+    parts   = []
+    ref_obj = None
+
+    if parallel:
+        bc = {}
+        if tech['tes']:
+            bc['tes_soc0'] = bc['tes_soc_end'] = p['tes_cap'] * 0.5
+        if tech['bess']:
+            bc['bess_soc0'] = bc['bess_soc_end'] = p['bess_cap'] * 0.2
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            ref_future = pool.submit(_solve_full, df, p, tech, time_limit, warm_start, options) if reference else None
+            futures = [pool.submit(_solve_window, df.iloc[a:b], p, tech, bc, time_limit, warm_start,
+                                   options)
+                       for a, b in windows]
+            for (a, b), fut in zip(windows, futures):
+                parts.append((a, b, *fut.result()))
+            if ref_future is not None:
+                ref_obj = ref_future.result()
+    else:
+        dt      = time_step(df['datetime'])
+        bc      = {}
+        on_hist = np.zeros(0)
+        min_up   = steps(p.get('k_min_runtime', 1), dt)
+        min_down = steps(p.get('k_min_downtime', 1), dt)
+        for a, b in windows:
+            e = min(b + int(round(overlap / dt)), T)
+            status, obj, values, secs = _solve_window(df.iloc[a:e], p, tech, bc, time_limit,
+                                                        warm_start, options)
+            parts.append((a, b, status, obj, values, secs))
+            # Konec použité části okna → počáteční podmínky dalšího okna
+            n  = b - a
+            bc = {}
+            if tech['tes']:
+                bc['tes_soc0'] = float(values['TES_SOC'][n])
+            if tech['bess']:
+                bc['bess_soc0'] = float(values['BESS_SOC'][n])
+            if tech['kgj']:
+                on_hist = np.concatenate([on_hist, values['on'][:n]])
+                up, down = _trailing_run(on_hist, 1), _trailing_run(on_hist, 0)
+                bc['kgj_on0']      = up > 0
+                bc['kgj_q0']       = float(values['q_KGJ'][n - 1])
+                bc['kgj_must_run'] = max(0, min_up - up) if up else 0
+                # Min. odstávka platí jen po skutečném odstavení (ne pro klid od začátku horizontu)
+                bc['kgj_must_off'] = max(0, min_down - down) if 0 < down < len(on_hist) else 0
+        if reference:
+            ref_obj = _solve_full(df, p, tech, time_limit, warm_start, options)
+
+    # ── Sešití do proměnných celoročního modelu ───────
+    x = np.zeros(full.n_cols)
+    for name, idx in full.vars.items():
+        lead   = len(idx) - T   # 1 u SOC (stav před první hodinou)
+        chunks = [parts[0][4][name][:lead]]
+        chunks += [values[name][lead:lead + b - a] for a, b, _, _, values, _ in parts]
+        x[idx] = np.concatenate(chunks)
+    if tech['kgj']:
+        # Na hranicích nezávislých oken může vzniknout „start“ běžící KGJ – přepočet ze stavu on
+        on   = np.round(x[full.vars['on']])
+        prev = np.concatenate([[0.0], on[:-1]])
+        x[full.vars['start']] = np.maximum(on - prev, 0.0)
+        x[full.vars['stop']]  = np.maximum(prev - on, 0.0)
+
+    statuses  = [s for _, _, s, *_ in parts]
+    status    = next((s for s in statuses if s != pulp.LpStatusOptimal), pulp.LpStatusOptimal)
+    violation = float(full.violation(x).max(initial=0.0))
+    if status == pulp.LpStatusOptimal and violation > FEAS_TOL:
+        status = pulp.LpStatusUndefined   # okna optimální, sešité řešení ale celoroční model porušuje
+    solution = Solution(status=status, objective=float(full.arrays()['c'] @ x), x=x, model=full)
+    return DecompositionResult(
+        solution=solution,
+        windows=[WindowResult(a, b, s, o, secs) for a, b, s, o, _, secs in parts],
+        reference_objective=ref_obj,
+        violation=violation,
+    )
@@ -0,0 +1,117 @@
+"""Diagnostika běhu: časy fází, velikost modelu a průběh řešení z logu CBC.
+
+Všechno jsou prosté slovníky a seznamy (JSON-serializovatelné) – ukládají se
+do metadat běhu, dávkový režim je zapisuje do JSON záznamu a app.py je
+zobrazuje v panelu diagnostiky.
+"""
+import re
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+LOG_TAIL = 60   # řádků logu solveru uložených s během
+
+_SECONDS   = re.compile(r'\((\S+) seconds\)')
+_NODES     = re.compile(r'(\d+) nodes')
+_SOLUTION  = re.compile(r'(?:Integer solution of|best objective) (-?[\d.e+-]+)|(-?[\d.e+-]+) best solution')
+_POSSIBLE  = re.compile(r'best possible (-?[\d.e+-]+)')
+_ROOT      = re.compile(r'^Continuous objective value is (\S+) - (\S+) seconds')
+
+
+class Phases:
+    """Časy pojmenovaných fází [s] v pořadí prvního výskytu; opakovaná fáze se sčítá.
+
+    Buď jako blok (`with phases('model'): …`), nebo jako mezičasy
+    (`phases.lap('graf')` = čas od předchozího mezičasu).
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self._last   = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    @contextmanager
+    def __call__(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+            self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        self.add(name, now - self._last)
+        self._last = now
+
+    def to_dict(self) -> dict:
+        return {k: round(v, 4) for k, v in self.seconds.items()}
+
+
+def model_stats(model) -> dict:
+    """Velikost `LinearModel`: řádky, sloupce, celočíselné / binární proměnné a nenulové prvky."""
+    a = model.arrays()
+    integer = a['integer']
+    return {
+        'rows':     model.n_rows,
+        'cols':     model.n_cols,
+        'integers': int(integer.sum()),
+        'binaries': int((integer & (a['lb'] == 0) & (a['ub'] == 1)).sum()),
+        'nonzeros': int(np.count_nonzero(a['val'])),
+    }
+
+
+def _num(text: str | None) -> float | None:
+    """Číslo z logu CBC; 1e50 znamená „zatím žádné“."""
+    if text is None:
+        return None
+    v = float(text)
+    return None if abs(v) >= 1e49 else v
+
+
+def cbc_progress(log: str) -> list:
+    """Průběh branch-and-bound z logu CBC: body {seconds, nodes, objective, bound, gap}.
+
+    Hodnoty jsou převedené na maximalizaci (model se řeší jako minimalizace −c).
+    Bere LP relaxaci v kořeni (první mez), nalezená celočíselná řešení (Cbc0004I,
+    Cbc0012I), průběžné zprávy stromu (Cbc0010I) a závěrečný souhrn (Cbc0001I –
+    dokázané optimum je samo sobě mezí, pokud hledání neukončila tolerance mezery
+    Cbc0011I; Cbc0005I).
+    """
+    points, best, bound, gap_exit = [], None, None, False
+    for line in log.splitlines():
+        gap_exit = gap_exit or line.startswith('Cbc0011I')
+        root = _ROOT.match(line)
+        if root:
+            bound = -float(root.group(1))
+            points.append({'seconds': float(root.group(2)), 'nodes': 0, 'objective': None,
+                           'bound': bound, 'gap': None})
+            continue
+        if not line.startswith(('Cbc0001I', 'Cbc0004I', 'Cbc0005I', 'Cbc0010I', 'Cbc0012I')):
+            continue
+        sec = _SECONDS.search(line)
+        if sec is None:
+            continue
+        sol, pos, nodes = _SOLUTION.search(line), _POSSIBLE.search(line), _NODES.search(line)
+        if sol:
+            v = _num(sol.group(1) or sol.group(2))
+            best = -v if v is not None else best
+        if pos:
+            v = _num(pos.group(1))
+            bound = -v if v is not None else bound
+        elif line.startswith('Cbc0001I') and best is not None and not gap_exit:
+            bound = best
+        gap = (max(bound - best, 0.0) / abs(bound)
+               if best is not None and bound not in (None, 0) else None)
+        points.append({'seconds': float(sec.group(1)), 'nodes': int(nodes.group(1)) if nodes else 0,
+                       'objective': best, 'bound': bound, 'gap': gap})
+    return points
+
+
+def log_tail(log: str, lines: int = LOG_TAIL) -> str:
+    """Posledních `lines` řádků logu (bez opakovaných souhrnů řezů)."""
+    kept = [ln for ln in log.splitlines() if ln.strip() and ' was tried ' not in ln]
+    return '\n'.join(kept[-lines:])
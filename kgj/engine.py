@@ -0,0 +1,306 @@
+"""Bezobslužný výpočet: vstupy → model → řešení → výsledky, bez Streamlitu a Plotly.
+
+Používá ho app.py i příkazová řádka (`python -m kgj`), takže UI a dávkový
+režim počítají stejně.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from .decompose import FEAS_TOL, solve_decomposed
+from .diagnostics import Phases, cbc_progress, log_tail, model_stats
+from .heuristic import merit_order_dispatch
+from .inputs import (LRUCache, fwd_year_averages, fwd_years, input_report, input_warnings, merged_inputs,
+                     time_step)
+from .model import HOURS_PER_YEAR, LinearModel, build_dispatch_model, structure_key, update_dispatch_model
+from .params import Params, SolveSettings, Tech
+from .report import build_results, key_metrics, monthly_summary
+from .representative import build_representative_model, cluster_days, expand_days
+from .screening import screen
+from .shadow import shadow_prices
+from .solver import solve
+from .store import ResultStore, result_key
+
+
+@dataclass
+class RunResult:
+    status: int
+    objective: float
+    values: dict = field(repr=False)
+    extra: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def var(self, name: str, n: int, fill: float = 0.0) -> np.ndarray:
+        v = self.values.get(name)
+        return v if v is not None else np.full(n, fill)
+
+
+@dataclass
+class _CachedModel:
+    model: LinearModel
+    x: np.ndarray | None = None     # řešení posledního běhu (počáteční řešení dalšího)
+    rhs: np.ndarray | None = None   # pravé strany, pro které bylo `x` nalezeno
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+# Modely celé MIP v procesu podle `model.structure_key` – změna jen cen, tarifů,
+# poptávky nebo FVE model nepřestaví, jen přenastaví c a pravé strany
+_models = LRUCache(max_items=4)
+
+
+def prepare_data(df: pd.DataFrame, p: dict, tech: dict) -> pd.DataFrame:
+    """FVE profil (capacity factor 0–1) → výkon v MW podle instalovaného výkonu."""
+    if tech['fve'] and 'fve_installed_p' in p and 'FVE (MW)' in df.columns:
+        df['FVE (MW)'] = df['FVE (MW)'].clip(0, 1) * p['fve_installed_p']
+    return df
+
+
+def sized_params(p: dict, extra: dict) -> dict:
+    """Parametry s kapacitami nalezenými v režimu 'sizing' místo zadaných (jinak `p` beze změny)."""
+    sizing = extra.get('sizing') or {}
+    return {**p, **{k: v['value'] for k, v in sizing.items()}} if sizing else p
+
+
+def warm_start_values(df: pd.DataFrame, p: dict, tech: dict, source: str,
+                      store: ResultStore | None = None) -> tuple:
+    """Počáteční řešení po rodinách a jeho původ ('heuristic' / klíč uloženého běhu), nebo (None, None)."""
+    if source == 'previous' and store is not None:
+        prev = store.nearest(p, tech, df)
+        if prev is not None:
+            return prev.values, prev.key
+    if source in ('heuristic', 'previous'):
+        return merit_order_dispatch(df, p, tech), 'heuristic'
+    return None, None
+
+
+def solve_dispatch(df: pd.DataFrame, p: dict, tech: dict, settings: SolveSettings,
+                   store: ResultStore | None = None) -> RunResult:
+    """Vyřeší dispečink podle `settings.mode` a vrátí hodnoty proměnných po rodinách.
+
+    `store` slouží jen jako zdroj počátečního řešení pro `warm_start='previous'`
+    a v režimu 'representative' jako zdroj uloženého řešení celé MIP pro odhad chyby.
+    """
+    t0     = time.perf_counter()
+    extra  = {'settings': settings.to_dict()}
+    phases = Phases()
+    if settings.mode == 'screening':
+        scr = screen(df, p, tech, period=settings.period, time_limit=settings.time_limit,
+                     options=settings.solver_options())
+        extra['screening'] = {'heuristic': scr.heuristic, 'bound': scr.bound, 'gap': scr.gap,
+                              'feasible': scr.feasible, 'seconds': scr.seconds,
+                              'bound_seconds': scr.bound_seconds}
+        phases.add('heuristic', scr.seconds)
+        phases.add('lp_bound', scr.bound_seconds)
+        extra['feasible'], extra['violation'] = scr.feasible, scr.violation
+        extra['diagnostics'] = {'phases': phases.to_dict()}
+        # Heuristický dispečink je odhad, ne optimum: přípustný = nevyřešeno, nepřípustný = nedefinováno
+        status = pulp.LpStatusNotSolved if scr.feasible else pulp.LpStatusUndefined
+        return RunResult(status, scr.heuristic, scr.values, extra, time.perf_counter() - t0)
+    if settings.mode == 'full':
+        built = []   # model sestavený v tomto volání už má koeficienty z `df` a `p`
+
+        def build():
+            built.append(_CachedModel(build_dispatch_model(df, p, tech)))
+            return built[0]
+
+        with phases('model'):
+            cached = _models.get_or_create(structure_key(df, p, tech), build)
+        # Sdílený model se přenastavuje na místě → souběžné běhy stejné struktury jdou po sobě
+        with cached.lock:
+            with phases('model'):
+                model = cached.model
+                # Převzatý model nese koeficienty posledního volání – i takového, jehož řešení
+                # skončilo chybou nebo zrušením → přenastavit vždy
+                reused = not (built and cached is built[0])
+                if reused:
+                    update_dispatch_model(model, df, p, tech)
+                model.arrays()
+            extra['model_reused'] = reused
+            with phases('warm_start'):
+                # Řešení předchozího běhu stejné struktury: po změně jen cen zůstává přípustné,
+                # po změně poptávky / FVE / pokrytí (pravé strany) jen pokud to ověří `violation`
+                start = None
+                if cached.x is not None and settings.warm_start != 'none':
+                    if np.array_equal(model.arrays()['rhs'], cached.rhs):
+                        start, extra['warm_start'] = cached.x, 'model'
+                    elif model.violation(cached.x).max(initial=0.0) <= FEAS_TOL:
+                        start, extra['warm_start'] = cached.x, 'model_rhs'
+                if start is None:
+                    start, extra['warm_start'] = warm_start_values(df, p, tech, settings.warm_start, store)
+                    start = model.pack(start) if start is not None else None
+            with phases('solve'):
+                sol = solve(model, time_limit=settings.time_limit, options=settings.solver_options(), start=start)
+            if sol.status == pulp.LpStatusOptimal:
+                cached.x, cached.rhs = sol.x, model.arrays()['rhs']
+        extra['bound'], extra['gap'] = sol.bound, sol.gap
+    elif settings.mode == 'sizing':
+        sizing = {k: tuple(v) for k, v in (settings.sizing or {}).items()}
+        with phases('model'):
+            model = build_dispatch_model(df, p, tech, sizing=sizing)
+            model.arrays()
+        with phases('warm_start'):
+            # Počáteční řešení pro zadané kapacity oříznuté do mezí dimenzování
+            fixed = {k: min(max(p[k], lo), hi) for k, (lo, hi, _) in sizing.items() if k in p}
+            start, extra['warm_start'] = warm_start_values(df, {**p, **fixed}, tech, settings.warm_start, store)
+            start = model.pack({**start, **{f'size_{k}': [v] for k, v in fixed.items()}}) if start is not None else None
+        with phases('solve'):
+            sol = solve(model, time_limit=settings.time_limit, options=settings.solver_options(), start=start)
+        extra['bound'], extra['gap'] = sol.bound, sol.gap
+        horizon = len(df) * model.dt / HOURS_PER_YEAR
+        extra['sizing'] = {
+            k: {'value': float(sol.x[model.vars[f'size_{k}']][0]), 'min': lo, 'max': hi, 'cost': cost,
+                'investment': float(sol.x[model.vars[f'size_{k}']][0] * cost * horizon)}
+            for k, (lo, hi, cost) in sizing.items() if f'size_{k}' in model.vars
+        }
+    elif settings.mode == 'representative':
+        with phases('clustering'):
+            rep = cluster_days(df, settings.rep_days)
+        with phases('model'):
+            model = build_representative_model(df, p, tech, rep)
+            model.arrays()
+        with phases('solve'):
+            sol = solve(model, time_limit=settings.time_limit, options=settings.solver_options())
+        # Srovnání s uloženým řešením celé MIP pro stejné zadání, pokud existuje
+        ref = store.find_full(p, tech, df) if store is not None else None
+        extra['representative'] = {
+            'days':      len(rep.medoids),
+            'medoids':   [str(df['datetime'].iloc[rep.days[d][0]].date()) for d in rep.medoids],
+            'weights':   rep.weights.round(3).tolist(),
+            'explained': rep.explained,
+            'reference': ref.objective if ref is not None else None,
+            'error':     ((sol.objective - ref.objective) / abs(ref.objective)
+                          if ref is not None and ref.objective else None),
+        }
+    else:
+        with phases('solve'):
+            decomp = solve_decomposed(df, p, tech, period=settings.period, overlap=settings.overlap,
+                                      parallel=settings.mode == 'parallel', time_limit=settings.time_limit,
+                                      reference=settings.reference, warm_start=settings.warm_start != 'none',
+                                      options=settings.solver_options())
+        sol = decomp.solution
+        extra['windows'] = [vars(w) for w in decomp.windows]
+        extra['reference_objective'] = decomp.reference_objective
+        extra['feasible'], extra['violation'] = decomp.feasible, decomp.violation
+    with phases('extract'):
+        values = expand_days(rep, sol.model, sol.x, p) if settings.mode == 'representative' else sol.values()
+    # Reprezentativní dny: rozvinutý chod KGJ nehlídá min. dobu běhu / odstávku ani rampy přes hranice dní
+    # a celoroční LP je právě ten velký model, kterému se odhad vyhýbá → mezní ceny se nepočítají
+    if settings.shadow_prices and settings.mode != 'representative' and sol.status == pulp.LpStatusOptimal:
+        with phases('shadow_prices'):
+            # LP s pevným chodem musí popisovat stejnou lokalitu – po dimenzování s nalezenými kapacitami
+            shadow = shadow_prices(df, sized_params(p, extra), tech, values, settings.time_limit,
+                                   settings.solver_options())
+        values.update(shadow.values)
+        extra['shadow_prices'] = {'status': shadow.status, 'seconds': round(shadow.seconds, 3)}
+    extra['diagnostics'] = {
+        'phases': phases.to_dict(),
+        'model':  model_stats(sol.model),
+        'solver': {'backend': settings.backend, **{k: round(v, 4) for k, v in sol.timings.items()},
+                   'progress': cbc_progress(sol.log), 'log': log_tail(sol.log)},
+    }
+    return RunResult(sol.status, sol.objective, values, extra, time.perf_counter() - t0)
+
+
+@dataclass
+class SiteRun:
+    name: str
+    year: int
+    df: pd.DataFrame = field(repr=False)
+    p: dict = field(repr=False)
+    tech: dict
+    result: RunResult
+    res: pd.DataFrame = field(repr=False)
+    monthly: pd.DataFrame = field(repr=False)
+    metrics: dict
+    phases: Phases = field(default_factory=Phases, repr=False)
+    inputs: dict = field(default_factory=dict, repr=False)   # přehled vstupů (`inputs.input_report`)
+
+    def diagnostics(self) -> dict:
+        """Časy fází celého běhu a diagnostika řešení (velikost modelu, průběh solveru)."""
+        return {'phases': self.phases.to_dict(), 'solve': self.result.extra.get('diagnostics', {})}
+
+    def record(self, diagnostics: bool = False) -> dict:
+        """Souhrn běhu jako JSON-serializovatelný záznam (pro logy dávkových běhů),
+        s `diagnostics=True` včetně `diagnostics()`."""
+        # Horní mez: z LP relaxace (screening) nebo nejlepší mez solveru (celá MIP)
+        bound = self.result.extra.get('screening') or self.result.extra
+        dt    = time_step(self.df['datetime'])
+        warns = input_warnings(self.inputs)
+        return {
+            'name':      self.name,
+            'year':      self.year,
+            'hours':     int(round(len(self.df) * dt)),
+            'step':      dt,
+            'status':    pulp.LpStatus[self.result.status],
+            'objective': self.result.objective,
+            'seconds':   round(self.result.seconds, 3),
+            **({'bound': bound['bound'], 'gap': bound['gap']} if bound.get('bound') is not None else {}),
+            **({'sizing': {k: v['value'] for k, v in self.result.extra['sizing'].items()}}
+               if self.result.extra.get('sizing') else {}),
+            **({'feasible': False, 'violation': self.result.extra['violation']}
+               if self.result.extra.get('feasible') is False else {}),
+            **self.metrics,
+            **({'input_warnings': warns} if warns else {}),
+            **({'diagnostics': self.diagnostics()} if diagnostics else {}),
+        }
+
+
+def run_site(fwd_path: str, loc_path: str, params: Params | None = None, tech: Tech | None = None,
+             settings: SolveSettings | None = None, year: int | None = None,
+             ee_price: float | None = None, gas_price: float | None = None,
+             store: ResultStore | None = None, name: str | None = None) -> SiteRun:
+    """Celý výpočet jedné lokality ze souborů FWD a lokálních dat.
+
+    Bez `year` se vezme první rok FWD křivky, bez `ee_price` / `gas_price`
+    zůstanou ceny nepřesunuté (cílová base cena = průměr roku).
+    """
+    params   = params or Params()
+    tech     = tech or Tech()
+    settings = settings or SolveSettings()
+    phases   = Phases()
+    with phases('read_files'):
+        with open(fwd_path, 'rb') as f:
+            fwd_bytes = f.read()
+        with open(loc_path, 'rb') as f:
+            loc_bytes = f.read()
+
+    with phases('inputs'):
+        year = fwd_years(fwd_bytes)[0] if year is None else year
+        avg_ee, avg_gas = fwd_year_averages(fwd_bytes, year)
+        ee_new  = avg_ee  if ee_price  is None else ee_price
+        gas_new = avg_gas if gas_price is None else gas_price
+
+        p  = params.to_dict(tech, avg_ee, avg_gas)
+        td = tech.to_dict()
+        df = prepare_data(merged_inputs(fwd_bytes, year, ee_new, gas_new, loc_bytes), p, td)
+        report = input_report(fwd_bytes, year, ee_new, gas_new, loc_bytes)
+
+    with phases('store_lookup'):
+        key    = result_key(p, td, df, settings.to_dict()) if store is not None else None
+        stored = store.load(key) if store is not None else None
+    if stored is not None:
+        result = RunResult(stored.status, stored.objective, stored.values, stored.meta)
+    else:
+        with phases('solve'):
+            result = solve_dispatch(df, p, td, settings, store)
+        if store is not None:
+            with phases('store_save'):
+                store.save(key, p, td, df, result.values, result.status, result.objective, result.extra)
+
+    p = sized_params(p, result.extra)   # výsledky a metriky s optimálními kapacitami
+
+    with phases('results'):
+        res = build_results(df, p, td, result.var)
+    with phases('monthly'):
+        monthly = monthly_summary(res)
+    with phases('metrics'):
+        metrics = key_metrics(res, p, td, result.var)
+    return SiteRun(
+        name=name or os.path.splitext(os.path.basename(loc_path))[0], year=year, df=df, p=p, tech=td,
+        result=result, res=res, monthly=monthly, metrics=metrics, phases=phases, inputs=report,
+    )
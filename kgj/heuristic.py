@@ -0,0 +1,176 @@
+"""Rychlý heuristický dispečink podle merit orderu (bez solveru).
+
+Slouží jako počáteční řešení (MIP start) pro CBC a jako rychlý odhad zisku
+(screening): rozhodnutí o chodu KGJ respektuje min. dobu běhu / odstávky
+a startovní náklady, TES ukládá přebytek KGJ nad poptávkou a vybíjí se
+přednostně, zbytek tepla kryje nejlevnější dostupný zdroj. BESS v každém dni
+nabíjí v levných a vybíjí v drahých hodinách. Rampy KGJ heuristika nehlídá.
+"""
+import numpy as np
+import pandas as pd
+
+from .inputs import commit_grid, steps, time_step
+from .ledger import _price, dist_net, ee_sell_price
+
+
+def _runs(on: np.ndarray) -> list:
+    """Souvislé úseky `True` jako dvojice (začátek, konec), konec exkluzivní."""
+    edges = np.diff(np.r_[0, on.astype(np.int8), 0])
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def _commitment(benefit: np.ndarray, ok: np.ndarray, start_cost: float, min_up: int, min_down: int) -> np.ndarray:
+    """Chod KGJ z přínosu v každém kroku [€]: úseky s kladným přínosem, sloučené přes krátké
+    (nebo levnější než nový start) odstávky, prodloužené na min. dobu běhu (v krocích) a
+    zahozené, pokud se jim start nevyplatí. Kroky mimo `ok` KGJ běžet nesmí."""
+    T  = len(benefit)
+    on = ok & (benefit > 0)
+
+    def merge_gaps(on):
+        runs = _runs(on)
+        for (_, a), (b, _) in zip(runs[:-1], runs[1:]):
+            if ok[a:b].all() and (b - a < min_down or benefit[a:b].sum() + start_cost > 0):
+                on[a:b] = True
+        return on
+
+    on = merge_gaps(on)
+    for a, b in _runs(on):
+        # Krátký úsek prodloužit o sousední povolené kroky s nejvyšším přínosem
+        while b - a < min_up:
+            left  = benefit[a - 1] if a > 0 and ok[a - 1] and not on[a - 1] else -np.inf
+            right = benefit[b]     if b < T and ok[b] and not on[b]         else -np.inf
+            if left == right == -np.inf:
+                break
+            if left >= right:
+                a -= 1
+            else:
+                b += 1
+        on[a:b] = b - a >= min_up and benefit[a:b].sum() > start_cost
+    return merge_gaps(on)
+
+
+def _tes_rule(h_dem: np.ndarray, q_lo: np.ndarray, q_hi: np.ndarray, cap: float, loss: float, soc0: float,
+              dt: float = 1.0):
+    """KGJ + TES krok po kroku (délky `dt` [h]): výkon KGJ nad poptávku (až do `q_hi`) nabíjí nádrž,
+    poptávku nepokrytou KGJ kryje nejdřív nádrž. Bez TES je `cap` = 0."""
+    T = len(h_dem)
+    q, tes_in, tes_out = np.zeros(T), np.zeros(T), np.zeros(T)
+    soc = np.empty(T + 1)
+    soc[0] = soc0
+    keep = (1 - loss) ** dt
+    for t in range(T):
+        kept, d = soc[t] * keep, h_dem[t]
+        if q_hi[t] > d:
+            tes_in[t] = min(q_hi[t] - d, (cap - kept) / dt)
+            q[t]      = max(d + tes_in[t], q_lo[t])
+        else:
+            q[t]       = q_hi[t]
+            tes_out[t] = min(d - q[t], kept / dt)
+        soc[t + 1] = kept + (tes_in[t] - tes_out[t]) * dt
+    return q, tes_in, tes_out, soc
+
+
+def _bess_rule(ee: np.ndarray, days: np.ndarray, p: dict, dt: float = 1.0):
+    """BESS: v každém dni nabíjí v krocích pod dolním a vybíjí nad horním kvartilem ceny,
+    pokud rozdíl kvartilů pokryje ztráty a náklady cyklu."""
+    eff, cap, pw = p['bess_eff'], p['bess_cap'], p['bess_p']
+    by_day = pd.Series(ee).groupby(days)
+    lo, hi = by_day.transform('quantile', 0.25).to_numpy(), by_day.transform('quantile', 0.75).to_numpy()
+    worth  = hi * eff - lo / eff > 2 * p['bess_cycle_cost']
+    charge, discharge = worth & (ee <= lo), worth & (ee >= hi)
+
+    T = len(ee)
+    cha, dis = np.zeros(T), np.zeros(T)
+    soc = np.empty(T + 1)
+    soc[0] = cap * 0.2
+    for t in range(T):
+        if charge[t]:
+            cha[t] = min(pw, (cap - soc[t]) / (eff * dt))
+        elif discharge[t]:
+            dis[t] = min(pw, soc[t] * eff / dt)
+        soc[t + 1] = soc[t] + (eff * cha[t] - dis[t] / eff) * dt
+    return cha, dis, soc
+
+
+def merit_order_dispatch(df: pd.DataFrame, p: dict, tech: dict) -> dict:
+    """Heuristický dispečink jako hodnoty rodin proměnných (stejné názvy jako v modelu)."""
+    T     = len(df)
+    dt    = time_step(df['datetime'])
+    ee    = df['ee_price'].to_numpy(dtype=float)
+    gas   = df['gas_price'].to_numpy(dtype=float)
+    h_dem = df['Poptávka po teple (MW)'].to_numpy(dtype=float)
+    fve   = (df['FVE (MW)'].to_numpy(dtype=float)
+             if (tech['fve'] and 'FVE (MW)' in df.columns) else np.zeros(T))
+    boil_eff = p.get('boil_eff', 0.95)
+    ek_eff   = p.get('ek_eff',   0.98)
+    dist_sell_net, dist_buy_net = dist_net(p)
+
+    # Mezní náklady tepla alternativních zdrojů [€/MWh_th] a jejich kapacity, levnější první
+    sources = []
+    if tech['boil']:
+        gas_boil = _price(p, 'boil_gas_fix', 'boil_gas_fix_price', gas)
+        sources.append(('q_Boil', (gas_boil + p['gas_dist']) / boil_eff, p['b_max']))
+    if tech['ek']:
+        ee_ek = _price(p, 'ek_ee_fix', 'ek_ee_fix_price', ee)
+        sources.append(('q_EK', (ee_ek + dist_buy_net) / ek_eff, p['ek_max']))
+    if tech['ext_heat']:
+        sources.append(('q_Imp', np.full(T, float(p['imp_price'])), p['imp_max']))
+    shortfall_cost = np.full(T, p['h_price'] + p['shortfall_penalty'])
+    alt_cost = np.min([c for _, c, _ in sources] + [shortfall_cost], axis=0)
+
+    out  = {}
+    q_lo = q_hi = np.zeros(T)
+    if tech['kgj']:
+        k_min_th = p['k_min'] * p['k_th']
+        gas_kgj  = _price(p, 'kgj_gas_fix', 'kgj_gas_fix_price', gas)
+        kgj_cost = ((gas_kgj + p['gas_dist']) / p['k_eff_th']
+                    - p['k_eff_el'] / p['k_eff_th'] * (ee_sell_price(p, ee) - dist_sell_net))
+        q_cap   = np.minimum(h_dem, p['k_th'])
+        benefit = q_cap * (alt_cost - kgj_cost) * dt
+        # Chod po úsecích kroku rozhodování (`k_commit_step`, jinak po krocích dat)
+        grid  = commit_grid(df['datetime'], p.get('k_commit_step'))
+        block = np.cumsum(grid) - 1
+        step  = dt * T / max(int(grid.sum()), 1)
+        on = _commitment(np.bincount(block, benefit), np.minimum.reduceat(h_dem >= k_min_th, np.flatnonzero(grid)),
+                         p['k_start_cost'], steps(p['k_min_runtime'], step),
+                         steps(p.get('k_min_downtime', 1), step))[block]
+        # Na plný výkon (přebytek do TES), jen když je teplo z KGJ levnější než alternativa
+        q_lo = np.where(on, k_min_th, 0.0)
+        q_hi = np.where(on, np.where(kgj_cost < alt_cost, p['k_th'], np.clip(h_dem, k_min_th, p['k_th'])), 0.0)
+
+    if tech['tes']:
+        q_kg, tes_in, tes_out, tes_soc = _tes_rule(h_dem, q_lo, q_hi, p['tes_cap'], p['tes_loss'],
+                                                   p['tes_cap'] * 0.5, dt)
+        out.update(TES_SOC=tes_soc, TES_In=tes_in, TES_Out=tes_out)
+    else:
+        q_kg, _, tes_out, _ = _tes_rule(h_dem, q_lo, q_hi, 0.0, 0.0, 0.0)
+    if tech['kgj']:
+        prev = np.r_[False, on[:-1]]
+        out.update(q_KGJ=q_kg, on=on.astype(float), start=(on & ~prev).astype(float),
+                   stop=(~on & prev).astype(float))
+
+    # Zbytek poptávky podle merit orderu krok po kroku
+    rest  = np.maximum(h_dem - np.minimum(q_kg, h_dem) - tes_out, 0.0)
+    order = np.argsort(np.array([c for _, c, _ in sources]).reshape(len(sources), T), axis=0)
+    for name, _, _ in sources:
+        out[name] = np.zeros(T)
+    for rank in range(len(sources)):
+        for i, (name, _, cap) in enumerate(sources):
+            sel  = order[rank] == i
+            take = np.where(sel, np.minimum(rest, cap), 0.0)
+            out[name] += take
+            rest      -= take
+    out['shortfall'] = rest
+
+    ee_net = np.zeros(T)
+    if tech['bess']:
+        days = df['datetime'].dt.normalize().to_numpy()
+        cha, dis, bess_soc = _bess_rule(ee, days, p, dt)
+        out.update(BESS_SOC=bess_soc, BESS_Cha=cha, BESS_Dis=dis)
+        ee_net = dis - cha
+
+    ee_gen = fve + (p['k_eff_el'] / p['k_eff_th'] * q_kg if tech['kgj'] else 0.0)
+    net    = ee_gen + ee_net - out.get('q_EK', 0.0) / ek_eff
+    out['ee_export'] = np.maximum(net, 0.0)
+    out['ee_import'] = np.maximum(-net, 0.0)
+    return out
@@ -0,0 +1,408 @@
+"""Načítání vstupů (FWD křivka, lokální data) s cache podle obsahu souboru.
+
+Streamlit spouští skript znovu při každé změně widgetu; parsování souboru,
+převod časů a sloučení se ale opakují jen tehdy, když se změní obsah souboru,
+vybraný rok nebo cílové ceny. Cache je na úrovni procesu (sdílená mezi
+sezeními – klíčem je hash obsahu), v kompaktních dtypes a s LRU vyřazováním.
+Čtení vrací kopii, aby úpravy v app.py cache nepoškodily.
+
+Vstupy mohou být xlsx, CSV i Parquet (formát se pozná podle obsahu, viz
+`file_format`). Načítají se jen potřebné sloupce rovnou do float32 – xlsx
+v režimu read-only po řádcích, Parquet po sloupcích. Každá řada se seřadí,
+duplicitní časy se sloučí (platí první výskyt) a zjištěné mezery, duplicity
+a přechody letního času jsou v přehledu `input_report`.
+"""
+import copy
+import csv
+import hashlib
+import io
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+HEAT_COL = 'Poptávka po teple (MW)'
+FVE_COL  = 'FVE (MW)'
+# Sloupce lokálních dat, které výpočet používá (ostatní se nenačítají)
+LOCAL_COLS = (HEAT_COL, FVE_COL)
+FORMATS    = ('xlsx', 'csv', 'parquet')
+MAX_LISTED = 20   # kolik mezer / duplicit / nespárovaných časů přehled vypisuje jednotlivě
+
+
+class LRUCache:
+    """Jednoduchá LRU cache s limitem počtu položek a velikosti (DataFrame) v bajtech."""
+
+    def __init__(self, max_items: int = 32, max_bytes: int = 512 * 2**20):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._data     = OrderedDict()
+        self._sizes    = {}
+        self._lock     = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        value = factory()
+        size  = _nbytes(value)
+        with self._lock:
+            self._data[key]  = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            while len(self._data) > 1 and (len(self._data) > self.max_items
+                                           or sum(self._sizes.values()) > self.max_bytes):
+                old, _ = self._data.popitem(last=False)
+                del self._sizes[old]
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _nbytes(value) -> int:
+    """Velikost položky cache: DataFrame (i uvnitř n-tice), ostatní se nepočítá."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+_cache = LRUCache()
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def time_step(datetimes) -> float:
+    """Délka časového kroku v hodinách: medián rozdílů po sobě jdoucích časů
+    (1.0 hodinová, 0.25 čtvrthodinová data; přechody letního času medián nepohnou)."""
+    t = np.asarray(pd.to_datetime(datetimes), dtype='datetime64[ns]')
+    if len(t) < 2:
+        return 1.0
+    return float(np.median(np.diff(t)) / np.timedelta64(1, 'h'))
+
+
+def steps(hours: float, dt: float) -> int:
+    """Počet kroků délky `dt` [h] pokrývající `hours` hodin (aspoň 1) – min. doby běhu, přesahy oken."""
+    return max(int(np.ceil(hours / dt - 1e-9)), 1)
+
+
+def commit_grid(datetimes, step: float | None) -> np.ndarray:
+    """Kroky, ve kterých začíná nový úsek délky `step` [h] (True) – jen v nich smí KGJ
+    startovat a odstavovat. Bez `step` (nebo s krokem dat) jsou to všechny kroky."""
+    t = pd.Series(pd.to_datetime(datetimes))
+    if not step or step <= time_step(t) + 1e-9:
+        return np.ones(len(t), dtype=bool)
+    key = t.dt.floor(pd.Timedelta(hours=step)).to_numpy()
+    return np.r_[True, key[1:] != key[:-1]] if len(key) else np.ones(0, dtype=bool)
+
+
+def file_format(data: bytes) -> str:
+    """Formát vstupu podle obsahu: 'xlsx' (zip), 'parquet' (hlavička `PAR1`), jinak 'csv'."""
+    if data[:4] == b'PK\x03\x04':
+        return 'xlsx'
+    if data[:4] == b'PAR1':
+        return 'parquet'
+    return 'csv'
+
+
+def _xlsx_columns(data: bytes, pick) -> dict:
+    """Vybrané sloupce prvního listu; openpyxl read-only čte řádky postupně jen do posledního z nich."""
+    import openpyxl
+    wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True, keep_links=False)
+    try:
+        ws     = wb.worksheets[0]
+        header = [str(c).strip() for c in next(ws.iter_rows(max_row=1, values_only=True), ())]
+        idx    = pick(header)
+        rows   = ws.iter_rows(min_row=2, max_col=max(idx) + 1, values_only=True)
+        cols   = list(zip(*(tuple(r[i] for i in idx) for r in rows if r and r[idx[0]] is not None)))
+    finally:
+        wb.close()
+    return {header[i]: (cols[k] if cols else ()) for k, i in enumerate(idx)}
+
+
+def _csv_columns(data: bytes, pick) -> dict:
+    """Vybrané sloupce CSV; oddělovač `;` znamená desetinnou čárku (český Excel)."""
+    first  = data[:65536].decode('utf-8-sig', errors='replace').splitlines()[:1] or ['']
+    sep    = ';' if first[0].count(';') > first[0].count(',') else ','
+    header = [c.strip() for c in next(csv.reader(first, delimiter=sep))]
+    idx    = pick(header)
+    df     = pd.read_csv(io.BytesIO(data), sep=sep, decimal=',' if sep == ';' else '.', usecols=idx,
+                         encoding='utf-8-sig', skip_blank_lines=True)
+    return {header[i]: df.iloc[:, k].to_numpy() for k, i in enumerate(idx)}
+
+
+def _parquet_columns(data: bytes, pick) -> dict:
+    """Vybrané sloupce Parquetu – ostatní se ze souboru vůbec nečtou."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ValueError("Vstup v Parquetu vyžaduje balíček pyarrow (pip install pyarrow)") from e
+    f      = pq.ParquetFile(io.BytesIO(data))
+    names  = f.schema_arrow.names
+    header = [str(c).strip() for c in names]
+    idx    = pick(header)
+    table  = f.read(columns=[names[i] for i in idx])
+    return {header[i]: table.column(k).to_pandas().to_numpy() for k, i in enumerate(idx)}
+
+
+_READERS = {'xlsx': _xlsx_columns, 'csv': _csv_columns, 'parquet': _parquet_columns}
+
+
+def _to_datetime(values) -> pd.Series:
+    """Časy ze souboru; texty v ISO tvaru bez `dayfirst`, ostatní den.měsíc. Neplatné = NaT."""
+    t = pd.Series(values)
+    if t.dtype == object or pd.api.types.is_string_dtype(t):
+        head = t.dropna().astype(str).head(1)
+        iso  = not head.empty and re.match(r'\s*\d{4}-', head.iloc[0]) is not None
+        t    = pd.to_datetime(t, dayfirst=not iso, errors='coerce')
+    else:
+        t = pd.to_datetime(t, errors='coerce')
+    if getattr(t.dt, 'tz', None) is not None:   # Parquet s časovou zónou → místní čas bez zóny
+        t = t.dt.tz_localize(None)
+    return t
+
+
+def _dst_mask(t: np.ndarray, month: int) -> np.ndarray:
+    """Časy v hodině 2:00–3:00 poslední neděle měsíce `month` – přechod letního času v EU
+    (březen: hodina v místním čase chybí, říjen: opakuje se)."""
+    ts = pd.DatetimeIndex(t)
+    return (ts.month == month) & (ts.dayofweek == 6) & (ts.day > 24) & (ts.hour == 2)
+
+
+def _iso(t) -> str:
+    return pd.Timestamp(t).strftime('%Y-%m-%d %H:%M')
+
+
+def check_series(datetimes) -> dict:
+    """Kontrola časové řady: neseřazené časy, mezery a duplicity proti kroku dat (`time_step`),
+    u každé s příznakem `dst`, zda jde o přechod letního času. Vrací JSON-serializovatelný slovník."""
+    t    = np.asarray(pd.to_datetime(datetimes), dtype='datetime64[ns]')
+    srt  = np.sort(t, kind='stable')
+    dt   = time_step(srt)
+    step = np.timedelta64(int(round(dt * 3600e9)), 'ns')
+    diff = np.diff(srt)
+
+    # Mezery: první chybějící čas a počet chybějících kroků
+    at      = np.flatnonzero(diff > step)
+    miss    = (diff[at] / step).round().astype(np.int64) - 1
+    gap_t   = srt[at] + step
+    gap_dst = _dst_mask(gap_t, 3)
+
+    # Duplicity: každý další výskyt už uvedeného času
+    dup           = srt[1:][diff == np.timedelta64(0, 'ns')]
+    times, counts = np.unique(dup, return_counts=True)
+    times_dst     = _dst_mask(times, 10)
+    # Návrat na již uvedený čas (říjnový přechod) je duplicita, ne neseřazení
+    back = t[1:][np.diff(t) < np.timedelta64(0, 'ns')]
+    n    = MAX_LISTED
+    return {
+        'rows':           int(len(t)),
+        'step':           dt,
+        'start':          _iso(srt[0]) if len(srt) else None,
+        'end':            _iso(srt[-1]) if len(srt) else None,
+        'unsorted':       bool((~np.isin(back, times)).any()),
+        'gap_count':      int(len(at)),
+        'missing':        int(miss.sum()),
+        'missing_dst':    int(miss[gap_dst].sum()),
+        'duplicates':     int(len(dup)),
+        'duplicates_dst': int(_dst_mask(dup, 10).sum()),
+        'gaps':     [{'start': _iso(s), 'steps': int(k), 'dst': bool(d)}
+                     for s, k, d in zip(gap_t[:n], miss[:n], gap_dst[:n])],
+        'repeated': [{'time': _iso(s), 'count': int(c) + 1, 'dst': bool(d)}
+                     for s, c, d in zip(times[:n], counts[:n], times_dst[:n])],
+    }
+
+
+def _read_series(data: bytes, pick, names: list | None = None) -> tuple:
+    """Načte vybrané sloupce (`pick(header)` → indexy, první je čas) do DataFrame
+    s `datetime` a float32 sloupci, seřadí ho a sloučí duplicitní časy (platí první výskyt).
+    Vrací (DataFrame, přehled `check_series` + `invalid` = řádky bez platného času)."""
+    cols = _READERS[file_format(data)](data, pick)
+    keys = list(cols)
+    t    = _to_datetime(cols[keys[0]])
+    df   = pd.DataFrame({'datetime': t.to_numpy()})
+    for key, name in zip(keys[1:], names or keys[1:]):
+        df[name] = pd.to_numeric(pd.Series(cols[key]), errors='coerce').to_numpy(np.float32)
+    valid  = df['datetime'].notna().to_numpy()
+    df     = df[valid]
+    report = {**check_series(df['datetime']), 'invalid': int((~valid).sum())}
+    df = df.sort_values('datetime', kind='stable').drop_duplicates('datetime', keep='first')
+    return df.reset_index(drop=True), report
+
+
+def _fwd_columns(header: list) -> list:
+    if len(header) < 3:
+        raise ValueError(f"FWD křivka potřebuje 3 sloupce (datetime, cena EE, cena plynu), soubor má {len(header)}")
+    return [0, 1, 2]
+
+
+def _local_columns(header: list) -> list:
+    return [0] + [i for i, c in enumerate(header) if i and c in LOCAL_COLS]
+
+
+def _load_fwd(data: bytes) -> tuple:
+    def parse():
+        return _read_series(data, _fwd_columns, ['ee_original', 'gas_original'])
+    return _cache.get_or_create(('fwd', file_digest(data)), parse)
+
+
+def _load_local(data: bytes) -> tuple:
+    return _cache.get_or_create(('loc', file_digest(data)), lambda: _read_series(data, _local_columns))
+
+
+def load_fwd(data: bytes) -> pd.DataFrame:
+    """FWD křivka jako sloupce datetime, ee_original, gas_original (2. a 3. sloupec souboru)."""
+    return _load_fwd(data)[0].copy()
+
+
+def fwd_years(data: bytes) -> list:
+    return sorted(load_fwd(data)['datetime'].dt.year.unique().tolist())
+
+
+def fwd_year_averages(data: bytes, year: int) -> tuple:
+    """Průměrná cena EE a plynu ve vybraném roce."""
+    df = load_fwd(data)
+    df = df[df['datetime'].dt.year == year]
+    return float(df['ee_original'].mean()), float(df['gas_original'].mean())
+
+
+def shifted_fwd(data: bytes, year: int, ee_new: float, gas_new: float) -> pd.DataFrame:
+    """FWD vybraného roku posunutá na cílové base ceny (`ee_price`, `gas_price`)."""
+    def build():
+        df = load_fwd(data)
+        df = df[df['datetime'].dt.year == year].reset_index(drop=True)
+        avg_ee, avg_gas = fwd_year_averages(data, year)
+        df['ee_price']  = df['ee_original']  + np.float32(ee_new  - avg_ee)
+        df['gas_price'] = df['gas_original'] + np.float32(gas_new - avg_gas)
+        return df
+    key = ('fwd_year', file_digest(data), year, float(ee_new), float(gas_new))
+    return _cache.get_or_create(key, build).copy()
+
+
+def load_local(data: bytes) -> pd.DataFrame:
+    """Lokální data: 1. sloupec datetime a z dalších jen `LOCAL_COLS` (`Poptávka po teple (MW)`, `FVE (MW)`)."""
+    return _load_local(data)[0].copy()
+
+
+def local_for_year(data: bytes, year: int) -> pd.DataFrame:
+    """Lokální data pro rok `year`.
+
+    Pokud lokální data rok neobsahují, přenese se jejich převažující rok na
+    `year` (stejný měsíc, den a hodina) – jeden lokální profil tak jde použít
+    s každým rokem FWD křivky. 29. únor bez protějšku odpadne.
+    """
+    def build():
+        df    = load_local(data)
+        years = df['datetime'].dt.year
+        if (years == year).any():
+            return df
+        base = int(years.mode().iloc[0])
+        df   = df[years == base].copy()
+        df['datetime'] = df['datetime'] + pd.DateOffset(years=year - base)
+        return df.drop_duplicates('datetime').reset_index(drop=True)
+    return _cache.get_or_create(('loc_year', file_digest(data), year), build).copy()
+
+
+def align(fwd: pd.DataFrame, loc: pd.DataFrame) -> tuple:
+    """Sloučení FWD a lokálních dat (seřazených, bez duplicit) na `datetime` v jednom průchodu.
+
+    Každý čas jemnější řady se binárním vyhledáním přiřadí k poslednímu času
+    hrubší řady nejvýš o krok hrubší řady dřív (hodinová cena platí pro všechny
+    čtvrthodiny své hodiny); se stejným krokem se páruje jen stejný čas. Vrací
+    (sloučený DataFrame, přehled nespárovaných řádků obou řad).
+    """
+    t_fwd = fwd['datetime'].to_numpy('datetime64[ns]')
+    t_loc = loc['datetime'].to_numpy('datetime64[ns]')
+    step_fwd, step_loc = time_step(t_fwd), time_step(t_loc)
+    fine_is_loc = step_loc < step_fwd
+    t_fine, t_coarse = (t_loc, t_fwd) if fine_is_loc else (t_fwd, t_loc)
+    tol = (np.timedelta64(0, 'ns') if np.isclose(step_fwd, step_loc)
+           else np.timedelta64(int(round(max(step_fwd, step_loc) * 3600e9)) - 1, 'ns'))
+
+    k  = np.searchsorted(t_coarse, t_fine, side='right') - 1
+    ok = k >= 0
+    ok[ok] = t_fine[ok] - t_coarse[k[ok]] <= tol
+    fine_idx, coarse_idx = np.flatnonzero(ok), k[ok]
+    i_fwd, i_loc = (coarse_idx, fine_idx) if fine_is_loc else (fine_idx, coarse_idx)
+
+    # Časy jemnější řady, hodnoty obou řad podle spárovaných indexů
+    out = pd.DataFrame({'datetime': (loc if fine_is_loc else fwd)['datetime'].to_numpy()[fine_idx]})
+    for frame, idx in ((fwd, i_fwd), (loc, i_loc)):
+        for c in frame.columns.drop('datetime'):
+            out[c] = frame[c].to_numpy()[idx]
+
+    used_fwd, used_loc = np.zeros(len(t_fwd), dtype=bool), np.zeros(len(t_loc), dtype=bool)
+    used_fwd[i_fwd] = True
+    used_loc[i_loc] = True
+    only_fwd, only_loc = t_fwd[~used_fwd], t_loc[~used_loc]
+    unmatched = np.sort(np.r_[only_fwd, only_loc])
+    return out, {
+        'rows':          int(len(out)),
+        'fwd_only':      int(len(only_fwd)),
+        'local_only':    int(len(only_loc)),
+        'unmatched_dst': int((_dst_mask(unmatched, 3) | _dst_mask(unmatched, 10)).sum()),
+        'unmatched':     [_iso(t) for t in unmatched[:MAX_LISTED]],
+    }
+
+
+def _merged(fwd_data: bytes, year: int, ee_new: float, gas_new: float, loc_data: bytes) -> tuple:
+    def build():
+        df, merge = align(shifted_fwd(fwd_data, year, ee_new, gas_new), local_for_year(loc_data, year))
+        nan    = df.isna().sum()
+        report = {'fwd': _load_fwd(fwd_data)[1], 'local': _load_local(loc_data)[1],
+                  'merge': {**merge, 'filled': {c: int(n) for c, n in nan.items() if n}}}
+        return df.fillna(0), report
+    key = ('merged', file_digest(fwd_data), year, float(ee_new), float(gas_new), file_digest(loc_data))
+    return _cache.get_or_create(key, build)
+
+
+def merged_inputs(fwd_data: bytes, year: int, ee_new: float, gas_new: float,
+                  loc_data: bytes) -> pd.DataFrame:
+    """Posunutá FWD a lokální data (viz `local_for_year`) sloučená na `datetime` (`align`), chybějící hodnoty = 0."""
+    return _merged(fwd_data, year, ee_new, gas_new, loc_data)[0].copy()
+
+
+def input_report(fwd_data: bytes, year: int, ee_new: float, gas_new: float, loc_data: bytes) -> dict:
+    """Přehled ke stejnému zadání jako `merged_inputs`: {'fwd', 'local'} = `check_series` souborů
+    (+ `invalid`), 'merge' = nespárované řádky (`align`) a počty doplněných nul po sloupcích (`filled`)."""
+    return copy.deepcopy(_merged(fwd_data, year, ee_new, gas_new, loc_data)[1])
+
+
+def input_warnings(report: dict) -> list:
+    """Upozornění z `input_report` jako texty pro UI a logy (prázdný seznam = vstupy bez nálezů)."""
+    def dst(n):
+        return f", z toho na přechodu letního času: {n}" if n else ''
+
+    out = []
+    for key, label in (('fwd', "FWD křivka"), ('local', "Lokální data")):
+        r = report.get(key) or {}
+        if r.get('invalid'):
+            out.append(f"{label} – vynechané řádky bez platného času: {r['invalid']}")
+        if r.get('unsorted'):
+            out.append(f"{label} – časy nebyly seřazené (seřazeno)")
+        if r.get('missing'):
+            first = ', '.join(g['start'] for g in r['gaps'][:3])
+            out.append(f"{label} – chybějící kroky: {r['missing']} v mezerách: {r['gap_count']}"
+                       f"{dst(r['missing_dst'])} (první od {first})")
+        if r.get('duplicates'):
+            out.append(f"{label} – duplicitní časy: {r['duplicates']}{dst(r['duplicates_dst'])}; "
+                       f"použit první výskyt")
+    m = report.get('merge') or {}
+    if m.get('fwd_only') or m.get('local_only'):
+        out.append(f"Sloučení – vynechané řádky bez protějšku: FWD {m['fwd_only']}, "
+                   f"lokální data {m['local_only']}{dst(m.get('unmatched_dst'))}")
+    if m.get('filled'):
+        out.append("Sloučení – chybějící hodnoty nahrazené nulou: "
+                   + ', '.join(f"{c} {n}" for c, n in m['filled'].items()))
+    return out
@@ -0,0 +1,144 @@
+"""Fronta výpočtů na pozadí: omezený počet souběžných řešení sdílený všemi sezeními.
+
+Streamlit spouští skript v rámci požadavku – dlouhé řešení by blokovalo sezení
+a další kliknutí by ho zahodilo. Úloha (`Job`) proto běží ve vlákně poolu mimo
+běh skriptu a stránka si jen čte její stav. Fronta je jedna na proces
+(`job_queue`), takže souběh omezuje pro všechny uživatele serveru: najednou
+běží nejvýš `KGJ_JOB_WORKERS` úloh (výchozí polovina CPU, aspoň 1), další
+čekají. Průběh (uplynulý čas, nejlepší řešení, mez, mezera) hlásí solver přes
+`solver.watch`; zrušení ukončí běžící CBC, čekající úloha se vůbec nespustí.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .solver import SolveCancelled, watch
+
+JOB_TTL = 24 * 3600   # dokončené úlohy se zapomenou po této době [s]
+ACTIVE  = ('queued', 'running')
+
+
+@dataclass
+class Job:
+    id: str
+    owner: str                  # sezení, které úlohu zadalo
+    label: str
+    key: str | None = None      # klíč výsledku v `ResultStore` (pro zobrazení a odmítnutí duplicit)
+    status: str = 'queued'      # queued | running | done | failed | cancelled
+    created: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    progress: dict = field(default_factory=dict)   # poslední bod `diagnostics.cbc_progress` běžícího řešení
+    result: object = field(default=None, repr=False)
+    error: str | None = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE
+
+    @property
+    def elapsed(self) -> float:
+        """Doba běhu [s] (u čekající úlohy 0)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def _report(self, point: dict) -> None:
+        self.progress = point
+
+
+class JobQueue:
+    """Úlohy všech sezení a pool `workers` vláken, která je postupně spouští."""
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._pool   = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kgj-job')
+        self._jobs   = {}
+        self._lock   = threading.Lock()
+
+    def submit(self, owner: str, label: str, fn, *args, key: str | None = None, **kwargs) -> Job:
+        """Zařadí `fn(*args, **kwargs)`; stejný `key` téhož sezení, který ještě běží, se nezadá znovu."""
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if key is not None and job.key == key and job.owner == owner and job.active:
+                    return job
+            job = Job(id=uuid.uuid4().hex[:12], owner=owner, label=label, key=key)
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        with self._lock:
+            if job.status != 'queued':   # zrušena ještě ve frontě
+                return
+            job.status, job.started = 'running', time.time()
+        try:
+            with watch(progress=job._report, cancel=job.cancel_event):
+                job.result = fn(*args, **kwargs)
+            job.status = 'done'
+        except SolveCancelled:
+            job.status = 'cancelled'
+        except Exception as e:   # chyba patří úloze, pool běží dál
+            job.status, job.error = 'failed', f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+
+    def cancel(self, job_id: str) -> bool:
+        """Zruší čekající nebo běžící úlohu; False, pokud už skončila."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job.cancel_event.set()
+            if job.status == 'queued':
+                job.status, job.finished = 'cancelled', time.time()
+        return True
+
+    def forget(self, job_id: str) -> None:
+        """Odebere dokončenou úlohu ze seznamu (běžící je třeba nejdřív zrušit)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.active:
+                del self._jobs[job_id]
+
+    def jobs(self, owner: str | None = None) -> list:
+        """Úlohy sezení `owner` (bez něj všechny) od nejstarší."""
+        with self._lock:
+            out = [j for j in self._jobs.values() if owner is None or j.owner == owner]
+        return sorted(out, key=lambda j: j.created)
+
+    def position(self, job: Job) -> int:
+        """Pořadí čekající úlohy ve frontě (1 = spustí se jako další), jinak 0."""
+        if job.status != 'queued':
+            return 0
+        waiting = [j for j in self.jobs() if j.status == 'queued']
+        return next((i + 1 for i, j in enumerate(waiting) if j.id == job.id), 0)
+
+    def _prune(self) -> None:
+        now = time.time()
+        for job_id in [i for i, j in self._jobs.items()
+                       if not j.active and j.finished and now - j.finished > JOB_TTL]:
+            del self._jobs[job_id]
+
+
+_queue      = None
+_queue_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    env = os.environ.get('KGJ_JOB_WORKERS')
+    return max(int(env) if env else (os.cpu_count() or 1) // 2, 1)
+
+
+def job_queue() -> JobQueue:
+    """Fronta sdílená všemi sezeními v procesu (vytvoří se při prvním použití)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(default_workers())
+        return _queue
@@ -0,0 +1,105 @@
+"""Příjmy a náklady dispečinku po složkách – jediný zdroj pro účelovou funkci i reporty.
+
+Složka je rodina proměnných s jednotkovou cenou za časový krok [€/MWh × délka
+kroku v hodinách pro výkony v MW, € za start]; kladná cena = příjem, záporná
+= náklad. Účelová funkce modelu je součtem složek
+(`model.dispatch_objective`), hodinový zisk, měsíční souhrn i waterfall se
+počítají z hodinové tabulky složek (`hourly_ledger`) – všechna čísla se tak
+shodují s tím, co optimalizoval solver.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .inputs import time_step
+
+HEAT_REVENUE = 'Příjmy: teplo'
+
+
+@dataclass(frozen=True)
+class Stream:
+    label: str           # popisek složky (waterfall); více proměnných může sdílet jeden
+    var: str             # rodina proměnných modelu
+    price: np.ndarray    # jednotková cena po krocích (€ za MW a krok, € za start)
+
+
+def _price(p: dict, flag: str, key: str, market: np.ndarray) -> np.ndarray:
+    """Tržní cena, nebo fixní cena `p[key]`, pokud je fixace zvolena."""
+    if p.get(flag):
+        return np.full(len(market), float(p.get(key, 0.0)))
+    return market
+
+
+def ee_sell_price(p: dict, ee: np.ndarray) -> np.ndarray:
+    """Výkupní cena EE: tržní, nebo vážený mix fixní a tržní ceny."""
+    if p.get('ee_sell_fix'):
+        fix_ratio = p.get('ee_sell_fix_ratio', 0.0)
+        return fix_ratio * p.get('ee_sell_fix_price', 0.0) + (1 - fix_ratio) * ee
+    return ee
+
+
+def dist_net(p: dict) -> tuple:
+    """Distribuce (prodej, nákup) účtovaná v síťových tocích; při interní spotřebě EE nulová."""
+    if p['internal_ee_use']:
+        return 0.0, 0.0
+    return p['dist_ee_sell'], p['dist_ee_buy']
+
+
+def cost_streams(ee: np.ndarray, gas: np.ndarray, p: dict, tech: dict, dt: float = 1.0) -> list:
+    """Všechny složky příjmů a nákladů pro ceny `ee` a `gas` [€/MWh] v krocích délky `dt` [h].
+
+    Ceny energie se násobí `dt` (výkon v MW × krok = MWh), náklad startu ne.
+    """
+    T = len(ee)
+    dist_sell, dist_buy = dist_net(p)
+
+    def s(label, var, price, energy=True):
+        price = np.asarray(price, dtype=float) * (dt if energy else 1.0)
+        return Stream(label, var, np.broadcast_to(price, (T,)))
+
+    # Dodané teplo (výstup TES se počítá, vstup odečítá)
+    heat = [name for name, on in (('q_KGJ', tech['kgj']), ('q_Boil', tech['boil']), ('q_EK', tech['ek']),
+                                  ('q_Imp', tech['ext_heat']), ('TES_Out', tech['tes'])) if on]
+    streams = [s(HEAT_REVENUE, name, p['h_price']) for name in heat]
+    if tech['tes']:
+        streams.append(s(HEAT_REVENUE, 'TES_In', -p['h_price']))
+    streams.append(s('Příjmy: EE export', 'ee_export', ee_sell_price(p, ee) - dist_sell))
+
+    if tech['kgj']:
+        gas_kgj = _price(p, 'kgj_gas_fix', 'kgj_gas_fix_price', gas)
+        streams.append(s('Náklady: plyn KGJ', 'q_KGJ', -(gas_kgj + p['gas_dist']) / p['k_eff_th']))
+    if tech['boil']:
+        gas_boil = _price(p, 'boil_gas_fix', 'boil_gas_fix_price', gas)
+        streams.append(s('Náklady: plyn kotel', 'q_Boil', -(gas_boil + p['gas_dist']) / p.get('boil_eff', 0.95)))
+    streams.append(s('Náklady: import EE', 'ee_import', -(ee + dist_buy)))
+    if tech['ek']:
+        ee_ek = _price(p, 'ek_ee_fix', 'ek_ee_fix_price', ee)
+        streams.append(s('Náklady: EE elektrokotel', 'q_EK', -(ee_ek + dist_buy) / p.get('ek_eff', 0.98)))
+    if tech['ext_heat']:
+        streams.append(s('Náklady: import tepla', 'q_Imp', -p['imp_price']))
+    if tech['bess']:
+        streams.append(s('Náklady: BESS', 'BESS_Cha',
+                         -p['bess_cycle_cost'] - (p['dist_ee_buy'] if p.get('bess_dist_buy') else 0.0)))
+        streams.append(s('Náklady: BESS', 'BESS_Dis',
+                         -p['bess_cycle_cost'] - (p['dist_ee_sell'] if p.get('bess_dist_sell') else 0.0)))
+    if tech['kgj']:
+        streams.append(s('Náklady: starty KGJ', 'start', -p['k_start_cost'], energy=False))
+    streams.append(s('Penalizace shortfall', 'shortfall', -p['shortfall_penalty']))
+    return streams
+
+
+def hourly_ledger(df: pd.DataFrame, p: dict, tech: dict, var) -> pd.DataFrame:
+    """Příjmy (+) a náklady (−) v € po složkách za každý krok `df`; součet řádku = zisk kroku
+    (u hodinových dat hodinový zisk).
+
+    `var(name, n)` vrací hodnoty rodiny proměnných (viz `report.build_results`).
+    """
+    T    = len(df)
+    ee   = df['ee_price'].to_numpy(dtype=float)
+    gas  = df['gas_price'].to_numpy(dtype=float)
+    cols = {}
+    for st in cost_streams(ee, gas, p, tech, time_step(df['datetime'])):
+        amount = st.price * var(st.var, T)
+        cols[st.label] = cols[st.label] + amount if st.label in cols else amount
+    return pd.DataFrame(cols, index=df.index)
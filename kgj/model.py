@@ -0,0 +1,474 @@
+"""Sloupcová (maticová) podoba dispečerského modelu KGJ.
+
+Model se skládá po celých rodinách proměnných a omezení najednou – proměnné
+jsou pole mezí a koeficientů účelové funkce, omezení řídká matice v COO tvaru.
+Odpadá tak stavba stovek tisíc výrazů PuLP hodinu po hodině.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from .inputs import commit_grid, steps, time_step
+from .ledger import cost_streams
+
+INF = np.inf
+
+# Parametry, které mění jen účelovou funkci (ceny, tarify, penalizace) …
+PRICE_KEYS = frozenset({
+    'h_price', 'dist_ee_buy', 'dist_ee_sell', 'gas_dist', 'internal_ee_use', 'shortfall_penalty',
+    'ee_sell_fix', 'ee_sell_fix_ratio', 'ee_sell_fix_price', 'k_start_cost', 'kgj_gas_fix', 'kgj_gas_fix_price',
+    'boil_eff', 'boil_gas_fix', 'boil_gas_fix_price', 'ek_ee_fix', 'ek_ee_fix_price', 'imp_price',
+    'bess_cycle_cost', 'bess_dist_buy', 'bess_dist_sell', 'bess_ee_fix', 'bess_ee_fix_price',
+})
+# … a jen pravé strany omezení (viz `dispatch_rhs`)
+RHS_KEYS = frozenset({'h_cover'})
+
+# Dimenzovatelné kapacity akumulace: klíč `p` → technologie
+SIZING = {'tes_cap': 'tes', 'bess_cap': 'bess', 'bess_p': 'bess'}
+HOURS_PER_YEAR = 8760
+
+
+class LinearModel:
+    """Lineární / smíšeně celočíselný model (maximalizace) ve sloupcové podobě.
+
+    `vars` a `rows` mapují název rodiny na pole indexů sloupců, resp. řádků,
+    `dt` je délka časového kroku v hodinách.
+    """
+
+    def __init__(self, name: str, dt: float = 1.0):
+        self.name   = name
+        self.dt     = dt
+        self.vars   = {}
+        self.rows   = {}
+        self.n_cols = 0
+        self.n_rows = 0
+        self._lb, self._ub, self._int = [], [], []
+        self._obj_c, self._obj_v = [], []
+        self._ri, self._ci, self._av = [], [], []
+        self._sense, self._rhs = [], []
+        self._arrays = None
+        self._mps    = {}   # text MPS nezávislý na c a rhs (viz `write_mps`)
+
+    # ── Sestavení ─────────────────────────────────────
+    def add_var(self, name: str, n: int, lb=0.0, ub=INF, integer: bool = False) -> np.ndarray:
+        idx = np.arange(self.n_cols, self.n_cols + n)
+        self._lb.append(np.broadcast_to(np.asarray(lb, dtype=float), (n,)))
+        self._ub.append(np.broadcast_to(np.asarray(ub, dtype=float), (n,)))
+        self._int.append(np.full(n, integer, dtype=bool))
+        self.vars[name] = idx
+        self.n_cols    += n
+        self._arrays    = None
+        return idx
+
+    def add_obj(self, cols: np.ndarray, coef) -> None:
+        cols = np.asarray(cols)
+        self._obj_c.append(cols)
+        self._obj_v.append(np.broadcast_to(np.asarray(coef, dtype=float), cols.shape))
+        self._arrays = None
+
+    def set_obj(self, c: np.ndarray) -> None:
+        """Nahradí celou účelovou funkci vektorem `c` (délky n_cols); matice omezení zůstává."""
+        c = np.asarray(c, dtype=float)
+        self._obj_c, self._obj_v = [np.arange(self.n_cols)], [c]
+        if self._arrays is not None:
+            self._arrays = {**self._arrays, 'c': c}
+
+    def set_rhs(self, rows: np.ndarray, values) -> None:
+        """Nastaví pravé strany řádků `rows` (např. `rows['heat_demand']`); matice omezení zůstává."""
+        rhs = self.arrays()['rhs'].copy()
+        rhs[rows] = values
+        self._rhs    = [rhs]
+        self._arrays = {**self._arrays, 'rhs': rhs}
+
+    def fix(self, cols: np.ndarray, values) -> None:
+        """Zafixuje proměnné `cols` na `values` (lb = ub); ostatní meze a matice zůstávají."""
+        a  = self.arrays()
+        lb, ub = a['lb'].copy(), a['ub'].copy()
+        lb[cols] = ub[cols] = values
+        self._lb, self._ub = [lb], [ub]
+        self._arrays = {**a, 'lb': lb, 'ub': ub}
+
+    def add_constr(self, name: str, terms, sense: str, rhs) -> np.ndarray:
+        """Přidá blok řádků `Σ coef · x[cols] (sense) rhs`.
+
+        `terms` je seznam dvojic (pole sloupců, koeficient) – všechna pole mají
+        stejnou délku m (počet řádků bloku), koeficient může být skalár.
+        Sloupec −1 znamená, že člen v daném řádku chybí (viz `_lag`).
+        """
+        m = len(terms[0][0]) if terms else len(np.atleast_1d(rhs))
+        idx = np.arange(self.n_rows, self.n_rows + m)
+        for cols, coef in terms:
+            cols = np.asarray(cols)
+            coef = np.broadcast_to(np.asarray(coef, dtype=float), (m,))
+            keep = cols >= 0
+            self._ri.append(idx[keep])
+            self._ci.append(cols[keep])
+            self._av.append(coef[keep])
+        self._sense.append(np.full(m, sense))
+        self._rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), (m,)))
+        self.rows[name] = np.concatenate([self.rows[name], idx]) if name in self.rows else idx
+        self.n_rows    += m
+        self._arrays    = None
+        return idx
+
+    @classmethod
+    def stack(cls, name: str, blocks: list, weights=None) -> 'LinearModel':
+        """Nezávislé modely `blocks` vedle sebe v jednom modelu, účelová funkce bloku × váha.
+
+        Rodiny proměnných a omezení se spojí v pořadí bloků (`vars[name]` jsou
+        indexy všech bloků za sebou); `dt` se převezme z prvního bloku.
+        """
+        m = cls(name, blocks[0].dt if blocks else 1.0)
+        weights = np.ones(len(blocks)) if weights is None else np.asarray(weights, dtype=float)
+        for block, w in zip(blocks, weights):
+            a = block.arrays()
+            m._lb.append(a['lb'])
+            m._ub.append(a['ub'])
+            m._int.append(a['integer'])
+            m._obj_c.append(np.arange(block.n_cols) + m.n_cols)
+            m._obj_v.append(a['c'] * w)
+            m._ri.append(a['row'] + m.n_rows)
+            m._ci.append(a['col'] + m.n_cols)
+            m._av.append(a['val'])
+            m._sense.append(a['sense'])
+            m._rhs.append(a['rhs'])
+            for fam, src in (('vars', block.vars), ('rows', block.rows)):
+                own, off = getattr(m, fam), m.n_cols if fam == 'vars' else m.n_rows
+                for key, idx in src.items():
+                    own[key] = np.concatenate([own[key], idx + off]) if key in own else idx + off
+            m.n_cols += block.n_cols
+            m.n_rows += block.n_rows
+        return m
+
+    # ── Pole pro solver ───────────────────────────────
+    def arrays(self) -> dict:
+        """Vrátí model jako pole: lb, ub, c, integer, A (row, col, val), sense, rhs."""
+        if self._arrays is None:
+            def cat(parts, dtype):
+                return np.concatenate(parts).astype(dtype) if parts else np.empty(0, dtype)
+            c = np.zeros(self.n_cols)
+            if self._obj_c:
+                np.add.at(c, cat(self._obj_c, np.int64), cat(self._obj_v, float))
+            self._arrays = dict(
+                lb=cat(self._lb, float), ub=cat(self._ub, float), c=c,
+                integer=cat(self._int, bool),
+                row=cat(self._ri, np.int64), col=cat(self._ci, np.int64), val=cat(self._av, float),
+                sense=cat(self._sense, '<U1'), rhs=cat(self._rhs, float),
+            )
+        return self._arrays
+
+    def pack(self, values: dict) -> np.ndarray:
+        """Vektor x z hodnot po rodinách (opak `unpack`); chybějící rodiny = 0."""
+        x = np.zeros(self.n_cols)
+        for name, idx in self.vars.items():
+            v = values.get(name)
+            if v is not None and len(v) == len(idx):
+                x[idx] = v
+        return x
+
+    def unpack(self, x: np.ndarray) -> dict:
+        """Hodnoty po rodinách z vektoru x (opak `pack`) – jedno indexování pole na rodinu."""
+        return {name: x[idx] for name, idx in self.vars.items()}
+
+    def violation(self, x: np.ndarray) -> np.ndarray:
+        """Porušení jednotlivých řádků v bodě `x` (0 = splněno); meze proměnných se nekontrolují."""
+        a   = self.arrays()
+        lhs = np.zeros(self.n_rows)
+        np.add.at(lhs, a['row'], a['val'] * x[a['col']])
+        diff = lhs - a['rhs']
+        return np.select([a['sense'] == 'L', a['sense'] == 'G'], [diff, -diff], np.abs(diff)).clip(0)
+
+    def write_mps(self, path: str, relax: bool = False) -> None:
+        """Zapíše model do (volného) MPS jako minimalizaci −c; jména sloupců C<j>, řádků R<i>.
+
+        `relax=True` vynechá celočíselnost (LP relaxace). Text matice, mezí a řádků
+        se drží v modelu – po `set_obj` / `set_rhs` se formátuje jen účelová funkce
+        a pravé strany.
+        """
+        a = self.arrays()
+        head, tail, rows, bounds = self._mps_structure(a, relax)
+        with open(path, 'w') as f:
+            f.write(f"NAME {self.name}\nROWS\n N OBJ\n")
+            f.write(rows)
+            # Účelová funkce jako první člen každého sloupce – v COLUMNS tak nechybí žádný
+            f.write("COLUMNS\n")
+            f.write(''.join(f"{h} C{j} OBJ {v!r}\n{t}"
+                            for j, (h, v, t) in enumerate(zip(head, (-a['c']).tolist(), tail))))
+            f.write("RHS\n")
+            nz = np.flatnonzero(a['rhs'] != 0)
+            f.write(''.join(f" RHS R{i} {v!r}\n" for i, v in zip(nz.tolist(), a['rhs'][nz].tolist())))
+            f.write(bounds)
+            f.write("ENDATA\n")
+
+    def _mps_structure(self, a: dict, relax: bool) -> tuple:
+        """Části MPS nezávislé na c a rhs: (značka před sloupcem, členy matice sloupce, ROWS, BOUNDS).
+
+        Platí, dokud se nezmění matice a meze – kontroluje se identitou polí `arrays()`.
+        """
+        cached = self._mps.get(relax)
+        if cached is not None and cached[0] is a['col'] and cached[1] is a['lb']:
+            return cached[2]
+
+        keep  = a['val'] != 0
+        col, row, val = a['col'][keep], a['row'][keep], a['val'][keep]
+        order = np.argsort(col, kind='stable')
+        col, row, val = col[order], row[order].tolist(), val[order].tolist()
+        lines = [f" C{c} R{r} {v!r}\n" for c, r, v in zip(col.tolist(), row, val)]
+        cuts  = np.searchsorted(col, np.arange(self.n_cols + 1)).tolist()
+        tail  = [''.join(lines[cuts[j]:cuts[j + 1]]) for j in range(self.n_cols)]
+
+        # Úseky se stejnou celočíselností (rodiny jsou souvislé bloky sloupců) ohraničené značkami
+        integer = a['integer'] if not relax else np.zeros(self.n_cols, dtype=bool)
+        head    = [''] * self.n_cols
+        edges   = np.diff(np.r_[0, integer.astype(np.int8), 0])
+        for j in np.flatnonzero(edges == 1).tolist():
+            head[j] = " MARKER 'MARKER' 'INTORG'\n"
+        for j in np.flatnonzero(edges == -1).tolist():
+            tail[j - 1] += " MARKER 'MARKER' 'INTEND'\n"
+
+        rows  = ''.join(f" {s} R{i}\n" for i, s in enumerate(a['sense'].tolist()))
+        lines = ["BOUNDS\n"]
+        for j, (lb, ub, is_int) in enumerate(zip(a['lb'].tolist(), a['ub'].tolist(), integer.tolist())):
+            if lb == ub:
+                lines.append(f" FX BND C{j} {lb!r}\n")
+                continue
+            if lb == -INF:
+                lines.append(f" MI BND C{j}\n")
+            elif lb != 0:
+                lines.append(f" LO BND C{j} {lb!r}\n")
+            if ub != INF:
+                lines.append(f" UP BND C{j} {ub!r}\n")
+            elif is_int:
+                lines.append(f" PL BND C{j}\n")
+        parts = (head, tail, rows, ''.join(lines))
+        self._mps[relax] = (a['col'], a['lb'], parts)
+        return parts
+
+
+# ────────────────────────────────────────────────
+# Dispečerský model KGJ
+# ────────────────────────────────────────────────
+def _lag(cols: np.ndarray, k: int) -> np.ndarray:
+    """Sloupce posunuté o `k` kroků zpět; prvních `k` řádků člen nemá (−1)."""
+    return np.r_[np.full(k, -1), cols[:len(cols) - k]] if k else cols
+
+
+def build_dispatch_model(df: pd.DataFrame, p: dict, tech: dict, boundary: dict | None = None,
+                         sizing: dict | None = None) -> LinearModel:
+    """Sestaví model `KGJ_Dispatch` ze sloučených dat `df`, parametrů `p` a přepínačů technologií.
+
+    `tech` má klíče kgj, boil, ek, tes, bess, fve, ext_heat (odpovídají `use_*` v app.py).
+    Délka kroku `dt` se určí z `df['datetime']` (`inputs.time_step`): proměnné
+    jsou výkony [MW], energie kroku je výkon × `dt`; ztráta TES [podíl/h],
+    rampy [MW/h] a min. doby běhu / odstávky [h] se na krok přepočtou. S `p['k_commit_step']`
+    [h] delším než krok (např. 1 h u čtvrthodinových dat) smí KGJ startovat
+    a odstavovat jen na jeho hranicích – výkon se řídí po krocích, o chodu se
+    rozhoduje po hodinách (presolve binární proměnné uvnitř hodiny sloučí).
+    `boundary` volitelně nastavuje okrajové podmínky (pro řešení po oknech):
+    tes_soc0 / bess_soc0 – počáteční SOC, tes_soc_end / bess_soc_end – koncový SOC,
+    kgj_on0 – KGJ běžela v kroku před začátkem, kgj_q0 – její tepelný výkon,
+    kgj_must_run / kgj_must_off – kolik prvních kroků musí KGJ ještě běžet / stát
+    kvůli min. době běhu / odstávky, free_start – počáteční stav (SOC, chod KGJ)
+    je volný; okno je pak relaxací celoročního modelu (pro horní mez).
+    `sizing` dělá z kapacit akumulace proměnné (rodiny `size_<klíč>`, jeden sloupec):
+    {klíč `SIZING`: (min, max, anualizovaná investice [€/MWh, €/MW a rok])}. Investice
+    se v účelové funkci počítá poměrně k délce horizontu, počáteční SOC je podíl
+    zvolené kapacity a koncový SOC nesmí být nižší než počáteční (energie navíc
+    z větší nádrže by jinak byla zadarmo).
+    """
+    bc   = boundary or {}
+    free = bool(bc.get('free_start'))
+    T    = len(df)
+    dt   = time_step(df['datetime'])
+    m   = LinearModel("KGJ_Dispatch", dt)
+    ee  = df['ee_price'].to_numpy(dtype=float)
+    gas = df['gas_price'].to_numpy(dtype=float)
+
+    ek_eff = p.get('ek_eff', 0.98)
+
+    # ── Dimenzování: kapacita = proměnná mezi min a max ──
+    sz   = {k: v for k, v in (sizing or {}).items() if tech[SIZING[k]]}
+    size = {k: m.add_var(f'size_{k}', 1, lo, hi) for k, (lo, hi, _) in sz.items()}
+
+    def cap(key: str) -> float:
+        """Horní mez proměnných: pevná kapacita, u dimenzované její maximum."""
+        return sz[key][1] if key in sz else p[key]
+
+    def soc_init(name: str, soc: np.ndarray, key: str, share: float) -> None:
+        if key in size and f'{name}_soc0' not in bc:
+            m.add_constr(f'{name}_init', [(soc[:1], 1.0), (size[key], -share)], 'E', 0.0)
+        else:
+            m.add_constr(f'{name}_init', [(soc[:1], 1.0)], 'E', bc.get(f'{name}_soc0', p[key] * share))
+
+    def within(key: str, cols: np.ndarray) -> None:
+        """Proměnné `cols` nejvýš dimenzovaná kapacita `key` (řádky `<key>_size`)."""
+        if key in size:
+            m.add_constr(f'{key}_size', [(cols, 1.0), (np.repeat(size[key], len(cols)), -1.0)], 'L', 0.0)
+
+    def cycle(name: str, soc: np.ndarray, key: str) -> None:
+        if key in size:
+            m.add_constr(f'{name}_cycle', [(soc[-1:], 1.0), (soc[:1], -1.0)], 'G', 0.0)
+
+    # ── Proměnné ─────────────────────────────────────
+    if tech['kgj']:
+        q_kgj = m.add_var('q_KGJ', T, 0, p['k_th'])
+        on    = m.add_var('on',    T, 0, 1, integer=True)
+        grid  = commit_grid(df['datetime'], p.get('k_commit_step')).astype(float)
+        start = m.add_var('start', T, 0, grid, integer=True)
+        stop  = m.add_var('stop',  T, 0, grid)
+    q_boil = m.add_var('q_Boil', T, 0, p['b_max'])   if tech['boil']     else None
+    q_ek   = m.add_var('q_EK',   T, 0, p['ek_max'])  if tech['ek']       else None
+    q_imp  = m.add_var('q_Imp',  T, 0, p['imp_max']) if tech['ext_heat'] else None
+
+    if tech['tes']:
+        tes_soc = m.add_var('TES_SOC', T + 1, 0, cap('tes_cap'))
+        tes_in  = m.add_var('TES_In',  T)
+        tes_out = m.add_var('TES_Out', T)
+        if not free:
+            soc_init('tes', tes_soc, 'tes_cap', 0.5)
+        within('tes_cap', tes_soc)
+        cycle('tes', tes_soc, 'tes_cap')
+        if 'tes_soc_end' in bc:
+            m.add_constr('tes_end', [(tes_soc[-1:], 1.0)], 'E', bc['tes_soc_end'])
+
+    if tech['bess']:
+        bess_soc = m.add_var('BESS_SOC', T + 1, 0, cap('bess_cap'))
+        bess_cha = m.add_var('BESS_Cha', T, 0, cap('bess_p'))
+        bess_dis = m.add_var('BESS_Dis', T, 0, cap('bess_p'))
+        if not free:
+            soc_init('bess', bess_soc, 'bess_cap', 0.2)
+        within('bess_cap', bess_soc)
+        within('bess_p', bess_cha)
+        within('bess_p', bess_dis)
+        cycle('bess', bess_soc, 'bess_cap')
+        if 'bess_soc_end' in bc:
+            m.add_constr('bess_end', [(bess_soc[-1:], 1.0)], 'E', bc['bess_soc_end'])
+
+    ee_export      = m.add_var('ee_export', T)
+    ee_import      = m.add_var('ee_import', T)
+    heat_shortfall = m.add_var('shortfall', T)
+
+    # ── KGJ omezení ───────────────────────────────────
+    # Kompaktní formulace: přechod on/start/stop jedním řádkem za krok,
+    # min. doba běhu / odstávky jako součet startů / odstavení v okně.
+    if tech['kgj']:
+        k_min_th = p['k_min'] * p['k_th']
+        m.add_constr('kgj_max', [(q_kgj, 1.0), (on, -p['k_th'])], 'L', 0.0)
+        m.add_constr('kgj_min', [(q_kgj, 1.0), (on, -k_min_th)], 'G', 0.0)
+
+        on0  = 1.0 if bc.get('kgj_on0') else 0.0
+        rows = slice(1, None) if free else slice(None)
+        m.add_constr('kgj_transition', [(on[rows], 1.0), (_lag(on, 1)[rows], -1.0),
+                                        (start[rows], -1.0), (stop[rows], 1.0)],
+                     'E', np.r_[on0, np.zeros(T - 1)][rows])
+
+        min_up   = steps(p['k_min_runtime'], dt)
+        min_down = steps(p.get('k_min_downtime', 1), dt)
+        m.add_constr('kgj_min_up',   [(on, 1.0)] + [(_lag(start, k), -1.0) for k in range(min(min_up, T))],
+                     'G', 0.0)
+        m.add_constr('kgj_min_down', [(on, 1.0)] + [(_lag(stop, k), 1.0) for k in range(min(min_down, T))],
+                     'L', 1.0)
+        for key, state in (('kgj_must_run', 1.0), ('kgj_must_off', 0.0)):
+            n = min(int(bc.get(key, 0)), T)
+            if n > 0:
+                m.add_constr(key, [(on[:n], 1.0)], 'E', state)
+
+        # Rampy [MW_th/h] → změna za krok; start a odstavení smí přeskočit až na min. zatížení
+        ramp_up, ramp_down = (p.get('k_ramp_up') or 0.0) * dt, (p.get('k_ramp_down') or 0.0) * dt
+        q0 = bc.get('kgj_q0')
+        if ramp_up > 0:
+            rows = slice(None) if q0 is not None else slice(1, None)
+            m.add_constr('kgj_ramp_up', [(q_kgj[rows], 1.0), (_lag(q_kgj, 1)[rows], -1.0),
+                                         (_lag(on, 1)[rows], -ramp_up),
+                                         (start[rows], -max(ramp_up, k_min_th))],
+                         'L', np.r_[ramp_up * on0 + (q0 or 0.0), np.zeros(T - 1)][rows])
+        if ramp_down > 0:
+            rows = slice(None) if q0 is not None else slice(1, None)
+            m.add_constr('kgj_ramp_down', [(_lag(q_kgj, 1)[rows], 1.0), (q_kgj[rows], -1.0),
+                                           (on[rows], -ramp_down),
+                                           (stop[rows], -max(ramp_down, k_min_th))],
+                         'L', np.r_[-(q0 or 0.0), np.zeros(T - 1)][rows])
+
+    # ── Akumulace ─────────────────────────────────────
+    if tech['tes']:
+        m.add_constr('tes_balance', [(tes_soc[1:], 1.0), (tes_soc[:-1], -(1 - p['tes_loss']) ** dt),
+                                     (tes_in, -dt), (tes_out, dt)], 'E', 0.0)
+    if tech['bess']:
+        m.add_constr('bess_balance', [(bess_soc[1:], 1.0), (bess_soc[:-1], -1.0),
+                                      (bess_cha, -p['bess_eff'] * dt), (bess_dis, dt / p['bess_eff'])], 'E', 0.0)
+
+    # ── Bilance tepla ─────────────────────────────────
+    heat = [(v, 1.0) for v in (q_boil, q_ek, q_imp) if v is not None]
+    if tech['kgj']:
+        heat.append((q_kgj, 1.0))
+    if tech['tes']:
+        heat += [(tes_out, 1.0), (tes_in, -1.0)]
+    rhs = dispatch_rhs(df, p, tech)
+    m.add_constr('heat_demand', heat + [(heat_shortfall, 1.0)], 'G', rhs['heat_demand'])
+    m.add_constr('heat_max', heat or [(heat_shortfall, 0.0)], 'L', rhs['heat_max'])
+
+    # ── Bilance elektřiny ─────────────────────────────
+    ee_ratio = p['k_eff_el'] / p['k_eff_th'] if tech['kgj'] else 0.0
+    supply = [(ee_import, 1.0), (ee_export, -1.0)]
+    local  = []
+    if tech['kgj']:
+        local.append((q_kgj, ee_ratio))
+    if tech['bess']:
+        local.append((bess_dis, 1.0))
+        supply.append((bess_cha, -1.0))
+    if tech['ek']:
+        supply.append((q_ek, -1 / ek_eff))
+    m.add_constr('ee_balance', supply + local, 'E', rhs['ee_balance'])
+    # Export EE nesmí překročit lokální výrobu (zabraňuje arbitráži import→export)
+    m.add_constr('ee_export_max', [(ee_export, 1.0)] + [(v, -c) for v, c in local], 'L', rhs['ee_export_max'])
+
+    m.set_obj(dispatch_objective(m, ee, gas, p, tech))
+    # Investice do dimenzovaných kapacit poměrně k délce horizontu (mimo `ledger` – není to provoz)
+    for key, cols in size.items():
+        m.add_obj(cols, -sz[key][2] * T * dt / HOURS_PER_YEAR)
+    return m
+
+
+def dispatch_objective(m: LinearModel, ee: np.ndarray, gas: np.ndarray, p: dict, tech: dict) -> np.ndarray:
+    """Koeficienty účelové funkce (zisk) pro ceny `ee` a `gas` v krocích modelu – součet složek `ledger`.
+
+    Struktura modelu na cenách nezávisí – pro jiný cenový scénář stačí
+    přepočítat `c` a nastavit ho přes `LinearModel.set_obj`. Investici do
+    dimenzovaných kapacit (`sizing`) nezahrnuje.
+    """
+    c = np.zeros(m.n_cols)
+    for st in cost_streams(ee, gas, p, tech, m.dt):
+        c[m.vars[st.var]] += st.price
+    return c
+
+
+def dispatch_rhs(df: pd.DataFrame, p: dict, tech: dict) -> dict:
+    """Pravé strany bilančních řádků (rodina → hodnoty po krocích) – jediné místo, kde model
+    závisí na poptávce tepla, FVE a `RHS_KEYS`."""
+    h_dem = df['Poptávka po teple (MW)'].to_numpy(dtype=float)
+    fve   = (df['FVE (MW)'].to_numpy(dtype=float)
+             if (tech['fve'] and 'FVE (MW)' in df.columns) else np.zeros(len(df)))
+    return {'heat_demand': h_dem * p['h_cover'], 'heat_max': h_dem + 1e-3,
+            'ee_balance': -fve, 'ee_export_max': fve}
+
+
+def structure_key(df: pd.DataFrame, p: dict, tech: dict) -> str:
+    """Hash struktury celého modelu: technologie, parametry mimo `PRICE_KEYS` a `RHS_KEYS`
+    a časová osa dat. Modely se stejným klíčem se liší jen `c` a pravými stranami
+    (viz `update_dispatch_model`)."""
+    shape = {k: v for k, v in p.items() if k not in PRICE_KEYS and k not in RHS_KEYS}
+    h = hashlib.sha256(json.dumps({'p': shape, 'tech': tech}, sort_keys=True, default=str).encode())
+    h.update(np.ascontiguousarray(pd.to_datetime(df['datetime']).to_numpy(dtype='datetime64[ns]')).tobytes())
+    return h.hexdigest()[:32]
+
+
+def update_dispatch_model(m: LinearModel, df: pd.DataFrame, p: dict, tech: dict) -> LinearModel:
+    """Přenastaví model sestavený `build_dispatch_model` (se stejným `structure_key`)
+    na ceny, poptávku a FVE z `df` a parametry `p` – bez přestavby matice."""
+    for name, rhs in dispatch_rhs(df, p, tech).items():
+        m.set_rhs(m.rows[name], rhs)
+    m.set_obj(dispatch_objective(m, df['ee_price'].to_numpy(dtype=float),
+                                 df['gas_price'].to_numpy(dtype=float), p, tech))
+    return m
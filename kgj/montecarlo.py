@@ -0,0 +1,153 @@
+"""Monte Carlo: dispečink pro N náhodných cenových trajektorií odvozených z FWD křivky.
+
+Trajektorie zachovává průměrnou (base) cenu křivky a mění její tvar: křivka se
+rozloží na profil (průměr po měsících a hodinách dne) a denní rezidua; ta se
+buď převzorkují po celých dnech v rámci měsíce ('bootstrap', EE i plyn ze
+stejného dne – korelace zůstane), nebo vynásobí náhodným denním faktorem
+volatility ('scaled'). Každá trajektorie je určená semínkem, takže workery
+generují ceny samy a z procesu se vrací jen souhrn a vektor chodu KGJ (bit na
+časový krok) – paměť nezávisí na počtu trajektorií.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .model import LinearModel, build_dispatch_model, dispatch_objective
+from .solver import solve
+
+METHODS = ('bootstrap', 'scaled')
+
+# Sdílený model a rozklad cen v procesu workeru (nastaví `_init_worker`)
+_shared = {}
+
+
+@dataclass
+class PriceShape:
+    """Rozklad cenové křivky: profil + rezidua, s indexy dnů pro převzorkování."""
+    profile: np.ndarray     # (2, T) profil EE a plynu
+    resid: np.ndarray       # (2, T) rezidua
+    mean: np.ndarray        # (2,) průměrné ceny, které trajektorie zachovávají
+    day_of: np.ndarray      # den (pořadí) každého řádku
+    days: list              # řádky dne jako (začátek, konec)
+    donors: list            # pro každý den kandidáti na převzorkování (stejný měsíc, stejná délka)
+
+
+def price_shape(df: pd.DataFrame) -> PriceShape:
+    """Rozklad cen `ee_price` / `gas_price` na profil měsíc × hodina dne a rezidua."""
+    dt     = pd.to_datetime(df['datetime'])
+    prices = np.vstack([df['ee_price'].to_numpy(dtype=float), df['gas_price'].to_numpy(dtype=float)])
+    keys   = [dt.dt.month.to_numpy(), dt.dt.hour.to_numpy()]
+    profile = np.vstack([pd.Series(row).groupby(keys).transform('mean').to_numpy() for row in prices])
+
+    day_key = dt.dt.normalize().to_numpy()
+    starts  = np.flatnonzero(np.r_[True, day_key[1:] != day_key[:-1]])
+    ends    = np.r_[starts[1:], len(df)]
+    keys    = list(zip(dt.dt.month.to_numpy()[starts].tolist(), (ends - starts).tolist()))
+    groups  = {}
+    for i, k in enumerate(keys):
+        groups.setdefault(k, []).append(i)
+    donors  = [np.array(groups[k]) for k in keys]
+    return PriceShape(profile=profile, resid=prices - profile, mean=prices.mean(axis=1),
+                      day_of=np.repeat(np.arange(len(starts)), ends - starts),
+                      days=list(zip(starts.tolist(), ends.tolist())), donors=donors)
+
+
+def price_path(shape: PriceShape, seed: int, method: str = 'bootstrap', vol: float = 0.3) -> np.ndarray:
+    """Jedna trajektorie (2, T): EE a plyn se stejnými průměry jako výchozí křivka."""
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        resid = np.empty_like(shape.resid)
+        for (a, b), cand in zip(shape.days, shape.donors):
+            da, db = shape.days[cand[rng.integers(len(cand))]]
+            resid[:, a:b] = shape.resid[:, da:db]
+    elif method == 'scaled':
+        # Lognormální faktor se střední hodnotou 1 pro každý den (společný EE i plynu)
+        factor = np.exp(vol * rng.standard_normal(len(shape.days)) - vol ** 2 / 2)
+        resid  = shape.resid * factor[shape.day_of]
+    else:
+        raise ValueError(f"Neznámá metoda trajektorií: {method!r} (povolené: {', '.join(METHODS)})")
+    path = shape.profile + resid
+    return path - path.mean(axis=1, keepdims=True) + shape.mean[:, None]
+
+
+def _init_worker(model: LinearModel, shape: PriceShape, p: dict, tech: dict, method: str, vol: float,
+                 time_limit: float, options: dict | None) -> None:
+    _shared.update(model=model, shape=shape, p=p, tech=tech, method=method, vol=vol,
+                   time_limit=time_limit, options=options)
+
+
+def _solve_path(seed: int) -> tuple:
+    s, m = _shared, _shared['model']
+    t0   = time.perf_counter()
+    ee, gas = price_path(s['shape'], seed, s['method'], s['vol'])
+    m.set_obj(dispatch_objective(m, ee, gas, s['p'], s['tech']))
+    sol  = solve(m, time_limit=s['time_limit'], options=s['options'])
+    on   = (sol.x[m.vars['on']] > 0.5) if 'on' in m.vars else np.zeros(len(ee), dtype=bool)
+    return {
+        'seed':      seed,
+        'status':    sol.status,
+        'profit':    sol.objective,
+        'kgj_hours': int(round(on.sum() * m.dt)),
+        'ee_std':    float(ee.std()),
+        'gas_std':   float(gas.std()),
+        'seconds':   time.perf_counter() - t0,
+    }, np.packbits(on)
+
+
+@dataclass
+class MonteCarloResult:
+    paths: pd.DataFrame                      # řádek na trajektorii (zisk, hodiny KGJ, směrodatné odchylky cen)
+    run_share: np.ndarray = field(repr=False)  # podíl trajektorií, ve kterých KGJ v kroku běží
+
+    def percentiles(self, q=(10, 50, 90)) -> dict:
+        """Percentily zisku přes vyřešené trajektorie, např. {'P10': …, 'P50': …, 'P90': …}."""
+        profit = self.paths.loc[self.paths['status'] == 1, 'profit']
+        if profit.empty:
+            return {f"P{k}": None for k in q}
+        return {f"P{k}": float(np.percentile(profit, k)) for k in q}
+
+
+def monte_carlo(df: pd.DataFrame, p: dict, tech: dict, n_paths: int = 100, method: str = 'bootstrap',
+                vol: float = 0.3, seed: int = 0, workers: int | None = None, time_limit: float = 300,
+                options: dict | None = None, progress=None) -> MonteCarloResult:
+    """Vyřeší `n_paths` cenových trajektorií souběžně v `ProcessPoolExecutor`.
+
+    Trajektorie `i` má semínko `seed + i` (opakovatelné). Model se sestaví
+    jednou a do workeru se pošle při inicializaci; rozpracovaných trajektorií
+    je nejvýš dvojnásobek workerů a výsledky se slučují průběžně (četnost
+    chodu KGJ jako součet) – paměť nezávisí na `n_paths`. `progress(done,
+    total)` se volá po každé dokončené trajektorii.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Neznámá metoda trajektorií: {method!r} (povolené: {', '.join(METHODS)})")
+    T     = len(df)
+    shape = price_shape(df)
+    m     = build_dispatch_model(df, p, tech)
+    m.arrays()                                   # matice se sestaví jednou, před rozesláním
+
+    rows, on_count = [], np.zeros(T, dtype=np.int64)
+    in_flight = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(m, shape, p, tech, method, vol, time_limit, options)) as pool:
+        # Rozpracovaných je nejvýš `in_flight` trajektorií; další se zadá až po dokončení některé
+        pending, submitted = set(), 0
+        while pending or submitted < n_paths:
+            while submitted < n_paths and len(pending) < in_flight:
+                pending.add(pool.submit(_solve_path, seed + submitted))
+                submitted += 1
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                row, on_bits = fut.result()
+                rows.append(row)
+                if row['status'] == 1:
+                    on_count += np.unpackbits(on_bits, count=T)
+                if progress is not None:
+                    progress(len(rows), n_paths)
+
+    paths  = pd.DataFrame(rows).sort_values('seed', ignore_index=True)
+    solved = int((paths['status'] == 1).sum())
+    return MonteCarloResult(paths=paths, run_share=on_count / max(solved, 1))
@@ -0,0 +1,176 @@
+"""Typované zadání výpočtu – parametry `p`, přepínače technologií a nastavení řešení.
+
+Výchozí hodnoty odpovídají výchozím hodnotám widgetů v app.py. Model a reporty
+pracují se slovníkem `p` (jako dosud), `Params.to_dict()` ho sestaví stejně
+jako UI – klíče vypnutých technologií vynechá a dopočte `k_el`.
+"""
+from dataclasses import asdict, dataclass, fields
+
+TECH_KEYS = ('kgj', 'boil', 'ek', 'tes', 'bess', 'fve', 'ext_heat')
+
+
+@dataclass
+class Tech:
+    """Technologie na lokalitě (`use_*` v app.py)."""
+    kgj:      bool = True
+    boil:     bool = True
+    ek:       bool = True
+    tes:      bool = True
+    bess:     bool = True
+    fve:      bool = True
+    ext_heat: bool = True
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'Tech':
+        return cls(**{k: bool(v) for k, v in d.items() if k in TECH_KEYS})
+
+
+@dataclass
+class Params:
+    # ── Obecné ──
+    dist_ee_buy:       float = 33.0
+    dist_ee_sell:      float = 2.0
+    gas_dist:          float = 5.0
+    internal_ee_use:   bool  = True
+    h_price:           float = 120.0
+    h_cover:           float = 0.99
+    shortfall_penalty: float = 500.0
+    ee_sell_fix:       bool  = False
+    ee_sell_fix_ratio: float = 0.8
+    ee_sell_fix_price: float | None = None     # None = průměr EE z FWD
+    # ── KGJ ──
+    k_th:              float = 1.09
+    k_eff_th:          float = 0.46
+    k_eff_el:          float = 0.40
+    k_min:             float = 0.55
+    k_start_cost:      float = 1200.0
+    k_min_runtime:     int   = 4
+    k_min_downtime:    int   = 1
+    k_ramp_up:         float = 0.0
+    k_ramp_down:       float = 0.0
+    kgj_gas_fix:       bool  = False
+    kgj_gas_fix_price: float | None = None
+    k_commit_step:     float | None = None      # krok rozhodování o chodu [h]; None = krok dat
+    # ── Plynový kotel ──
+    b_max:              float = 3.91
+    boil_eff:           float = 0.95
+    boil_gas_fix:       bool  = False
+    boil_gas_fix_price: float | None = None
+    # ── Elektrokotel ──
+    ek_max:          float = 0.61
+    ek_eff:          float = 0.98
+    ek_ee_fix:       bool  = False
+    ek_ee_fix_price: float | None = None
+    # ── TES ──
+    tes_cap:  float = 10.0
+    tes_loss: float = 0.005     # podíl za hodinu (UI zadává v %/h)
+    # ── BESS ──
+    bess_cap:          float = 1.0
+    bess_p:            float = 0.5
+    bess_eff:          float = 0.90
+    bess_cycle_cost:   float = 5.0
+    bess_dist_buy:     bool  = False
+    bess_dist_sell:    bool  = False
+    bess_ee_fix:       bool  = False
+    bess_ee_fix_price: float | None = None
+    # ── FVE ──
+    fve_installed_p: float = 1.0
+    # ── Nákup tepla ──
+    imp_max:   float = 2.0
+    imp_price: float = 150.0
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'Params':
+        """Z (i neúplného) slovníku; neznámé klíče (např. odvozené `k_el`) ignoruje."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in names})
+
+    def to_dict(self, tech: Tech, avg_ee: float = 0.0, avg_gas: float = 0.0) -> dict:
+        """Slovník `p` ve tvaru, jaký sestavuje UI; chybějící fixní ceny = průměry FWD."""
+        def fix(flag: str, key: str, avg: float) -> dict:
+            if not getattr(self, flag):
+                return {flag: False}
+            price = getattr(self, key)
+            return {flag: True, key: avg if price is None else price}
+
+        p = {k: getattr(self, k) for k in ('dist_ee_buy', 'dist_ee_sell', 'gas_dist', 'internal_ee_use',
+                                           'h_price', 'h_cover', 'shortfall_penalty', 'ee_sell_fix')}
+        if self.ee_sell_fix:
+            p['ee_sell_fix_ratio'] = self.ee_sell_fix_ratio
+            p['ee_sell_fix_price'] = avg_ee if self.ee_sell_fix_price is None else self.ee_sell_fix_price
+        else:
+            p['ee_sell_fix_ratio'] = 0.0
+            p['ee_sell_fix_price'] = 0.0
+        if tech.kgj:
+            p.update({k: getattr(self, k) for k in ('k_th', 'k_eff_th', 'k_eff_el', 'k_min', 'k_start_cost',
+                                                    'k_min_runtime', 'k_min_downtime',
+                                                    'k_ramp_up', 'k_ramp_down')})
+            p['k_el'] = self.k_th * (self.k_eff_el / self.k_eff_th)
+            if self.k_commit_step is not None:
+                p['k_commit_step'] = self.k_commit_step
+            p.update(fix('kgj_gas_fix', 'kgj_gas_fix_price', avg_gas))
+        if tech.boil:
+            p.update(b_max=self.b_max, boil_eff=self.boil_eff)
+            p.update(fix('boil_gas_fix', 'boil_gas_fix_price', avg_gas))
+        if tech.ek:
+            p.update(ek_max=self.ek_max, ek_eff=self.ek_eff)
+            p.update(fix('ek_ee_fix', 'ek_ee_fix_price', avg_ee))
+        if tech.tes:
+            p.update(tes_cap=self.tes_cap, tes_loss=self.tes_loss)
+        if tech.bess:
+            p.update({k: getattr(self, k) for k in ('bess_cap', 'bess_p', 'bess_eff', 'bess_cycle_cost',
+                                                    'bess_dist_buy', 'bess_dist_sell')})
+            p.update(fix('bess_ee_fix', 'bess_ee_fix_price', avg_ee))
+        if tech.fve:
+            p['fve_installed_p'] = self.fve_installed_p
+        if tech.ext_heat:
+            p.update(imp_max=self.imp_max, imp_price=self.imp_price)
+        return p
+
+
+@dataclass
+class SolveSettings:
+    """Režim řešení: 'full' (jedna MIP), 'rolling' (okna postupně), 'parallel' (nezávislá okna),
+    'screening' (heuristika + horní mez z LP relaxace po oknech `period`),
+    'representative' (odhad z `rep_days` reprezentativních dní),
+    'sizing' (jedna MIP s kapacitami akumulace jako proměnnými podle `sizing`).
+
+    `warm_start`: 'none', 'heuristic' (merit order) nebo 'previous' (nejpodobnější
+    uložený běh, jinak heuristika). V režimu 'full' má přednost řešení předchozího
+    běhu se stejnou strukturou modelu v tomtéž procesu (viz `model.structure_key`),
+    je-li pro nové pravé strany přípustné.
+
+    Solver: `backend` 'cbc' nebo 'highs', `threads` vláken branch-and-bound,
+    `gap_rel` / `gap_abs` přípustná relativní / absolutní mezera MIP (None =
+    výchozí solveru), `presolve`.
+
+    `sizing`: {'tes_cap' | 'bess_cap' | 'bess_p': [min, max, anualizovaná investice
+    €/MWh nebo €/MW a rok]} pro režim 'sizing'; kapacity mimo slovník zůstávají pevné.
+
+    `shadow_prices`: po řešení spočte mezní ceny tepla a EE po krocích (LP s pevným
+    chodem KGJ, viz `shadow`); v režimech 'screening' a 'representative' se nepočítají.
+    """
+    mode:       str          = 'full'
+    period:     str          = 'M'
+    overlap:    int          = 24
+    reference:  bool         = False
+    time_limit: float        = 300
+    warm_start: str          = 'heuristic'
+    backend:    str          = 'cbc'
+    threads:    int          = 1
+    gap_rel:    float | None = None
+    gap_abs:    float | None = None
+    presolve:   bool         = True
+    rep_days:   int          = 12
+    shadow_prices: bool      = True
+    sizing:     dict | None  = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def solver_options(self) -> dict:
+        """Nastavení solveru pro `solver.solve(options=…)`."""
+        return {k: getattr(self, k) for k in ('backend', 'threads', 'gap_rel', 'gap_abs', 'presolve')}
@@ -0,0 +1,70 @@
+"""Časové řady pro grafy dispečinku s omezeným počtem bodů.
+
+Dlouhé horizonty (celý rok, čtvrthodinová data) se před odesláním do
+prohlížeče prořeží po úsecích tak, aby v každém úseku zůstalo minimum
+i maximum každé řady – špičky a propady zůstanou viditelné, počet bodů
+na stopu je shora omezený bez ohledu na délku horizontu. Nad prahem bodů
+se kreslí WebGL stopy (`Scattergl`); ty neumí `stackgroup`, takže
+skládané plochy se sčítají předem a plní se `tonexty`.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+MAX_POINTS = 4000   # strop bodů na stopu jednoho grafu
+WEBGL_FROM = 1500   # od tolika bodů na stopu se kreslí WebGL
+
+
+def minmax_indices(ys: np.ndarray, buckets: int) -> np.ndarray:
+    """Indexy řádků, které v každém z `buckets` úseků drží minimum a maximum některé řady.
+
+    `ys` má tvar (řady, body); výsledek je společný pro všechny řady (skládané
+    plochy musí mít stejné x), seřazený, vždy s prvním a posledním bodem.
+    """
+    k, T = ys.shape
+    w    = -(-T // buckets)
+    nb   = -(-T // w)
+    vals = np.pad(np.nan_to_num(ys), ((0, 0), (0, nb * w - T)), mode='edge').reshape(k, nb, w)
+    base = np.arange(nb) * w
+    idx  = np.concatenate([(vals.argmin(axis=2) + base).ravel(), (vals.argmax(axis=2) + base).ravel(), [0, T - 1]])
+    return np.unique(np.minimum(idx, T - 1))
+
+
+def downsample(frame: pd.DataFrame, cols: list, max_points: int = MAX_POINTS) -> pd.DataFrame:
+    """Řádky `frame` prořezané min/max po úsecích tak, aby jich bylo nejvýš `max_points`.
+
+    Krátké řady se vrací beze změny (plné rozlišení).
+    """
+    if len(frame) <= max_points:
+        return frame
+    ys = frame[cols].to_numpy(dtype=float).T
+    return frame.iloc[minmax_indices(ys, max(1, (max_points - 2) // (2 * len(cols))))]
+
+
+def use_webgl(frame: pd.DataFrame) -> bool:
+    return len(frame) >= WEBGL_FROM
+
+
+def line(frame: pd.DataFrame, x: str, y: str, gl: bool, **kw):
+    """Čárová stopa (SVG nebo WebGL)."""
+    return (go.Scattergl if gl else go.Scatter)(x=frame[x], y=frame[y], **kw)
+
+
+def stacked(frame: pd.DataFrame, x: str, specs: list, group: str, gl: bool, **kw) -> list:
+    """Skládané plochy ze sloupců `specs` = [(sloupec, název, barva), …].
+
+    SVG používá `stackgroup`; WebGL dostane kumulativní součty s výplní
+    `tonexty` a v popisku původní hodnotu.
+    """
+    if not gl:
+        return [go.Scatter(x=frame[x], y=frame[col], name=name, stackgroup=group, fillcolor=color, **kw)
+                for col, name, color in specs]
+    traces, level = [], np.zeros(len(frame))
+    for i, (col, name, color) in enumerate(specs):
+        own    = frame[col].to_numpy(dtype=float)
+        level  = level + own
+        traces.append(go.Scattergl(
+            x=frame[x], y=level, customdata=own, name=name, mode='lines',
+            fill='tozeroy' if i == 0 else 'tonexty', fillcolor=color, line_color=color,
+            hovertemplate='%{customdata:.2f}', **kw))
+    return traces
@@ -0,0 +1,237 @@
+"""Výsledková tabulka, hodinový zisk, metriky a export (Excel, CSV, Parquet) z hodnot proměnných.
+
+`var(name, n, fill=0.0)` je `Solution.var` nebo `StoredRun.var` – vrací hodnoty
+rodiny proměnných, pro vypnutou technologii (chybějící rodinu) pole `fill`.
+"""
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from .inputs import time_step
+from .ledger import hourly_ledger
+
+MONTH_NAMES = {1: 'Led', 2: 'Úno', 3: 'Bře', 4: 'Dub', 5: 'Kvě', 6: 'Čvn',
+               7: 'Čvc', 8: 'Srp', 9: 'Zář', 10: 'Říj', 11: 'Lis', 12: 'Pro'}
+# Názvy souborů listů v CSV / Parquet archivu
+SHEET_FILES = {'Hodinová data': 'hodinova_data', 'Měsíční souhrn': 'mesicni_souhrn', 'Parametry': 'parametry'}
+# Rodina mezních cen (`shadow.SHADOW_FAMILIES`) → sloupec `res`
+SHADOW_COLUMNS = {'mc_heat': 'Mezní cena tepla [€/MWh]', 'mc_ee': 'Mezní cena EE [€/MWh]'}
+
+
+def build_results(df: pd.DataFrame, p: dict, tech: dict, var, ledger: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Tabulka výsledků `res` po krocích `df` včetně zisku kroku a kumulativního zisku.
+
+    Výkony jsou v MW (energie kroku = výkon × délka kroku), „Hodinový zisk“ je
+    zisk kroku – u hodinových dat hodinový. `ledger` je tabulka složek
+    (`ledger.hourly_ledger`), pokud ji volající už má.
+    """
+    T = len(df)
+    use_kgj, use_ek, use_fve = tech['kgj'], tech['ek'], tech['fve']
+
+    # Každý sloupec je jedno pole rodiny proměnných (SOC bez počátečního stavu)
+    q_kgj, q_ek = var('q_KGJ', T), var('q_EK', T)
+    fve    = (df['FVE (MW)'].to_numpy(dtype=float)
+              if (use_fve and 'FVE (MW)' in df.columns) else np.zeros(T))
+    ek_eff = p.get('ek_eff', 0.98)
+
+    res = pd.DataFrame({
+        'Čas':                    df['datetime'],
+        'Poptávka tepla [MW]':    df['Poptávka po teple (MW)'],
+        'KGJ [MW_th]':            q_kgj,
+        'Kotel [MW_th]':          var('q_Boil', T),
+        'Elektrokotel [MW_th]':   q_ek,
+        'Import tepla [MW_th]':   var('q_Imp', T),
+        'TES příjem [MW_th]':     var('TES_In', T),
+        'TES výdej [MW_th]':      var('TES_Out', T),
+        'TES SOC [MWh]':          var('TES_SOC', T + 1)[1:],
+        'BESS nabíjení [MW]':     var('BESS_Cha', T),
+        'BESS vybíjení [MW]':     var('BESS_Dis', T),
+        'BESS SOC [MWh]':         var('BESS_SOC', T + 1)[1:],
+        'Shortfall [MW]':         var('shortfall', T),
+        'EE export [MW]':         var('ee_export', T),
+        'EE import [MW]':         var('ee_import', T),
+        'EE z KGJ [MW]':          q_kgj * (p['k_eff_el'] / p['k_eff_th']) if use_kgj else np.zeros(T),
+        'EE z FVE [MW]':          fve,
+        'EE do EK [MW]':          q_ek / ek_eff if use_ek else np.zeros(T),
+        'Cena EE [€/MWh]':       df['ee_price'].to_numpy(),
+        'Cena plyn [€/MWh]':     df['gas_price'].to_numpy(),
+    }, index=df.index)
+    res['TES netto [MW_th]'] = res['TES výdej [MW_th]'] - res['TES příjem [MW_th]']
+    res['Dodáno tepla [MW]'] = (
+        res['KGJ [MW_th]'] + res['Kotel [MW_th]'] + res['Elektrokotel [MW_th]']
+        + res['Import tepla [MW_th]'] + res['TES netto [MW_th]']
+    )
+    # Mezní ceny (duály LP s pevným chodem KGJ, viz `shadow`) – jen pokud je běh má
+    for name, col in SHADOW_COLUMNS.items():
+        v = var(name, T, np.nan)
+        if not np.isnan(v).all():
+            res[col] = v
+    res['Měsíc'] = pd.to_datetime(res['Čas']).dt.month
+    res['Hodina dne'] = pd.to_datetime(res['Čas']).dt.hour
+
+    # ── Hodinový zisk – součet složek příjmů a nákladů (stejných jako v účelové funkci) ──
+    if ledger is None:
+        ledger = hourly_ledger(df, p, tech, var)
+    res['Hodinový zisk [€]']    = ledger.sum(axis=1).to_numpy()
+    res['Kumulativní zisk [€]'] = res['Hodinový zisk [€]'].cumsum()
+    return res
+
+
+def key_metrics(res: pd.DataFrame, p: dict, tech: dict, var) -> dict:
+    """Souhrnné metriky běhu (zobrazené v app.py a ukládané dávkovým režimem); energie v MWh."""
+    dt = time_step(res['Čas'])
+    total_shortfall = res['Shortfall [MW]'].sum() * dt
+    target_heat     = (res['Poptávka tepla [MW]'] * p['h_cover']).sum() * dt
+    return {
+        'total_profit':    float(res['Hodinový zisk [€]'].sum()),
+        'total_shortfall': float(total_shortfall),
+        'coverage':        float(100 * (1 - total_shortfall / target_heat) if target_heat > 0 else 100.0),
+        'ee_export':       float(res['EE export [MW]'].sum() * dt),
+        'total_ee_gen':    float((res['EE z KGJ [MW]'].sum() + res['EE z FVE [MW]'].sum()) * dt),
+        'kgj_hours':       int(round((var('on', len(res)) > 0.5).sum() * dt)) if tech['kgj'] else 0,
+    }
+
+
+def profit_breakdown(ledger: pd.DataFrame) -> pd.Series:
+    """Součty složek za celé období (waterfall); nulové složky vynechá."""
+    totals = ledger.sum()
+    return totals[totals.abs() > 1e-9]
+
+
+def monthly_summary(res: pd.DataFrame) -> pd.DataFrame:
+    """Měsíční zisk [€] a energie zdrojů [MWh]."""
+    monthly = res.groupby('Měsíc').agg(
+        zisk=('Hodinový zisk [€]', 'sum'),
+        teplo_kgj=('KGJ [MW_th]', 'sum'),
+        teplo_kotel=('Kotel [MW_th]', 'sum'),
+        teplo_ek=('Elektrokotel [MW_th]', 'sum'),
+        ee_export=('EE export [MW]', 'sum'),
+        ee_import=('EE import [MW]', 'sum'),
+        shortfall=('Shortfall [MW]', 'sum'),
+    ).reset_index()
+    energy = ['teplo_kgj', 'teplo_kotel', 'teplo_ek', 'ee_export', 'ee_import', 'shortfall']
+    monthly[energy] *= time_step(res['Čas'])
+    monthly['Měsíc_str'] = monthly['Měsíc'].map(MONTH_NAMES)
+    return monthly
+
+
+def export_sheets(res: pd.DataFrame, monthly: pd.DataFrame, p: dict, tech: dict) -> dict:
+    """Listy exportu (stejné pro Excel, CSV i Parquet): hodinová data, měsíční souhrn, parametry."""
+    hourly = res[[c for c in res.columns if c not in ('Měsíc', 'Hodina dne', 'KGJ_on')]].copy()
+    num    = hourly.select_dtypes('number').columns
+    hourly[num] = hourly[num].round(4)
+
+    monthly_exp = monthly.copy()
+    monthly_exp['Měsíc_str'] = monthly_exp['Měsíc'].map(MONTH_NAMES)
+    monthly_exp = monthly_exp[['Měsíc_str', 'zisk', 'teplo_kgj',
+                               'teplo_kotel', 'teplo_ek', 'ee_export',
+                               'ee_import', 'shortfall']]
+    monthly_exp.columns = ['Měsíc', 'Zisk [€]', 'KGJ teplo [MWh]',
+                           'Kotel teplo [MWh]', 'EK teplo [MWh]',
+                           'EE export [MWh]', 'EE import [MWh]', 'Shortfall [MWh]']
+
+    # Parametry (pro reprodukovatelnost)
+    params_data = [
+        ('Penalizace shortfall [€/MWh]', p['shortfall_penalty']),
+        ('Cena tepla [€/MWh]',           p['h_price']),
+        ('Min. pokrytí [-]',              p['h_cover']),
+        ('Distribuce nákup EE [€/MWh]',  p['dist_ee_buy']),
+        ('Distribuce prodej EE [€/MWh]',  p['dist_ee_sell']),
+        ('Distribuce plyn [€/MWh]',       p['gas_dist']),
+    ]
+    if tech['kgj']:
+        params_data += [
+            ('KGJ k_th [MW]',     p['k_th']),
+            ('KGJ η_th [-]',      p['k_eff_th']),
+            ('KGJ η_el [-]',      p['k_eff_el']),
+            ('KGJ min zatížení',  p['k_min']),
+            ('KGJ start cost [€]',p['k_start_cost']),
+        ]
+    params = pd.DataFrame(params_data, columns=['Parametr', 'Hodnota'])
+    return {'Hodinová data': hourly, 'Měsíční souhrn': monthly_exp, 'Parametry': params}
+
+
+def _excel_serial(s: pd.Series) -> np.ndarray:
+    """Datum a čas jako pořadové číslo dne v Excelu (bez časové zóny)."""
+    return ((pd.to_datetime(s) - pd.Timestamp('1899-12-30')) / pd.Timedelta(days=1)).to_numpy()
+
+
+def _write_sheet(wb, name: str, frame: pd.DataFrame, fmt_hdr, width: float, header_height: float,
+                 col_formats: dict | None = None):
+    """List po řádcích (constant_memory vyžaduje zápis shora dolů); formáty jsou u sloupců,
+    buňky se zapisují bez formátu a formát sloupce přeberou."""
+    ws   = wb.add_worksheet(name)
+    fmts = col_formats or {}
+    for ci, cn in enumerate(frame.columns):
+        ws.set_column(ci, ci, width, fmts.get(cn))
+    ws.set_row(0, header_height)
+    ws.write_row(0, 0, list(frame.columns), fmt_hdr)
+    values = frame.astype(object).where(frame.notna(), None).to_numpy().tolist()
+    for ri, row in enumerate(values, start=1):
+        ws.write_row(ri, 0, row)
+    return ws
+
+
+def to_excel(df_out: pd.DataFrame, monthly: pd.DataFrame, p: dict, tech: dict) -> bytes:
+    """Excel se třemi listy (xlsxwriter v režimu constant_memory)."""
+    sheets = export_sheets(df_out, monthly, p, tech)
+    hourly = sheets['Hodinová data']
+    if 'Čas' in hourly.columns:
+        hourly = hourly.assign(**{'Čas': _excel_serial(hourly['Čas'])})
+
+    buf = io.BytesIO()
+    wb  = xlsxwriter.Workbook(buf, {'constant_memory': True, 'nan_inf_to_errors': True})
+    fmt_hdr  = wb.add_format({'bold': True, 'bg_color': '#2c3e50', 'font_color': 'white',
+                              'border': 1, 'align': 'center', 'text_wrap': True})
+    fmt_num2 = wb.add_format({'num_format': '#,##0.00', 'border': 1})
+    fmt_num0 = wb.add_format({'num_format': '#,##0',    'border': 1})
+    fmt_date = wb.add_format({'num_format': 'dd.mm.yyyy hh:mm', 'border': 1})
+    money_c  = {'Hodinový zisk [€]', 'Kumulativní zisk [€]'}
+
+    # List 1 – hodinová data
+    col_fmts = {cn: fmt_date if cn == 'Čas' else fmt_num0 if cn in money_c else fmt_num2 for cn in hourly.columns}
+    ws = _write_sheet(wb, 'Hodinová data', hourly, fmt_hdr, 20, 36, col_fmts)
+    ws.autofilter(0, 0, len(hourly), len(hourly.columns) - 1)
+    ws.freeze_panes(1, 1)
+
+    # List 2 – měsíční souhrn
+    _write_sheet(wb, 'Měsíční souhrn', sheets['Měsíční souhrn'], fmt_hdr, 18, 30)
+
+    # List 3 – parametry
+    ws3 = _write_sheet(wb, 'Parametry', sheets['Parametry'], fmt_hdr, 15, 15)
+    ws3.set_column(0, 0, 30)
+
+    wb.close()
+    return buf.getvalue()
+
+
+def _to_archive(df_out: pd.DataFrame, monthly: pd.DataFrame, p: dict, tech: dict, fmt: str) -> bytes:
+    """ZIP s jedním souborem na list (CSV v UTF-8, nebo Parquet)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, frame in export_sheets(df_out, monthly, p, tech).items():
+            if fmt == 'csv':
+                zf.writestr(f"{SHEET_FILES[name]}.csv", frame.to_csv(index=False))
+            else:
+                zf.writestr(f"{SHEET_FILES[name]}.parquet", frame.to_parquet(index=False))
+    return buf.getvalue()
+
+
+def to_csv_zip(df_out: pd.DataFrame, monthly: pd.DataFrame, p: dict, tech: dict) -> bytes:
+    return _to_archive(df_out, monthly, p, tech, 'csv')
+
+
+def to_parquet_zip(df_out: pd.DataFrame, monthly: pd.DataFrame, p: dict, tech: dict) -> bytes:
+    """Vyžaduje pyarrow (je závislostí Streamlitu)."""
+    return _to_archive(df_out, monthly, p, tech, 'parquet')
+
+
+# Formát exportu → (přípona souboru, MIME typ, funkce)
+EXPORTS = {
+    'xlsx':    ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', to_excel),
+    'csv':     ('.csv.zip',     'application/zip', to_csv_zip),
+    'parquet': ('.parquet.zip', 'application/zip', to_parquet_zip),
+}
@@ -0,0 +1,171 @@
+"""Reprezentativní dny: rychlý odhad ročního výsledku z k typických dní.
+
+Dny sloučených vstupů (ceny EE a plynu, poptávka tepla, FVE) se shluknou
+metodou k-medoidů a model se řeší jen pro medoidy – s účelovou funkcí
+váženou počtem dní ve shluku. Stav akumulace (TES, BESS) se mezi dny přenáší
+chronologicky přes všechny dny horizontu: stav dne `j` je úroveň na jeho
+začátku plus průběh uvnitř reprezentativního dne (superpozice), takže
+sezónní využití nádrže zůstane zachováno. Meze SOC se pro skutečné dny hlídají
+přes maximum a minimum průběhu reprezentativního dne (ztráty se v této
+kontrole zanedbávají). KGJ začíná každý reprezentativní den volně – min.
+doba běhu ani start přes půlnoc se nepočítají.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .model import LinearModel, build_dispatch_model
+
+FEATURES = ('ee_price', 'gas_price', 'Poptávka po teple (MW)', 'FVE (MW)')
+
+# Akumulace: rodina SOC, parametr kapacity, výchozí podíl kapacity (jako v celém modelu)
+STORAGES = {'tes': ('TES', 'tes_cap', 0.5), 'bess': ('BESS', 'bess_cap', 0.2)}
+
+
+@dataclass
+class RepresentativeDays:
+    days: list            # řádky každého dne horizontu jako (začátek, konec)
+    steps: int            # kroků v celém dni
+    labels: np.ndarray    # shluk každého dne
+    medoids: np.ndarray   # den (pořadí) reprezentující každý shluk
+    weights: np.ndarray = field(repr=False)  # váha shluku = počet (celých) dní, které zastupuje
+    explained: float = 0.0                   # podíl rozptylu denních profilů vysvětlený shluky
+
+
+def day_bounds(datetimes) -> list:
+    """Kalendářní dny jako dvojice řádků (začátek, konec), konec exkluzivní."""
+    key    = pd.to_datetime(pd.Series(datetimes)).dt.normalize().to_numpy()
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends   = np.r_[starts[1:], len(key)]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def day_features(df: pd.DataFrame, days: list, n: int) -> np.ndarray:
+    """Denní vektory standardizovaných vstupů (den × `n` kroků × veličina); kratší dny doplněné posledním krokem."""
+    parts = []
+    for col in (c for c in FEATURES if c in df.columns):
+        v  = df[col].to_numpy(dtype=float)
+        sd = v.std()
+        z  = (v - v.mean()) / sd if sd > 0 else np.zeros_like(v)
+        parts.append(np.stack([np.pad(z[a:b][:n], (0, max(0, n - (b - a))), mode='edge') for a, b in days]))
+    return np.hstack(parts)
+
+
+def k_medoids(X: np.ndarray, k: int, eligible: np.ndarray | None = None, seed: int = 0,
+              max_iter: int = 100) -> tuple:
+    """Shlukování řádků `X` na `k` medoidů (alternující k-medoidy, start k-means++).
+
+    Medoidem může být jen řádek z `eligible`. Vrací (medoidy, přiřazení řádků).
+    """
+    D  = len(X)
+    sq = (X ** 2).sum(axis=1)
+    dist = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2 * X @ X.T, 0.0))
+    cand = np.flatnonzero(eligible) if eligible is not None else np.arange(D)
+    k    = min(k, len(cand))
+
+    rng     = np.random.default_rng(seed)
+    medoids = [cand[np.argmin(dist[cand].sum(axis=1))]]
+    while len(medoids) < k:
+        near = dist[:, medoids].min(axis=1) ** 2
+        prob = near[cand] / near[cand].sum() if near[cand].sum() > 0 else None
+        medoids.append(rng.choice(cand, p=prob))
+    medoids = np.array(medoids)
+
+    for _ in range(max_iter):
+        labels = dist[:, medoids].argmin(axis=1)
+        new    = medoids.copy()
+        for c in range(k):
+            members = np.flatnonzero(labels == c)
+            pool    = np.intersect1d(members, cand)
+            pool    = pool if len(pool) else cand
+            new[c]  = pool[np.argmin(dist[np.ix_(members, pool)].sum(axis=0))]
+        if np.array_equal(new, medoids):
+            break
+        medoids = new
+    return medoids, dist[:, medoids].argmin(axis=1)
+
+
+def cluster_days(df: pd.DataFrame, k: int, seed: int = 0) -> RepresentativeDays:
+    """`k` reprezentativních dní horizontu `df`; medoidy jsou jen celé dny (nejčastější délka)."""
+    days    = day_bounds(df['datetime'])
+    lengths = np.array([b - a for a, b in days])
+    n       = int(np.bincount(lengths).argmax())
+    X       = day_features(df, days, n)
+    medoids, labels = k_medoids(X, k, eligible=lengths == n, seed=seed)
+
+    # Prázdné shluky (shodné medoidy) vypadnou; přečíslování podle pořadí medoidů
+    used    = np.unique(labels)
+    medoids = medoids[used]
+    labels  = np.searchsorted(used, labels)
+    centers = np.stack([X[labels == c].mean(axis=0) for c in range(len(medoids))])
+    within  = ((X - centers[labels]) ** 2).sum()
+    total   = ((X - X.mean(axis=0)) ** 2).sum()
+    return RepresentativeDays(
+        days=days, steps=n, labels=labels, medoids=medoids,
+        weights=np.bincount(labels, weights=lengths / n, minlength=len(medoids)),
+        explained=float(1 - within / total) if total > 0 else 1.0,
+    )
+
+
+def build_representative_model(df: pd.DataFrame, p: dict, tech: dict, rep: RepresentativeDays) -> LinearModel:
+    """Model medoidů (každý den s volným počátečním stavem) vážený `rep.weights`,
+    s chronologickou vazbou stavu akumulace přes všechny dny (rodiny `<X>_day`)."""
+    blocks = [build_dispatch_model(df.iloc[slice(*rep.days[d])], p, tech, {'free_start': True})
+              for d in rep.medoids]
+    m = LinearModel.stack('KGJ_Representative', blocks, rep.weights)
+    k, n   = len(rep.medoids), rep.steps
+    c      = rep.labels
+    length = np.array([b - a for a, b in rep.days])
+    for key, (name, cap_key, share) in STORAGES.items():
+        if not tech[key]:
+            continue
+        cap   = p[cap_key]
+        keep  = (1 - p['tes_loss']) ** m.dt if key == 'tes' else 1.0
+        low   = name.lower()
+        soc   = m.vars[f'{name}_SOC'].reshape(k, n + 1)
+        level = m.add_var(f'{name}_day', len(rep.days) + 1, 0, cap)
+        hi    = m.add_var(f'{name}_hi', k, 0, cap)
+        lo    = m.add_var(f'{name}_lo', k, 0, cap)
+        decay = keep ** length
+        m.add_constr(f'{low}_day_init', [(level[:1], 1.0)], 'E', cap * share)
+        # Úroveň na konci dne = útlum úrovně na začátku + změna stavu v reprezentativním dni
+        m.add_constr(f'{low}_day_link', [(level[1:], 1.0), (level[:-1], -decay),
+                                         (soc[c, length], -1.0), (soc[c, 0], decay)], 'E', 0.0)
+        m.add_constr(f'{low}_day_hi', [(np.repeat(hi, n + 1), 1.0), (soc.ravel(), -1.0)], 'G', 0.0)
+        m.add_constr(f'{low}_day_lo', [(np.repeat(lo, n + 1), 1.0), (soc.ravel(), -1.0)], 'L', 0.0)
+        m.add_constr(f'{low}_day_max', [(level[:-1], 1.0), (hi[c], 1.0), (soc[c, 0], -1.0)], 'L', cap)
+        m.add_constr(f'{low}_day_min', [(level[:-1], 1.0), (lo[c], 1.0), (soc[c, 0], -1.0)], 'G', 0.0)
+    return m
+
+
+def expand_days(rep: RepresentativeDays, model: LinearModel, x: np.ndarray, p: dict) -> dict:
+    """Dispečink medoidů přenesený na všechny dny horizontu (hodnoty rodin jako u celého modelu).
+
+    SOC skutečného dne = útlum úrovně na jeho začátku + průběh reprezentativního
+    dne; starty a odstavení KGJ se přepočtou ze stavu `on`.
+    """
+    k, n   = len(rep.medoids), rep.steps
+    values = model.unpack(x)
+    out    = {}
+    for name, v in values.items():
+        if len(v) == k * n:
+            blk = v.reshape(k, n)
+            out[name] = np.concatenate([blk[c, :b - a] for (a, b), c in zip(rep.days, rep.labels)])
+    for key, (name, _, _) in STORAGES.items():
+        if f'{name}_day' not in values:
+            continue
+        keep  = (1 - p['tes_loss']) ** model.dt if key == 'tes' else 1.0
+        soc   = values[f'{name}_SOC'].reshape(k, n + 1)
+        level = values[f'{name}_day']
+        parts = []
+        for j, ((a, b), c) in enumerate(zip(rep.days, rep.labels)):
+            decay = keep ** np.arange(b - a)
+            parts.append(decay * (level[j] - soc[c, 0]) + soc[c, :b - a])
+        out[f'{name}_SOC'] = np.concatenate(parts + [level[-1:]])
+    if 'on' in out:
+        on   = np.round(out['on'])
+        prev = np.r_[0.0, on[:-1]]
+        out['start'] = np.maximum(on - prev, 0.0)
+        out['stop']  = np.maximum(prev - on, 0.0)
+    return out
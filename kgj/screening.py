@@ -0,0 +1,81 @@
+"""Screening: rychlý odhad zisku bez řešení MIP.
+
+Dolní odhad dává heuristika merit orderu (přípustné řešení, pokud nejsou
+zadané rampy), horní mez LP relaxace téhož modelu. Relaxace se řeší po
+oknech s volným počátečním stavem (SOC, chod KGJ): každé okno je relaxací
+odpovídající části celého modelu, takže součet oken je platná horní mez –
+o něco volnější než celoroční LP, ale okna jsou malá a běží souběžně.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pulp
+
+from .decompose import split_windows
+from .heuristic import merit_order_dispatch
+from .model import build_dispatch_model
+from .solver import solve
+
+
+@dataclass
+class ScreeningResult:
+    heuristic: float
+    bound: float | None
+    feasible: bool
+    values: dict = field(repr=False)
+    violation: float = 0.0   # největší porušení řádku modelu heuristickým dispečinkem
+    seconds: float = 0.0
+    bound_seconds: float = 0.0
+
+    @property
+    def gap(self) -> float | None:
+        """Relativní mezera mezi horní mezí a heuristikou (optimum MIP leží mezi nimi)."""
+        if self.bound is None or self.bound == 0:
+            return None
+        return (self.bound - self.heuristic) / abs(self.bound)
+
+
+def _window_bound(df_w: pd.DataFrame, p: dict, tech: dict, time_limit: float,
+                  options: dict | None = None) -> float | None:
+    sol = solve(build_dispatch_model(df_w, p, tech, {'free_start': True}), time_limit=time_limit, relax=True,
+                options=options)
+    return sol.objective if sol.status == pulp.LpStatusOptimal else None
+
+
+def lp_bound(df: pd.DataFrame, p: dict, tech: dict, period: str | None = 'M',
+             workers: int | None = None, time_limit: float = 60, options: dict | None = None) -> float | None:
+    """Horní mez zisku z LP relaxace po oknech (`period=None` = jedno celoroční LP).
+
+    Nedořešené okno mez znehodnotí → None.
+    """
+    windows = split_windows(df['datetime'], period) if period else [(0, len(df))]
+    if len(windows) == 1 or workers == 1:
+        parts = [_window_bound(df.iloc[a:b], p, tech, time_limit, options) for a, b in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_window_bound, df.iloc[a:b], p, tech, time_limit, options)
+                       for a, b in windows]
+            parts   = [f.result() for f in futures]
+    return None if any(v is None for v in parts) else float(sum(parts))
+
+
+def screen(df: pd.DataFrame, p: dict, tech: dict, period: str | None = 'M', bound: bool = True,
+           workers: int | None = None, time_limit: float = 60, options: dict | None = None) -> ScreeningResult:
+    """Heuristický dispečink (zisk vyhodnocený účelovou funkcí modelu) a horní mez z LP relaxace."""
+    t0     = time.perf_counter()
+    model  = build_dispatch_model(df, p, tech)
+    x      = model.pack(merit_order_dispatch(df, p, tech))
+    values = model.unpack(x)
+    worst  = float(model.violation(x).max(initial=0.0))
+    result = ScreeningResult(
+        heuristic=float(model.arrays()['c'] @ x), bound=None, feasible=worst <= 1e-6, values=values,
+        violation=worst,
+    )
+    result.seconds = time.perf_counter() - t0
+    if bound:
+        t1 = time.perf_counter()
+        result.bound = lp_bound(df, p, tech, period, workers, time_limit, options)
+        result.bound_seconds = time.perf_counter() - t1
+    return result
@@ -0,0 +1,57 @@
+"""Mezní (stínové) ceny tepla a elektřiny po krocích z duálů LP s pevným chodem KGJ.
+
+Po vyřešení MIP se chod KGJ (`on`, `start`, `stop`) zafixuje na nalezené
+hodnoty a zbylé LP se vyřeší jednou. Duál bilančního řádku je změna zisku při
+jednotkové změně pravé strany v daném kroku – jedno LP tak nahradí N výpočtů
+s posunutou poptávkou. Při pevném chodu KGJ jde o mezní cenu v okolí
+nalezeného dispečinku (start navíc nezahrnuje).
+
+Mezní cena tepla [€/MWh] = cena tepla − (duál `heat_demand` + duál `heat_max`) / dt:
+dodané teplo nese příjem `h_price`, duály říkají, o kolik se dodávka dalšího
+MWh liší od tohoto příjmu. Mezní cena EE [€/MWh] = −duál `ee_balance` / dt –
+cena další MWh spotřeby na lokalitě (u nákupu tržní cena + distribuce, při
+exportu výkupní cena). V kroku na zlomu (např. export přesně na mezi) leží
+duál mezi mezní cenou dalšího a předchozího MWh.
+"""
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pulp
+
+from .model import build_dispatch_model
+from .solver import solve
+
+# Rodiny s mezními cenami ve výsledcích běhu (hodnoty jako u proměnných, viz `RunResult.values`)
+SHADOW_FAMILIES = ('mc_heat', 'mc_ee')
+COMMITMENT      = ('on', 'start', 'stop')
+
+
+@dataclass
+class ShadowPrices:
+    status: int
+    values: dict = field(repr=False)   # {'mc_heat': …, 'mc_ee': …} po krocích; prázdné bez optima LP
+    seconds: float = 0.0
+
+
+def shadow_prices(df: pd.DataFrame, p: dict, tech: dict, values: dict, time_limit: float = 300,
+                  options: dict | None = None) -> ShadowPrices:
+    """Mezní ceny tepla a EE pro dispečink `values` (hodnoty rodin z řešení MIP).
+
+    Chod KGJ se převezme zaokrouhlený; je-li s ním LP nepřípustné (např.
+    sešitý výsledek oken), vrátí stav LP a prázdné `values`.
+    """
+    t0 = time.perf_counter()
+    m  = build_dispatch_model(df, p, tech)
+    for name in COMMITMENT:
+        if name in m.vars and name in values:
+            m.fix(m.vars[name], np.round(values[name]))
+    sol = solve(m, time_limit=time_limit, relax=True, options=options)
+    if sol.status != pulp.LpStatusOptimal:
+        return ShadowPrices(sol.status, {}, time.perf_counter() - t0)
+
+    rows = m.rows
+    heat = p['h_price'] - (sol.duals[rows['heat_demand']] + sol.duals[rows['heat_max']]) / m.dt
+    ee   = -sol.duals[rows['ee_balance']] / m.dt
+    return ShadowPrices(sol.status, {'mc_heat': heat, 'mc_ee': ee}, time.perf_counter() - t0)
@@ -0,0 +1,294 @@
+"""Řešení `LinearModel` přes CBC (binárka přibalená k PuLP) nebo HiGHS (highspy) a čtení výsledku do polí.
+
+Nastavení solveru je slovník `options` (viz `SolveSettings.solver_options`):
+`backend` ('cbc' | 'highs'), `threads`, `gap_rel`, `gap_abs` (None = výchozí
+mezera solveru) a `presolve`. HiGHS je volitelná závislost (`pip install highspy`).
+
+Řešení spuštěná ve vlákně uvnitř `watch(progress, cancel)` hlásí průběh CBC
+a dají se zrušit (fronta výpočtů `jobs`).
+"""
+import importlib.util
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+import pulp
+
+from .diagnostics import cbc_progress
+from .model import LinearModel
+
+# Stavy jako v PuLP, aby šly dál zobrazovat přes `pulp.LpStatus`
+_CBC_STATUS = {
+    'Optimal':    pulp.LpStatusOptimal,
+    'Infeasible': pulp.LpStatusInfeasible,
+    'Integer':    pulp.LpStatusInfeasible,
+    'Unbounded':  pulp.LpStatusUnbounded,
+    'Stopped':    pulp.LpStatusNotSolved,
+}
+
+DEFAULT_OPTIONS = {'backend': 'cbc', 'threads': 1, 'gap_rel': None, 'gap_abs': None, 'presolve': True}
+BACKENDS        = ('cbc', 'highs')
+POLL_SECONDS    = 1.0   # jak často se při `watch` čte log CBC a kontroluje zrušení
+
+_watch = threading.local()
+
+
+class SolveCancelled(Exception):
+    """Řešení zrušené přes `watch(cancel=…)`."""
+
+
+@contextmanager
+def watch(progress=None, cancel: threading.Event | None = None):
+    """Sledování řešení spuštěných v tomto vlákně.
+
+    `progress(point)` dostává průběžně poslední bod `diagnostics.cbc_progress`
+    běžícího CBC (čas, uzly, nejlepší řešení, mez, mezera). Nastavený `cancel`
+    ukončí běžící CBC a `solve` vyhodí `SolveCancelled`; kontroluje se i před
+    každým dalším řešením (okna, LP mezních cen). HiGHS a okna řešená v jiných
+    procesech se přeruší až na nejbližší kontrole.
+    """
+    prev = getattr(_watch, 'state', None)
+    _watch.state = (progress, cancel)
+    try:
+        yield
+    finally:
+        _watch.state = prev
+
+
+def _watched() -> tuple:
+    return getattr(_watch, 'state', None) or (None, None)
+
+
+def _check_cancel() -> None:
+    cancel = _watched()[1]
+    if cancel is not None and cancel.is_set():
+        raise SolveCancelled("Řešení bylo zrušeno")
+
+
+def _wait(proc: subprocess.Popen, log_path: str) -> None:
+    """Čeká na CBC; při `watch` po `POLL_SECONDS` hlásí průběh z logu a reaguje na zrušení."""
+    progress, cancel = _watched()
+    if progress is None and cancel is None:
+        proc.wait()
+        return
+    while True:
+        try:
+            proc.wait(timeout=POLL_SECONDS)
+            return
+        except subprocess.TimeoutExpired:
+            pass
+        if cancel is not None and cancel.is_set():
+            proc.kill()
+            proc.wait()
+            raise SolveCancelled("Řešení bylo zrušeno")
+        if progress is not None:
+            with open(log_path) as f:
+                points = cbc_progress(f.read())
+            if points:
+                progress(points[-1])
+
+
+def available_backends() -> list:
+    """Backendy, které jdou v tomto prostředí použít (HiGHS jen s nainstalovaným highspy)."""
+    return [b for b in BACKENDS if b == 'cbc' or importlib.util.find_spec('highspy') is not None]
+
+
+@dataclass
+class Solution:
+    status: int
+    objective: float
+    x: np.ndarray
+    model: LinearModel = field(repr=False)
+    duals: np.ndarray = field(default=None, repr=False)
+    bound: float | None = None   # nejlepší horní mez (maximalizace); u optima = objective
+    log: str = field(default='', repr=False)
+    timings: dict = field(default_factory=dict)   # zápis MPS a běh solveru vč. načtení řešení [s]
+
+    @property
+    def gap(self) -> float | None:
+        """Relativní mezera mezi mezí a nalezeným řešením."""
+        if self.bound is None or self.bound == 0:
+            return None
+        return max(self.bound - self.objective, 0.0) / abs(self.bound)
+
+    def var(self, name: str, n: int, fill: float = 0.0) -> np.ndarray:
+        """Hodnoty rodiny proměnných `name`; pole `fill` délky `n`, pokud v modelu není."""
+        idx = self.model.vars.get(name)
+        return self.x[idx] if idx is not None else np.full(n, fill)
+
+    def values(self) -> dict:
+        """Hodnoty všech rodin proměnných jako pole (viz `LinearModel.unpack`)."""
+        return self.model.unpack(self.x)
+
+
+def _read_cbc_solution(path: str, n_cols: int, n_rows: int):
+    with open(path) as f:
+        words  = f.readline().split()
+        # Záznam = index, jméno, hodnota, duál / redukovaná cena; „**“ jen označuje porušení
+        tokens = f.read().replace('**', '').split()
+    status = _CBC_STATUS.get(words[0] if words else '', pulp.LpStatusUndefined)
+    # „Stopped on time - objective value …“ = časový limit s nalezeným řešením
+    if status == pulp.LpStatusNotSolved and len(words) >= 5 and words[4] == 'objective':
+        status = pulp.LpStatusOptimal
+
+    names = tokens[1::4]
+    value = np.array(tokens[2::4], dtype=float)
+    dual  = np.array(tokens[3::4], dtype=float)
+    if len(names) == n_rows + n_cols and (n_cols == 0 or names[n_rows] == 'C0'):
+        # printingOptions all: všechny řádky R0…, za nimi všechny sloupce C0… v pořadí
+        return status, value[n_rows:], dual[:n_rows]
+    x, duals = np.zeros(n_cols), np.zeros(n_rows)
+    idx  = np.array([int(n[1:]) for n in names], dtype=np.int64)
+    is_c = np.array([n[0] == 'C' for n in names], dtype=bool)
+    x[idx[is_c]]      = value[is_c]
+    duals[idx[~is_c]] = dual[~is_c]
+    return status, x, duals
+
+
+def _cbc_bound(log: str, status: int, objective: float | None) -> float | None:
+    """Nejlepší mez z logu CBC (minimalizace): „Lower bound:“ po limitu / v toleranci mezery,
+    jinak poslední „best possible“; dokázané optimum je samo sobě mezí."""
+    found = re.findall(r'^Lower bound:\s+(\S+)', log, re.M) or re.findall(r'best possible (\S+?)\)', log)
+    if found:
+        return float(found[-1])
+    return objective if status == pulp.LpStatusOptimal and 'Result - Optimal solution found' in log else None
+
+
+def _write_mip_start(path: str, x: np.ndarray, integer: np.ndarray) -> None:
+    """Počáteční řešení ve formátu souboru řešení CBC (`-mips`), celočíselné hodnoty zaokrouhlené."""
+    x = np.where(integer, np.round(x), x)
+    with open(path, 'w') as f:
+        f.write("Stopped on time - objective value 0\n")
+        f.write(''.join(f"{j:>7} C{j} {v!r} 0\n" for j, v in enumerate(x.tolist())))
+
+
+def _solve_cbc(model: LinearModel, tmp: str, mps: str, time_limit: float, msg: bool,
+               start: np.ndarray | None, relax: bool, opts: dict):
+    cbc  = pulp.PULP_CBC_CMD().path
+    sol  = os.path.join(tmp, 'model.sol')
+    args = [cbc, mps]
+    if start is not None and not relax:
+        mst = os.path.join(tmp, 'model.mst')
+        _write_mip_start(mst, start, model.arrays()['integer'])
+        args += ['-mips', mst]
+    if opts['threads'] > 1:
+        args += ['-threads', str(int(opts['threads']))]
+    if opts['gap_rel'] is not None:
+        args += ['-ratioGap', str(opts['gap_rel'])]
+    if opts['gap_abs'] is not None:
+        args += ['-allowableGap', str(opts['gap_abs'])]
+    if not opts['presolve']:
+        args += ['-presolve', 'off']
+    args += ['-sec', str(time_limit), '-timeMode', 'elapsed',
+             '-solve', '-printingOptions', 'all', '-solution', sol]
+    # Log do souboru – při `watch` se z něj průběžně čte průběh; CBC do souboru zapisuje
+    # po blocích, `stdbuf` (GNU coreutils) přepne na řádky, jinak je průběh vidět až na konci
+    log_path = os.path.join(tmp, 'cbc.log')
+    if _watched()[0] is not None and shutil.which('stdbuf'):
+        args = ['stdbuf', '-oL'] + args
+    with open(log_path, 'w') as out:
+        proc = subprocess.Popen(args, stdout=out, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+        _wait(proc, log_path)
+    with open(log_path) as f:
+        log = f.read()
+    if msg:
+        print(log, end='')
+    if proc.returncode != 0:
+        raise pulp.PulpSolverError(f"CBC skončil s chybou: {cbc}")
+    if not os.path.exists(sol):
+        raise pulp.PulpSolverError(f"CBC nevytvořil soubor s řešením: {cbc}")
+    status, x, duals = _read_cbc_solution(sol, model.n_cols, model.n_rows)
+    obj   = re.findall(r'^Objective value:\s+(\S+)', log, re.M)
+    bound = _cbc_bound(log, status, float(obj[-1]) if obj else None)
+    return status, x, duals, bound, log
+
+
+def _solve_highs(model: LinearModel, tmp: str, mps: str, time_limit: float, msg: bool,
+                 start: np.ndarray | None, relax: bool, opts: dict):
+    try:
+        import highspy
+    except ImportError as e:
+        raise pulp.PulpSolverError("Backend 'highs' vyžaduje balíček highspy (pip install highspy)") from e
+    h = highspy.Highs()
+    log_path = os.path.join(tmp, 'highs.log')
+    h.setOptionValue('log_to_console', bool(msg))
+    h.setOptionValue('log_file', log_path)
+    if h.readModel(mps) != highspy.HighsStatus.kOk:
+        raise pulp.PulpSolverError(f"HiGHS nenačetl model: {mps}")
+    h.setOptionValue('time_limit', float(time_limit))
+    h.setOptionValue('threads', int(opts['threads']))
+    h.setOptionValue('presolve', 'on' if opts['presolve'] else 'off')
+    if opts['gap_rel'] is not None:
+        h.setOptionValue('mip_rel_gap', float(opts['gap_rel']))
+    if opts['gap_abs'] is not None:
+        h.setOptionValue('mip_abs_gap', float(opts['gap_abs']))
+    if start is not None and not relax:
+        integer = model.arrays()['integer']
+        init = highspy.HighsSolution()
+        init.col_value = np.where(integer, np.round(start), start).tolist()
+        h.setSolution(init)
+    h.run()
+
+    # Sloupce a řádky jsou v MPS v pořadí C0…, R0…, takže indexy HiGHS odpovídají modelu
+    ms, info = h.getModelStatus(), h.getInfo()
+    has_x    = info.primal_solution_status == 2   # kSolutionStatusFeasible
+    if ms == highspy.HighsModelStatus.kOptimal:
+        status = pulp.LpStatusOptimal
+    elif ms == highspy.HighsModelStatus.kInfeasible:
+        status = pulp.LpStatusInfeasible
+    elif ms in (highspy.HighsModelStatus.kUnbounded, highspy.HighsModelStatus.kUnboundedOrInfeasible):
+        status = pulp.LpStatusUnbounded
+    else:
+        # Limit času / iterací s nalezeným řešením = stejně jako „Stopped on time“ u CBC
+        status = pulp.LpStatusOptimal if has_x else pulp.LpStatusNotSolved
+    sol   = h.getSolution()
+    x     = np.asarray(sol.col_value, dtype=float) if has_x else np.zeros(model.n_cols)
+    duals = (np.asarray(sol.row_dual, dtype=float) if sol.dual_valid else np.zeros(model.n_rows))
+    is_mip = not relax and bool(model.arrays()['integer'].any())
+    bound  = (info.mip_dual_bound if is_mip else info.objective_function_value) if has_x else None
+    if bound is not None and not np.isfinite(bound):
+        bound = None
+    log = ''
+    if os.path.exists(log_path):
+        with open(log_path) as f:
+            log = f.read()
+    return status, x, duals, bound, log
+
+
+def solve(model: LinearModel, time_limit: float = 300, msg: bool = False,
+          start: np.ndarray | None = None, relax: bool = False, options: dict | None = None) -> Solution:
+    """Zapíše model do MPS, vyřeší ho zvoleným backendem a vrátí `Solution`
+    (účelová funkce i mez v maximalizační podobě).
+
+    `start` je volitelné počáteční řešení (vektor x, viz `LinearModel.pack`);
+    solver z něj převezme celočíselné proměnné, spojité dopočte a má tak od
+    začátku přípustné řešení. Nepřípustný start solver zahodí a řeší od nuly.
+    `relax=True` řeší jen LP relaxaci (bez celočíselnosti). `options` doplní
+    `DEFAULT_OPTIONS`. Uvnitř `watch` se zrušené řešení ukončí `SolveCancelled`.
+    """
+    _check_cancel()
+    opts = {**DEFAULT_OPTIONS, **(options or {})}
+    if opts['backend'] not in BACKENDS:
+        raise ValueError(f"Neznámý backend solveru: {opts['backend']!r} (povolené: {', '.join(BACKENDS)})")
+    backend = _solve_highs if opts['backend'] == 'highs' else _solve_cbc
+    with tempfile.TemporaryDirectory(prefix='kgj_') as tmp:
+        t0  = time.perf_counter()
+        mps = os.path.join(tmp, 'model.mps')
+        model.write_mps(mps, relax=relax)
+        t1  = time.perf_counter()
+        status, x, duals, bound, log = backend(model, tmp, mps, time_limit, msg, start, relax, opts)
+        t2  = time.perf_counter()
+    _check_cancel()   # HiGHS se během běhu nepřeruší – výsledek zrušené úlohy se zahodí
+
+    # Model je zapsán jako minimalizace −c → duály a mez přepočítat zpět na maximalizaci
+    objective = float(model.arrays()['c'] @ x)
+    return Solution(status=status, objective=objective, x=x, model=model, duals=-duals,
+                    bound=-bound if bound is not None else None, log=log,
+                    timings={'write_mps': t1 - t0, 'solver': t2 - t1})
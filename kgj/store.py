@@ -0,0 +1,194 @@
+"""Trvalé úložiště výsledků optimalizace na lokálním disku.
+
+Klíčem je kanonický hash parametrů `p`, přepínačů technologií, nastavení řešení
+a sloučených vstupních dat. Každý běh je dvojice souborů `<klíč>.json`
+(metadata, parametry) a `<klíč>.npz` (vstupní sloupce a hodnoty proměnných).
+Při překročení limitu velikosti se mažou nejdéle nepoužité běhy.
+"""
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+DATA_COLS = ['datetime', 'ee_price', 'gas_price', 'Poptávka po teple (MW)', 'FVE (MW)']
+
+
+def _canonical(obj):
+    """Převod na JSON-serializovatelné hodnoty se stabilní podobou (numpy skaláry → Python)."""
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in sorted(obj.items())}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def _param_distance(a: dict, b: dict) -> float:
+    """Součet relativních rozdílů číselných parametrů; jiná nečíselná hodnota nebo chybějící klíč = 1."""
+    dist = 0.0
+    for k in a.keys() | b.keys():
+        x, y = a.get(k), b.get(k)
+        if isinstance(x, (int, float)) and isinstance(y, (int, float)):
+            dist += abs(x - y) / max(abs(x), abs(y), 1.0)
+        elif x != y:
+            dist += 1.0
+    return dist
+
+
+def data_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Sloupce vstupních dat, na kterých výsledek závisí."""
+    return df[[c for c in DATA_COLS if c in df.columns]]
+
+
+def result_key(p: dict, tech: dict, df: pd.DataFrame, settings: dict | None = None) -> str:
+    """Kanonický hash vstupů běhu – stejné zadání → stejný klíč."""
+    h = hashlib.sha256()
+    h.update(json.dumps(_canonical({'v': FORMAT_VERSION, 'p': p, 'tech': tech,
+                                    'settings': settings or {}}), sort_keys=True).encode())
+    for col, values in data_columns(df).items():
+        h.update(col.encode())
+        h.update(np.ascontiguousarray(values.to_numpy()).tobytes())
+    return h.hexdigest()[:32]
+
+
+@dataclass
+class StoredRun:
+    key: str
+    meta: dict
+    params: dict
+    tech: dict
+    data: pd.DataFrame
+    values: dict = field(repr=False)
+
+    @property
+    def status(self) -> int:
+        return self.meta['status']
+
+    @property
+    def objective(self) -> float:
+        return self.meta['objective']
+
+    def var(self, name: str, n: int, fill: float = 0.0) -> np.ndarray:
+        """Hodnoty rodiny proměnných `name`; pole `fill` délky `n`, pokud v běhu nebyla."""
+        v = self.values.get(name)
+        return v if v is not None else np.full(n, fill)
+
+
+class ResultStore:
+    def __init__(self, root: str | None = None, max_bytes: int = 512 * 2**20):
+        self.root = root or os.environ.get(
+            'KGJ_RESULT_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'kgj', 'results'))
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, f"{key}.{ext}")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key, 'json')) and os.path.exists(self._path(key, 'npz'))
+
+    def save(self, key: str, p: dict, tech: dict, df: pd.DataFrame, values: dict,
+             status: int, objective: float, extra: dict | None = None) -> None:
+        data   = data_columns(df)
+        arrays = {f"var:{k}": np.asarray(v, dtype=float) for k, v in values.items()}
+        for col, s in data.items():
+            arrays[f"data:{col}"] = (s.to_numpy(dtype='datetime64[ns]').view('int64')
+                                     if col == 'datetime' else s.to_numpy())
+        meta = {
+            'version':   FORMAT_VERSION,
+            'created':   time.time(),
+            'status':    int(status),
+            'objective': float(objective),
+            'hours':     len(data),
+            'start':     str(data['datetime'].min()),
+            'end':       str(data['datetime'].max()),
+            **(extra or {}),
+        }
+        # Zápis přes dočasný soubor → nikdy nezůstane napůl zapsaný běh
+        tmp = self._path(key, 'tmp.npz')
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, self._path(key, 'npz'))
+        with open(self._path(key, 'tmp'), 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'params': _canonical(p), 'tech': _canonical(tech)}, f, ensure_ascii=False)
+        os.replace(self._path(key, 'tmp'), self._path(key, 'json'))
+        self._evict()
+
+    def load(self, key: str) -> StoredRun | None:
+        if key not in self:
+            return None
+        with open(self._path(key, 'json'), encoding='utf-8') as f:
+            doc = json.load(f)
+        with np.load(self._path(key, 'npz')) as z:
+            values = {k[4:]: z[k] for k in z.files if k.startswith('var:')}
+            data   = {k[5:]: z[k] for k in z.files if k.startswith('data:')}
+        data['datetime'] = data['datetime'].view('datetime64[ns]')
+        os.utime(self._path(key, 'npz'))   # čas přístupu pro LRU
+        return StoredRun(key=key, meta=doc['meta'], params=doc['params'], tech=doc['tech'],
+                         data=pd.DataFrame(data), values=values)
+
+    def _docs(self):
+        """Dvojice (klíč, obsah JSON) všech uložených běhů; poškozené soubory přeskočí."""
+        for name in os.listdir(self.root):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.root, name), encoding='utf-8') as f:
+                        yield name[:-5], json.load(f)
+                except (OSError, ValueError):
+                    continue
+
+    def list(self) -> list:
+        """Metadata uložených běhů (nejnovější první), každý s klíčem `key`."""
+        runs = [{'key': key, **doc['meta'], 'tech': doc['tech']} for key, doc in self._docs()]
+        return sorted(runs, key=lambda r: r['created'], reverse=True)
+
+    def nearest(self, p: dict, tech: dict, df: pd.DataFrame) -> StoredRun | None:
+        """Nejpodobnější vyřešený běh pro warm start: stejné technologie a horizont,
+        nejmenší relativní rozdíl parametrů (při shodě novější)."""
+        data  = data_columns(df)
+        where = (len(data), str(data['datetime'].min()), str(data['datetime'].max()))
+        tech, p = _canonical(tech), _canonical(p)
+        best = None
+        for key, doc in self._docs():
+            meta = doc['meta']
+            if (doc['tech'] != tech or meta['status'] != 1
+                    or (meta['hours'], meta['start'], meta['end']) != where or key not in self):
+                continue
+            rank = (_param_distance(doc['params'], p), -meta['created'])
+            if best is None or rank < best[0]:
+                best = (rank, key)
+        return self.load(best[1]) if best else None
+
+    def find_full(self, p: dict, tech: dict, df: pd.DataFrame) -> StoredRun | None:
+        """Uložené řešení celé MIP (režim 'full') pro stejné parametry, technologie a data
+        s libovolným nastavením solveru – pro srovnání s odhady; přednost má menší mezera, pak novější."""
+        tech_c, p_c = _canonical(tech), _canonical(p)
+        best = None
+        for key, doc in self._docs():
+            meta     = doc['meta']
+            settings = meta.get('settings') or {}
+            if (settings.get('mode') != 'full' or doc['tech'] != tech_c or doc['params'] != p_c
+                    or meta['status'] != 1 or key not in self):
+                continue
+            if result_key(p, tech, df, settings) != key:   # jiná vstupní data
+                continue
+            rank = (meta.get('gap') or 0.0, -meta['created'])
+            if best is None or rank < best[0]:
+                best = (rank, key)
+        return self.load(best[1]) if best else None
+
+    def _evict(self) -> None:
+        files = [os.path.join(self.root, n) for n in os.listdir(self.root) if n.endswith('.npz')]
+        files = sorted(files, key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        while len(files) > 1 and total > self.max_bytes:
+            oldest = files.pop(0)
+            total -= os.path.getsize(oldest)
+            for path in (oldest, oldest[:-4] + '.json'):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,78 @@
+"""Cenové scénáře: souběžné řešení pro mřížku / seznam cílových base cen (EE, plyn).
+
+Posun base ceny mění jen koeficienty účelové funkce – omezení jsou na cenách
+nezávislá. Model se proto sestaví jednou, do každého procesu se pošle jednou
+(inicializace workeru) a scénář nese jen dvojici posunů. Koeficienty jsou
+v cenách afinní: c(ΔEE, Δplyn) = c₀ + ΔEE · ∂c/∂EE + Δplyn · ∂c/∂plyn.
+"""
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .model import LinearModel, build_dispatch_model, dispatch_objective
+from .solver import solve
+
+# Sdílený model v procesu workeru (nastaví `_init_worker`)
+_shared = {}
+
+
+def price_grid(ee_prices, gas_prices) -> list:
+    """Všechny kombinace cílových base cen jako seznam dvojic (EE, plyn)."""
+    return [(float(e), float(g)) for e, g in itertools.product(ee_prices, gas_prices)]
+
+
+def _init_worker(model: LinearModel, c0: np.ndarray, d_ee: np.ndarray, d_gas: np.ndarray) -> None:
+    _shared.update(model=model, c0=c0, d_ee=d_ee, d_gas=d_gas)
+
+
+def _solve_scenario(shift_ee: float, shift_gas: float, time_limit: float, options: dict | None) -> dict:
+    m = _shared['model']
+    m.set_obj(_shared['c0'] + shift_ee * _shared['d_ee'] + shift_gas * _shared['d_gas'])
+    t0  = time.perf_counter()
+    sol = solve(m, time_limit=time_limit, options=options)
+    v   = m.vars
+    total = lambda name: float(sol.x[v[name]].sum() * m.dt) if name in v else 0.0
+    return {
+        'status':    sol.status,
+        'profit':    sol.objective,
+        'kgj_hours': int(round((sol.x[v['on']] > 0.5).sum() * m.dt)) if 'on' in v else 0,
+        'kgj_heat':  total('q_KGJ'),
+        'ee_export': total('ee_export'),
+        'ee_import': total('ee_import'),
+        'shortfall': total('shortfall'),
+        'seconds':   time.perf_counter() - t0,
+    }
+
+
+def price_sweep(df: pd.DataFrame, p: dict, tech: dict, scenarios, base_ee: float, base_gas: float,
+                workers: int | None = None, time_limit: float = 300, options: dict | None = None) -> pd.DataFrame:
+    """Vyřeší cenové scénáře souběžně v `ProcessPoolExecutor`.
+
+    `df` jsou sloučená data posunutá na cílové ceny `base_ee` / `base_gas`
+    (jako pro jeden běh), `scenarios` seznam dvojic (EE, plyn) – viz `price_grid`.
+    Vrací tabulku o řádku na scénář: zisk (účelová funkce), hodiny chodu KGJ,
+    teplo z KGJ, export / import EE a nedodávku tepla [MWh]. `options` je nastavení
+    solveru pro každý scénář (viz `solver.solve`).
+    """
+    scenarios = [(float(e), float(g)) for e, g in scenarios]
+    ee  = df['ee_price'].to_numpy(dtype=float)
+    gas = df['gas_price'].to_numpy(dtype=float)
+    m   = build_dispatch_model(df, p, tech)
+    m.arrays()                                   # matice se sestaví jednou, před rozesláním
+    c0    = dispatch_objective(m, ee, gas, p, tech)
+    d_ee  = dispatch_objective(m, ee + 1.0, gas, p, tech) - c0
+    d_gas = dispatch_objective(m, ee, gas + 1.0, p, tech) - c0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(m, c0, d_ee, d_gas)) as pool:
+        futures = [pool.submit(_solve_scenario, e - base_ee, g - base_gas, time_limit, options)
+                   for e, g in scenarios]
+        rows = [f.result() for f in futures]
+
+    out = pd.DataFrame(rows)
+    out.insert(0, 'ee_price',  [e for e, _ in scenarios])
+    out.insert(1, 'gas_price', [g for _, g in scenarios])
+    return out
@@ -0,0 +1,126 @@
+"""Víceletý běh: dispečink pro každý rok FWD křivky proti jednomu lokálnímu profilu.
+
+FWD sešit se parsuje jednou (cache `inputs`), vstupy jednotlivých roků se
+sestaví v hlavním procesu a roky se řeší souběžně v `ProcessPoolExecutor`.
+Výsledkem je srovnání po letech (zisk, hodiny chodu KGJ, skladba tepla)
+a měsíční zisk každého roku; s `store` se každý rok uloží jako samostatný
+výpočet (a už spočtený rok se jen načte).
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pulp
+
+from .engine import RunResult, prepare_data, sized_params, solve_dispatch
+from .inputs import fwd_year_averages, fwd_years, merged_inputs, time_step
+from .params import SolveSettings
+from .report import build_results, key_metrics, monthly_summary
+from .store import ResultStore, result_key
+
+# Zdroje tepla ve skladbě (sloupec `res` → klíč souhrnu)
+HEAT_SOURCES = {
+    'KGJ [MW_th]':          'heat_kgj',
+    'Kotel [MW_th]':        'heat_boiler',
+    'Elektrokotel [MW_th]': 'heat_ek',
+    'Import tepla [MW_th]': 'heat_import',
+    'Shortfall [MW]':       'heat_shortfall',
+}
+
+
+def year_inputs(fwd_data: bytes, loc_data: bytes, p: dict, tech: dict, years=None,
+                shift: tuple = (0.0, 0.0)) -> dict:
+    """Sloučené vstupy {rok: df} pro roky `years` (výchozí všechny roky FWD).
+
+    Každý rok má base ceny rovné průměru svého roku plus `shift` = (ΔEE, Δplyn)
+    [€/MWh]; lokální profil se do roku přenese (`inputs.local_for_year`).
+    """
+    frames = {}
+    for year in (fwd_years(fwd_data) if years is None else years):
+        avg_ee, avg_gas = fwd_year_averages(fwd_data, year)
+        df = merged_inputs(fwd_data, year, avg_ee + shift[0], avg_gas + shift[1], loc_data)
+        if len(df):
+            frames[int(year)] = prepare_data(df, p, tech)
+    return frames
+
+
+def year_summary(year: int, df: pd.DataFrame, res: pd.DataFrame, metrics: dict, result: RunResult) -> dict:
+    """Řádek srovnání: ceny, zisk, hodiny KGJ, skladba tepla [MWh] a podíl KGJ na dodaném teple."""
+    heat = {key: float(res[col].sum() * time_step(df['datetime'])) for col, key in HEAT_SOURCES.items()}
+    made = sum(v for k, v in heat.items() if k != 'heat_shortfall')
+    return {
+        'year':       year,
+        'hours':      len(df),
+        'status':     pulp.LpStatus[result.status],
+        'ee_price':   float(df['ee_price'].mean()),
+        'gas_price':  float(df['gas_price'].mean()),
+        'profit':     metrics['total_profit'],
+        'kgj_hours':  metrics['kgj_hours'],
+        'kgj_starts': int((result.var('start', len(df)) > 0.5).sum()),
+        **heat,
+        'kgj_share':  heat['heat_kgj'] / made if made > 0 else 0.0,
+        'ee_export':  metrics['ee_export'],
+        'coverage':   metrics['coverage'],
+        'seconds':    round(result.seconds, 3),
+    }
+
+
+@dataclass
+class YearsResult:
+    table: pd.DataFrame                        # řádek na rok (viz `year_summary`)
+    monthly: pd.DataFrame = field(repr=False)  # měsíční souhrn všech roků se sloupcem `Rok`
+    keys: dict = field(default_factory=dict)   # rok → klíč v úložišti výsledků (s `store`)
+    seconds: float = 0.0
+
+
+def solve_years(frames: dict, p: dict, tech: dict, settings: SolveSettings, workers: int | None = None,
+                store: ResultStore | None = None, progress=None) -> YearsResult:
+    """Vyřeší roky `frames` ({rok: df}, viz `year_inputs`) souběžně, každý rok v jednom procesu.
+
+    Roky, které už úložiště `store` má, se nepočítají. `progress(done, total)`
+    se volá po každém hotovém roce.
+    """
+    t0      = time.perf_counter()
+    keys    = {y: result_key(p, tech, df, settings.to_dict()) for y, df in frames.items()}
+    results = {}
+    for y, key in keys.items():
+        stored = store.load(key) if store is not None else None
+        if stored is not None:
+            results[y] = RunResult(stored.status, stored.objective, stored.values, stored.meta)
+
+    todo = [y for y in frames if y not in results]
+    done = len(results)
+    if progress is not None and done:
+        progress(done, len(frames))
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(solve_dispatch, frames[y], p, tech, settings, store): y for y in todo}
+            for fut in as_completed(futures):
+                y, result = futures[fut], fut.result()
+                results[y] = result
+                if store is not None:
+                    store.save(keys[y], p, tech, frames[y], result.values, result.status,
+                               result.objective, result.extra)
+                done += 1
+                if progress is not None:
+                    progress(done, len(frames))
+
+    rows, monthly = [], []
+    for y in sorted(frames):
+        df, result = frames[y], results[y]
+        py  = sized_params(p, result.extra)   # v režimu 'sizing' s kapacitami nalezenými pro daný rok
+        res = build_results(df, py, tech, result.var)
+        rows.append(year_summary(y, df, res, key_metrics(res, py, tech, result.var), result))
+        monthly.append(monthly_summary(res).assign(Rok=y))
+    return YearsResult(table=pd.DataFrame(rows),
+                       monthly=pd.concat(monthly, ignore_index=True) if monthly else pd.DataFrame(),
+                       keys=keys if store is not None else {}, seconds=time.perf_counter() - t0)
+
+
+def run_years(fwd_data: bytes, loc_data: bytes, p: dict, tech: dict, settings: SolveSettings,
+              years=None, shift: tuple = (0.0, 0.0), workers: int | None = None,
+              store: ResultStore | None = None, progress=None) -> YearsResult:
+    """`year_inputs` + `solve_years` – všechny (nebo vybrané) roky FWD křivky jedním voláním."""
+    return solve_years(year_inputs(fwd_data, loc_data, p, tech, years, shift), p, tech, settings,
+                       workers=workers, store=store, progress=progress)
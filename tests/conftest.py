@@ -0,0 +1,46 @@
+"""Společná data testů: krátká syntetická lokalita a výchozí parametry UI."""
+import numpy as np
+import pandas as pd
+import pytest
+
+# Výchozí hodnoty widgetů app.py
+DEFAULTS = dict(
+    dist_ee_buy=33.0, dist_ee_sell=2.0, gas_dist=5.0, internal_ee_use=True, h_price=120.0, h_cover=0.99,
+    shortfall_penalty=500.0, ee_sell_fix=False, ee_sell_fix_ratio=0.0, ee_sell_fix_price=0.0,
+    k_th=1.09, k_eff_th=0.46, k_eff_el=0.40, k_min=0.55, k_start_cost=1200.0, k_min_runtime=4,
+    kgj_gas_fix=False, b_max=3.91, boil_eff=0.95, boil_gas_fix=False, ek_max=0.61, ek_eff=0.98,
+    ek_ee_fix=False, tes_cap=10.0, tes_loss=0.005, bess_cap=1.0, bess_p=0.5, bess_eff=0.90,
+    bess_cycle_cost=5.0, bess_dist_buy=False, bess_dist_sell=False, bess_ee_fix=False,
+    fve_installed_p=1.0, imp_max=2.0, imp_price=150.0,
+)
+
+
+def site_data(hours: int, step: float = 1.0, seed: int = 0) -> pd.DataFrame:
+    """Sloučená data lokality od 1. 1. 2025 s krokem `step` [h]: ceny EE s denním tvarem,
+    plyn, poptávka tepla se zimním průběhem a FVE výkon při 1 MW instalovaných."""
+    rng  = np.random.default_rng(seed)
+    t    = pd.date_range('2025-01-01', periods=int(round(hours / step)), freq=pd.Timedelta(hours=step))
+    hour = np.asarray(t.hour + t.minute / 60, dtype=float)
+    n    = len(t)
+    sun  = np.clip(np.sin(np.pi * (hour - 8) / 8), 0, None) * ((hour > 8) & (hour < 16))
+    return pd.DataFrame({
+        'datetime':               t,
+        'ee_price':               85 + 18 * np.sin(np.pi * (hour - 6) / 12) * ((hour > 6) & (hour < 22))
+                                  + rng.normal(0, 10, n),
+        'gas_price':              40 + rng.normal(0, 1, n),
+        'Poptávka po teple (MW)': np.clip(2.2 + 0.35 * np.cos(2 * np.pi * (hour - 7) / 24)
+                                          + rng.normal(0, 0.15, n), 0.05, None),
+        'FVE (MW)':               sun * rng.uniform(0.25, 1.0, n) * 0.5,
+    })
+
+
+def site_params(**overrides) -> dict:
+    """Slovník `p` jako z UI (výchozí hodnoty, `k_el` dopočtené) s úpravami `overrides`."""
+    p = {**DEFAULTS, **overrides}
+    p['k_el'] = p['k_th'] * p['k_eff_el'] / p['k_eff_th']
+    return p
+
+
+@pytest.fixture
+def all_tech() -> dict:
+    return dict(kgj=True, boil=True, ek=True, tes=True, bess=True, fve=True, ext_heat=True)
@@ -0,0 +1,123 @@
+"""Původní formulace dispečinku v PuLP (app.py před přechodem na `LinearModel`).
+
+Slouží jen jako reference pro test ekvivalence: stejná omezení a účelová
+funkce po hodinách, jak je sestavoval původní skript. Zná jen hodinová data,
+min. dobu běhu KGJ a žádné rampy ani min. odstávku.
+"""
+import pulp
+
+
+def pulp_dispatch(df, p: dict, tech: dict, time_limit: float = 300) -> tuple:
+    """Vyřeší původní model; vrací (status, hodnota účelové funkce)."""
+    use_kgj, use_boil, use_ek, use_tes, use_bess, use_fve, use_ext_heat = (
+        tech[k] for k in ('kgj', 'boil', 'ek', 'tes', 'bess', 'fve', 'ext_heat'))
+    T     = len(df)
+    model = pulp.LpProblem("KGJ_Dispatch", pulp.LpMaximize)
+
+    # ── Proměnné ─────────────────────────────────────
+    if use_kgj:
+        q_kgj = pulp.LpVariable.dicts("q_KGJ", range(T), 0, p['k_th'])
+        on    = pulp.LpVariable.dicts("on",    range(T), 0, 1, "Binary")
+        start = pulp.LpVariable.dicts("start", range(T), 0, 1, "Binary")
+    else:
+        q_kgj = on = start = {t: 0 for t in range(T)}
+
+    q_boil = pulp.LpVariable.dicts("q_Boil", range(T), 0, p['b_max']) if use_boil else {t: 0 for t in range(T)}
+    q_ek   = pulp.LpVariable.dicts("q_EK",   range(T), 0, p['ek_max']) if use_ek else {t: 0 for t in range(T)}
+    q_imp  = pulp.LpVariable.dicts("q_Imp",  range(T), 0, p['imp_max']) if use_ext_heat else {t: 0 for t in range(T)}
+
+    if use_tes:
+        tes_soc = pulp.LpVariable.dicts("TES_SOC", range(T + 1), 0, p['tes_cap'])
+        tes_in  = pulp.LpVariable.dicts("TES_In",  range(T), 0)
+        tes_out = pulp.LpVariable.dicts("TES_Out", range(T), 0)
+        model  += tes_soc[0] == p['tes_cap'] * 0.5
+    else:
+        tes_soc = {t: 0 for t in range(T + 1)}
+        tes_in  = tes_out = {t: 0 for t in range(T)}
+
+    if use_bess:
+        bess_soc = pulp.LpVariable.dicts("BESS_SOC", range(T + 1), 0, p['bess_cap'])
+        bess_cha = pulp.LpVariable.dicts("BESS_Cha", range(T), 0, p['bess_p'])
+        bess_dis = pulp.LpVariable.dicts("BESS_Dis", range(T), 0, p['bess_p'])
+        model   += bess_soc[0] == p['bess_cap'] * 0.2
+    else:
+        bess_soc = {t: 0 for t in range(T + 1)}
+        bess_cha = bess_dis = {t: 0 for t in range(T)}
+
+    ee_export      = pulp.LpVariable.dicts("ee_export", range(T), 0)
+    ee_import      = pulp.LpVariable.dicts("ee_import", range(T), 0)
+    heat_shortfall = pulp.LpVariable.dicts("shortfall", range(T), 0)
+
+    # ── KGJ omezení ───────────────────────────────────
+    if use_kgj:
+        for t in range(T):
+            model += q_kgj[t] <= p['k_th'] * on[t]
+            model += q_kgj[t] >= p['k_min'] * p['k_th'] * on[t]
+        model += start[0] == on[0]
+        for t in range(1, T):
+            model += start[t] >= on[t] - on[t - 1]
+            model += start[t] <= on[t]
+            model += start[t] <= 1 - on[t - 1]
+        for t in range(T):
+            for dt in range(1, int(p['k_min_runtime'])):
+                if t + dt < T:
+                    model += on[t + dt] >= start[t]
+
+    # ── Hlavní smyčka ─────────────────────────────────
+    obj      = []
+    boil_eff = p.get('boil_eff', 0.95)
+    ek_eff   = p.get('ek_eff', 0.98)
+    for t in range(T):
+        p_ee_m  = df['ee_price'].iloc[t]
+        p_gas_m = df['gas_price'].iloc[t]
+
+        p_gas_kgj  = p.get('kgj_gas_fix_price',  p_gas_m) if (use_kgj  and p.get('kgj_gas_fix'))  else p_gas_m
+        p_gas_boil = p.get('boil_gas_fix_price', p_gas_m) if (use_boil and p.get('boil_gas_fix')) else p_gas_m
+        p_ee_ek    = p.get('ek_ee_fix_price',    p_ee_m)  if (use_ek   and p.get('ek_ee_fix'))    else p_ee_m
+
+        h_dem = df['Poptávka po teple (MW)'].iloc[t]
+        fve_p = float(df['FVE (MW)'].iloc[t]) if (use_fve and 'FVE (MW)' in df.columns) else 0.0
+
+        if use_tes:
+            model += tes_soc[t + 1] == tes_soc[t] * (1 - p['tes_loss']) + tes_in[t] - tes_out[t]
+        if use_bess:
+            model += bess_soc[t + 1] == bess_soc[t] + bess_cha[t] * p['bess_eff'] - bess_dis[t] / p['bess_eff']
+
+        heat_delivered = q_kgj[t] + q_boil[t] + q_ek[t] + q_imp[t] + tes_out[t] - tes_in[t]
+        model += heat_delivered + heat_shortfall[t] >= h_dem * p['h_cover']
+        model += heat_delivered <= h_dem + 1e-3
+
+        ee_kgj_out = q_kgj[t] * (p['k_eff_el'] / p['k_eff_th']) if use_kgj else 0
+        ee_ek_in   = q_ek[t] / ek_eff if use_ek else 0
+        model += ee_kgj_out + fve_p + ee_import[t] + bess_dis[t] == ee_ek_in + bess_cha[t] + ee_export[t]
+        model += ee_export[t] <= ee_kgj_out + fve_p + bess_dis[t]
+
+        dist_sell_net = p['dist_ee_sell'] if not p['internal_ee_use'] else 0.0
+        dist_buy_net  = p['dist_ee_buy'] if not p['internal_ee_use'] else 0.0
+
+        bess_dist_buy_cost  = p['dist_ee_buy'] * bess_cha[t] if (use_bess and p.get('bess_dist_buy')) else 0
+        bess_dist_sell_cost = p['dist_ee_sell'] * bess_dis[t] if (use_bess and p.get('bess_dist_sell')) else 0
+
+        if p.get('ee_sell_fix'):
+            fix_ratio = p.get('ee_sell_fix_ratio', 0.0)
+            p_ee_sell = fix_ratio * p.get('ee_sell_fix_price', p_ee_m) + (1 - fix_ratio) * p_ee_m
+        else:
+            p_ee_sell = p_ee_m
+
+        revenue = p['h_price'] * heat_delivered + (p_ee_sell - dist_sell_net) * ee_export[t]
+        costs = (
+            ((p_gas_kgj + p['gas_dist']) * (q_kgj[t] / p['k_eff_th']) if use_kgj else 0) +
+            ((p_gas_boil + p['gas_dist']) * (q_boil[t] / boil_eff) if use_boil else 0) +
+            (p_ee_m + dist_buy_net) * ee_import[t] +
+            ((p_ee_ek + dist_buy_net) * ee_ek_in if use_ek else 0) +
+            (p['imp_price'] * q_imp[t] if use_ext_heat else 0) +
+            (p['k_start_cost'] * start[t] if use_kgj else 0) +
+            (p['bess_cycle_cost'] * (bess_cha[t] + bess_dis[t]) if use_bess else 0) +
+            bess_dist_buy_cost + bess_dist_sell_cost +
+            p['shortfall_penalty'] * heat_shortfall[t]
+        )
+        obj.append(revenue - costs)
+
+    model += pulp.lpSum(obj)
+    status = model.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit))
+    return status, pulp.value(model.objective)
@@ -0,0 +1,38 @@
+import numpy as np
+import pulp
+import pytest
+
+from kgj import build_dispatch_model, solve_decomposed
+from kgj.decompose import FEAS_TOL
+
+from .conftest import site_data, site_params
+
+
+def test_rolling_stitched_solution_is_feasible(all_tech):
+    df, p = site_data(21 * 24, seed=3), site_params(k_min_runtime=6)
+    res   = solve_decomposed(df, p, all_tech, period='W', time_limit=60)
+    assert res.solution.status == pulp.LpStatusOptimal
+    assert res.feasible
+    assert build_dispatch_model(df, p, all_tech).violation(res.solution.x).max() <= FEAS_TOL
+
+
+def test_parallel_windows_without_boundary_constraints_are_feasible(all_tech):
+    # Bez min. doby běhu nemají nezávislá okna co na hranicích porušit
+    df, p = site_data(14 * 24, seed=4), site_params(k_min_runtime=1)
+    res   = solve_decomposed(df, p, all_tech, period='W', parallel=True, workers=2, time_limit=60)
+    assert res.solution.status == pulp.LpStatusOptimal
+    assert build_dispatch_model(df, p, all_tech).violation(res.solution.x).max() <= FEAS_TOL
+
+
+def test_parallel_boundary_violation_downgrades_status(all_tech):
+    # Drahá EE 20:00–1:00 → KGJ startuje před půlnocí; okno dalšího dne začíná se stojící KGJ,
+    # takže sešitý běh přes hranici oken nesplní min. dobu běhu celoročního modelu
+    df = site_data(4 * 24)
+    df['ee_price'] = np.where(df['datetime'].dt.hour.isin([20, 21, 22, 23, 0]), 400.0, 20.0)
+    p   = site_params(k_min_runtime=6)
+    res = solve_decomposed(df, p, all_tech, period='D', parallel=True, workers=1, time_limit=60)
+    violation = build_dispatch_model(df, p, all_tech).violation(res.solution.x).max()
+    assert violation > FEAS_TOL
+    assert res.violation == pytest.approx(violation)
+    assert not res.feasible
+    assert res.solution.status == pulp.LpStatusUndefined
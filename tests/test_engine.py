@@ -0,0 +1,60 @@
+import pytest
+
+from kgj import build_dispatch_model, solve
+from kgj import engine
+from kgj.params import SolveSettings
+from kgj.solver import SolveCancelled
+
+from .conftest import site_data, site_params
+
+
+def test_price_only_resolve_reuses_model(all_tech):
+    engine._models.clear()
+    df, p  = site_data(96, seed=2), site_params()
+    dearer = df.assign(ee_price=df['ee_price'] * 1.2)
+    first  = engine.solve_dispatch(df, p, all_tech, SolveSettings())
+    second = engine.solve_dispatch(dearer, {**p, 'h_price': 150.0}, all_tech, SolveSettings())
+    fresh  = solve(build_dispatch_model(dearer, {**p, 'h_price': 150.0}, all_tech))
+    assert not first.extra['model_reused']
+    assert second.extra['model_reused'] and second.extra['warm_start'] == 'model'
+    assert second.objective == pytest.approx(fresh.objective, rel=1e-6)
+
+
+def test_representative_days_skip_shadow_prices(all_tech):
+    df, p = site_data(28 * 24, seed=7), site_params()
+    run   = engine.solve_dispatch(df, p, all_tech, SolveSettings(mode='representative', rep_days=4))
+    assert run.status == 1
+    assert 'mc_heat' not in run.values and 'shadow_prices' not in run.extra
+
+
+def test_cached_solution_reused_only_when_feasible(all_tech):
+    engine._models.clear()
+    df, p    = site_data(96, seed=2), site_params()
+    settings = SolveSettings(shadow_prices=False)
+    first  = engine.solve_dispatch(df, p, all_tech, settings)
+    cover  = engine.solve_dispatch(df, {**p, 'h_cover': 0.95}, all_tech, settings)
+    demand = engine.solve_dispatch(df.assign(**{'Poptávka po teple (MW)': df['Poptávka po teple (MW)'] * 1.5}),
+                                   p, all_tech, settings)
+    assert first.extra['warm_start'] == 'heuristic'
+    assert cover.extra['warm_start'] == 'model_rhs'    # nižší pokrytí: předchozí řešení zůstává přípustné
+    assert demand.extra['warm_start'] == 'heuristic'   # vyšší poptávku předchozí řešení nepokryje
+
+
+def test_failed_first_solve_does_not_leave_stale_coefficients(all_tech, monkeypatch):
+    engine._models.clear()
+    df, p = site_data(96, seed=8), site_params()
+
+    def cancelled(*args, **kwargs):
+        raise SolveCancelled()
+
+    # První řešení nově sestaveného modelu se zruší, další volání stejné struktury má jiné ceny
+    monkeypatch.setattr(engine, 'solve', cancelled)
+    with pytest.raises(SolveCancelled):
+        engine.solve_dispatch(df, p, all_tech, SolveSettings(shadow_prices=False))
+    monkeypatch.undo()
+
+    dearer = {**p, 'h_price': 300.0}
+    run    = engine.solve_dispatch(df, dearer, all_tech, SolveSettings(shadow_prices=False))
+    fresh  = solve(build_dispatch_model(df, dearer, all_tech))
+    assert run.extra['model_reused']
+    assert run.objective == pytest.approx(fresh.objective, rel=1e-6)
@@ -0,0 +1,65 @@
+import pandas as pd
+
+from kgj.inputs import check_series
+
+
+def hours(start: str, n: int, freq: str = 'h') -> pd.Series:
+    return pd.Series(pd.date_range(start, periods=n, freq=freq))
+
+
+def test_clean_series():
+    report = check_series(hours('2025-01-01', 48))
+    assert report['step'] == 1.0
+    assert report['gap_count'] == report['missing'] == report['duplicates'] == 0
+    assert not report['unsorted']
+
+
+def test_gap_reported_with_first_missing_time():
+    t = hours('2025-01-01', 48).drop(range(10, 13))
+    report = check_series(t)
+    assert report['gap_count'] == 1
+    assert report['missing'] == 3
+    assert report['gaps'] == [{'start': '2025-01-01 10:00', 'steps': 3, 'dst': False}]
+    assert report['missing_dst'] == 0
+
+
+def test_gap_in_quarter_hour_series():
+    t = hours('2025-01-01', 96, '15min').drop([20, 21])
+    report = check_series(t)
+    assert report['step'] == 0.25
+    assert report['missing'] == 2
+    assert report['gaps'][0]['start'] == '2025-01-01 05:00'
+
+
+def test_duplicates_counted_per_extra_occurrence():
+    t = hours('2025-01-01', 24)
+    t = pd.concat([t, t.iloc[[5, 5]]]).sort_values()
+    report = check_series(t)
+    assert report['duplicates'] == 2
+    assert report['repeated'] == [{'time': '2025-01-01 05:00', 'count': 3, 'dst': False}]
+    assert report['duplicates_dst'] == 0
+
+
+def test_unsorted_series():
+    t = hours('2025-01-01', 24)
+    report = check_series(t.iloc[::-1])
+    assert report['unsorted']
+    assert report['gap_count'] == report['duplicates'] == 0
+
+
+def test_spring_dst_gap():
+    # Místní čas bez 2:00 poslední březnové neděle
+    t = hours('2025-03-30', 24)
+    report = check_series(t[t.dt.hour != 2])
+    assert report['missing'] == report['missing_dst'] == 1
+    assert report['gaps'][0] == {'start': '2025-03-30 02:00', 'steps': 1, 'dst': True}
+
+
+def test_autumn_dst_repeated_hour_is_not_unsorted():
+    # Místní čas s opakovanou 2:00 poslední říjnové neděle
+    t = hours('2025-10-26', 24)
+    t = pd.concat([t.iloc[:3], t.iloc[[2]], t.iloc[3:]])
+    report = check_series(t)
+    assert report['duplicates'] == report['duplicates_dst'] == 1
+    assert report['repeated'][0]['dst']
+    assert not report['unsorted']
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from kgj.engine import solve_dispatch
+from kgj.ledger import hourly_ledger
+from kgj.params import SolveSettings
+
+from .conftest import site_data, site_params
+
+
+@pytest.mark.parametrize('step', [1.0, 0.25])
+def test_ledger_total_equals_objective(step, all_tech):
+    df, p  = site_data(72, step), site_params()
+    run    = solve_dispatch(df, p, all_tech, SolveSettings())
+    ledger = hourly_ledger(df, p, all_tech, run.var)
+    assert run.status == 1
+    assert ledger.to_numpy().sum() == pytest.approx(run.objective, rel=1e-9, abs=1e-6)
+
+
+def test_quarter_hour_energy_scaled_by_step(all_tech):
+    # Hodinový profil rozepsaný na čtvrthodiny: zisk odpovídá hodinovým datům, ne čtyřnásobku
+    hourly  = site_data(48)
+    quarter = hourly.loc[hourly.index.repeat(4)].reset_index(drop=True)
+    quarter['datetime'] = pd.date_range(hourly['datetime'].iloc[0], periods=len(quarter), freq='15min')
+    p = site_params()
+    h = solve_dispatch(hourly, p, all_tech, SolveSettings())
+    q = solve_dispatch(quarter, p, all_tech, SolveSettings())
+    assert q.objective == pytest.approx(h.objective, rel=0.02)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from kgj import build_dispatch_model, solve
+
+from .conftest import site_data, site_params
+from .reference import pulp_dispatch
+
+TECH = {
+    'all':     dict(kgj=True, boil=True, ek=True, tes=True, bess=True, fve=True, ext_heat=True),
+    'no_boil': dict(kgj=True, boil=False, ek=True, tes=False, bess=True, fve=True, ext_heat=False),
+    'no_kgj':  dict(kgj=False, boil=True, ek=False, tes=True, bess=False, fve=False, ext_heat=True),
+}
+
+
+@pytest.mark.parametrize('combo', list(TECH))
+def test_objective_matches_pulp_formulation(combo):
+    df, p, tech = site_data(72), site_params(), TECH[combo]
+    status, objective = pulp_dispatch(df, p, tech)
+    sol = solve(build_dispatch_model(df, p, tech))
+    assert sol.status == status == 1
+    assert sol.objective == pytest.approx(objective, rel=1e-6, abs=1e-3)
+
+
+def test_objective_matches_pulp_formulation_with_fixed_prices():
+    df, tech = site_data(72, seed=1), TECH['all']
+    p = site_params(internal_ee_use=False, ee_sell_fix=True, ee_sell_fix_ratio=0.8, ee_sell_fix_price=90.0,
+                    kgj_gas_fix=True, kgj_gas_fix_price=35.0, ek_ee_fix=True, ek_ee_fix_price=60.0,
+                    bess_dist_buy=True)
+    status, objective = pulp_dispatch(df, p, tech)
+    sol = solve(build_dispatch_model(df, p, tech))
+    assert sol.objective == pytest.approx(objective, rel=1e-6, abs=1e-3)
+
+
+def runs(on: np.ndarray, state: int) -> list:
+    """Délky souvislých úseků ve stavu `state` ležících mezi úseky opačného stavu (bez okrajů)."""
+    on    = np.round(on).astype(int)
+    edges = np.flatnonzero(np.diff(on)) + 1
+    parts = np.split(on, edges)
+    return [len(r) for r in parts[1:-1] if r[0] == state]
+
+
+def peaky_site(step: float):
+    # Drahá EE ve třech blocích denně, mezi nimi 2–3 h levná → lákavé krátké odstávky
+    df = site_data(3 * 24, step)
+    df['ee_price'] = np.where(df['datetime'].dt.hour.isin([6, 7, 8, 12, 13, 17, 18, 19, 20]), 300.0, 10.0)
+    return df
+
+
+@pytest.mark.parametrize('step', [1.0, 0.25])
+def test_min_downtime_between_runs(step, all_tech):
+    df = peaky_site(step)
+    p  = site_params(k_min_runtime=2, k_min_downtime=4, k_start_cost=50.0)
+    sol = solve(build_dispatch_model(df, p, all_tech))
+    off = runs(sol.model.unpack(sol.x)['on'], 0)
+    assert off, "dispečink bez odstávky mezi běhy – test nic neověřuje"
+    assert min(off) * step >= 4
+
+    # Bez omezení by KGJ mezi bloky krátce stála
+    free = solve(build_dispatch_model(df, {**p, 'k_min_downtime': 1}, all_tech))
+    assert min(runs(free.model.unpack(free.x)['on'], 0)) * step < 4
+
+
+@pytest.mark.parametrize('step', [1.0, 0.25])
+def test_ramp_limits(step, all_tech):
+    df   = peaky_site(step)
+    p    = site_params(k_min_runtime=1, k_start_cost=50.0, k_ramp_up=0.2, k_ramp_down=0.3)
+    sol  = solve(build_dispatch_model(df, p, all_tech))
+    v    = sol.model.unpack(sol.x)
+    q, on = v['q_KGJ'], np.round(v['on'])
+    k_min = p['k_min'] * p['k_th']
+    both  = (on[1:] == 1) & (on[:-1] == 1)
+    dq    = np.diff(q)
+    assert both.any()
+    assert (dq[both] <= 0.2 * step + 1e-6).all()
+    assert (-dq[both] <= 0.3 * step + 1e-6).all()
+    # Start a odstavení: výkon nejvýš min. zatížení (nebo rampa, je-li větší)
+    starts = np.flatnonzero((on[1:] == 1) & (on[:-1] == 0)) + 1
+    stops  = np.flatnonzero((on[1:] == 0) & (on[:-1] == 1))
+    assert (q[starts] <= max(0.2 * step, k_min) + 1e-6).all()
+    assert (q[stops] <= max(0.3 * step, k_min) + 1e-6).all()
+
+    # Rampy omezují: bez nich je zisk vyšší
+    free = solve(build_dispatch_model(df, {**p, 'k_ramp_up': 0.0, 'k_ramp_down': 0.0}, all_tech))
+    assert sol.objective < free.objective - 1.0
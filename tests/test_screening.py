@@ -0,0 +1,26 @@
+import numpy as np
+import pulp
+
+from kgj.engine import solve_dispatch
+from kgj.params import SolveSettings
+
+from .conftest import site_data, site_params
+
+
+def test_screening_is_an_estimate_between_heuristic_and_bound(all_tech):
+    df, p = site_data(7 * 24, seed=10), site_params()
+    run   = solve_dispatch(df, p, all_tech, SolveSettings(mode='screening'))
+    scr   = run.extra['screening']
+    assert run.status == pulp.LpStatusNotSolved
+    assert run.extra['feasible'] and scr['feasible']
+    assert scr['heuristic'] <= scr['bound'] + 1e-6
+
+
+def test_infeasible_heuristic_is_not_reported_as_solved(all_tech):
+    # Heuristika merit orderu rampy KGJ nehlídá: EE střídavě drahá a levná po 3 h → skoky výkonu
+    df = site_data(3 * 24)
+    df['ee_price'] = np.where(df['datetime'].dt.hour // 3 % 2 == 0, 300.0, 10.0)
+    p  = site_params(k_ramp_up=0.1, k_ramp_down=0.1)
+    run   = solve_dispatch(df, p, all_tech, SolveSettings(mode='screening'))
+    assert not run.extra['feasible'] and run.extra['violation'] > 0
+    assert run.status == pulp.LpStatusUndefined
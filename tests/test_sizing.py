@@ -0,0 +1,51 @@
+import numpy as np
+import pulp
+import pytest
+
+from kgj.bench import synthetic_site, write_inputs
+from kgj.engine import run_site, sized_params, solve_dispatch
+from kgj.params import Params, SolveSettings, Tech
+from kgj.shadow import shadow_prices
+
+from .conftest import site_data, site_params
+
+SIZING = {'tes_cap': [50.0, 300.0, 1000.0]}
+
+
+def test_sized_capacity_within_bounds_and_respected(all_tech):
+    df, p = site_data(7 * 24, seed=5), site_params(tes_cap=10.0)
+    run   = solve_dispatch(df, p, all_tech, SolveSettings(mode='sizing', sizing=SIZING, time_limit=60))
+    size  = run.extra['sizing']['tes_cap']
+    assert run.status == 1
+    assert 50.0 - 1e-6 <= size['value'] <= 300.0 + 1e-6
+    assert run.values['TES_SOC'].max() <= size['value'] + 1e-6
+    # Investice poměrně k délce horizontu
+    assert size['investment'] == pytest.approx(size['value'] * 1000.0 * 7 * 24 / 8760)
+
+
+def test_shadow_prices_use_sized_capacity(all_tech):
+    df, p = site_data(7 * 24, seed=5), site_params(tes_cap=10.0)
+    run   = solve_dispatch(df, p, all_tech, SolveSettings(mode='sizing', sizing=SIZING, time_limit=60))
+    size  = run.extra['sizing']['tes_cap']['value']
+    assert run.extra['shadow_prices']['status'] == pulp.LpStatusOptimal
+
+    # Mezní ceny = LP s pevným chodem pro nalezenou kapacitu, ne pro zadaných 10 MWh
+    ref = shadow_prices(df, {**p, 'tes_cap': size}, all_tech, run.values)
+    np.testing.assert_allclose(run.values['mc_heat'], ref.values['mc_heat'], atol=1e-6)
+    np.testing.assert_allclose(run.values['mc_ee'], ref.values['mc_ee'], atol=1e-6)
+
+
+def test_sized_params_replace_only_sized_keys():
+    p = {'tes_cap': 10.0, 'bess_cap': 1.0}
+    assert sized_params(p, {}) is p
+    assert sized_params(p, {'sizing': {'tes_cap': {'value': 80.0}}}) == {'tes_cap': 80.0, 'bess_cap': 1.0}
+
+
+def test_site_run_reports_sized_plant(tmp_path):
+    fwd, loc = synthetic_site(7 * 24, seed=6)
+    fwd_path, loc_path = write_inputs(fwd, loc, str(tmp_path), 'csv')
+    run  = run_site(fwd_path, loc_path, params=Params(tes_cap=10.0), tech=Tech(),
+                    settings=SolveSettings(mode='sizing', sizing=SIZING, time_limit=60))
+    size = run.result.extra['sizing']['tes_cap']['value']
+    assert run.p['tes_cap'] == pytest.approx(size)
+    assert run.result.values['TES_SOC'].max() <= size + 1e-6
@@ -0,0 +1,18 @@
+import pytest
+
+from kgj import build_dispatch_model, price_sweep, solve
+
+from .conftest import site_data, site_params
+
+
+def test_base_scenario_matches_single_solve(all_tech):
+    df, p = site_data(48, seed=9), site_params()
+    ee, gas = df['ee_price'].mean(), df['gas_price'].mean()
+    out = price_sweep(df, p, all_tech, [(ee, gas), (ee + 20, gas)], ee, gas, workers=1)
+    assert out['profit'].iloc[0] == pytest.approx(solve(build_dispatch_model(df, p, all_tech)).objective, rel=1e-6)
+
+
+def test_solver_options_reach_scenarios(all_tech):
+    df, p = site_data(24), site_params()
+    with pytest.raises(ValueError, match='backend'):
+        price_sweep(df, p, all_tech, [(80.0, 40.0)], 80.0, 40.0, workers=1, options={'backend': 'none'})
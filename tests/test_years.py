@@ -0,0 +1,18 @@
+import pytest
+
+from kgj import years
+from kgj.params import SolveSettings
+
+from .conftest import site_data, site_params
+
+
+def test_sized_years_report_with_sized_capacities(all_tech, monkeypatch):
+    seen = []
+    real = years.build_results
+    monkeypatch.setattr(years, 'build_results', lambda df, p, *a, **k: seen.append(p) or real(df, p, *a, **k))
+
+    frames   = {2025: site_data(7 * 24, seed=11)}
+    settings = SolveSettings(mode='sizing', sizing={'tes_cap': [50.0, 300.0, 1000.0]}, shadow_prices=False)
+    out = years.solve_years(frames, site_params(tes_cap=10.0), all_tech, settings, workers=1)
+    assert out.table['status'].tolist() == ['Optimal']
+    assert 50.0 - 1e-6 <= seen[0]['tes_cap'] <= 300.0 + 1e-6